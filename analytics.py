@@ -4,6 +4,12 @@ import logging
 from collections import Counter
 from config import *
 from database import sort_initiatives_by_score, calculate_score_fast
+from resilience import guarded_request, CircuitOpenError
+from tracing import span, profile_hotpath
+from score_index import get_score_index, PRIORITY_THRESHOLDS
+from reports import render_statistics, status_emoji, priority_emoji
+from growth_view import get_growth_view
+from parallel_stats import aggregate as aggregate_rows_stats
 
 logger = logging.getLogger(__name__)
 
@@ -19,111 +25,90 @@ def safe_get_string(init, field, default='Sin datos'):
         logger.warning(f"Error getting {field}: {e}")
         return default
 
+@profile_hotpath('calculate_statistics_fast')
 def calculate_statistics_fast(initiatives):
     """Calcular estadísticas optimizado - FIXED VERSION"""
     if not initiatives:
         return {}
     
+    with span('stats_computation', rows=len(initiatives)):
+        return _calculate_statistics(initiatives)
+
+def _initiative_summary(init, score):
+    return {
+        'name': safe_get_string(init, 'initiative_name', 'Sin nombre'),
+        'score': score,
+        'team': safe_get_string(init, 'team', 'Sin equipo'),
+        'owner': safe_get_string(init, 'owner', 'Sin owner'),
+        'status': safe_get_string(init, 'status', 'Sin estado'),
+        'description': safe_get_string(init, 'description', 'Sin descripción')[:100],
+        'kpi': safe_get_string(init, 'main_kpi', 'Sin KPI'),
+        'portal': safe_get_string(init, 'portal', 'Sin portal')
+    }
+
+def _calculate_statistics(initiatives):
     try:
-        sorted_initiatives = sort_initiatives_by_score(initiatives)
+        # Sobre el snapshot cacheado el ranking sale del índice de orden estadístico (sin sort)
+        index = get_score_index(initiatives)
+        if index is not None and index.size() == len(initiatives):
+            sorted_initiatives = index.top_k(index.size())
+        else:
+            index = None
+            sorted_initiatives = sort_initiatives_by_score(initiatives)
         total = len(sorted_initiatives)
         
-        # Contadores usando Counter - VERSION SEGURA
-        teams = Counter()
-        owners = Counter() 
-        kpis = Counter()
-        portals = Counter()
-        statuses = Counter()
-        
-        # Procesar cada iniciativa de forma segura
-        for init in sorted_initiatives:
-            if isinstance(init, dict):
-                try:
-                    # Usar safe_get_string para evitar None.strip() - FIX PRINCIPAL
-                    team = safe_get_string(init, 'team', 'Sin equipo')
-                    owner = safe_get_string(init, 'owner', 'Sin owner') 
-                    kpi = safe_get_string(init, 'main_kpi', 'Sin KPI')
-                    portal = safe_get_string(init, 'portal', 'Sin portal')
-                    status = safe_get_string(init, 'status', 'Sin estado')
-                    
-                    teams[team] += 1
-                    owners[owner] += 1
-                    kpis[kpi] += 1
-                    portals[portal] += 1
-                    statuses[status] += 1
-                except Exception as e:
-                    logger.warning(f"Error processing initiative: {e}")
-                    continue
-        
-        # Métricas numéricas optimizadas
-        metrics = []
-        top_initiatives = []
-        growth_initiatives = []  # NUEVO: Enfoque en Growth
-        
-        for init in sorted_initiatives:
-            if isinstance(init, dict):
-                try:
-                    reach = float(init.get('reach', 0)) or 0
-                    impact = float(init.get('impact', 0)) or 0
-                    confidence = float(init.get('confidence', 0)) or 0
-                    effort = float(init.get('effort', 1)) or 1
-                    score = float(init.get('score', 0)) or init.get('calculated_score', 0)
-                    
-                    if any([reach, impact, confidence, effort]):
-                        metrics.append({
-                            'reach': reach, 'impact': impact, 
-                            'confidence': confidence, 'effort': effort, 'score': score
-                        })
-                    
-                    if score > 0:
-                        initiative_data = {
-                            'name': safe_get_string(init, 'initiative_name', 'Sin nombre'),
-                            'score': score,
-                            'team': safe_get_string(init, 'team', 'Sin equipo'),
-                            'owner': safe_get_string(init, 'owner', 'Sin owner'),
-                            'status': safe_get_string(init, 'status', 'Sin estado'),
-                            'description': safe_get_string(init, 'description', 'Sin descripción')[:100],
-                            'kpi': safe_get_string(init, 'main_kpi', 'Sin KPI'),
-                            'portal': safe_get_string(init, 'portal', 'Sin portal')
-                        }
-                        top_initiatives.append(initiative_data)
-                        
-                        # NUEVO: Identificar iniciativas de Growth
-                        if safe_get_string(init, 'team', '').lower() == 'growth':
-                            growth_initiatives.append(initiative_data)
-                            
-                except Exception as e:
-                    logger.warning(f"Error processing metrics for initiative: {e}")
-                    continue
+        # Contadores, sumas de métricas y top-K en una pasada; en shards sobre el pool de
+        # procesos si el portfolio es grande (PARALLEL_STATS_CONFIG)
+        partial = aggregate_rows_stats(sorted_initiatives, buckets=index is None)
+        if partial["skipped"]:
+            logger.warning(f"⚠️ {partial['skipped']} initiatives skipped while aggregating statistics")
+        teams, owners, kpis = partial["counters"]["teams"], partial["counters"]["owners"], partial["counters"]["kpis"]
+        portals, statuses = partial["counters"]["portals"], partial["counters"]["statuses"]
         
         # Promedios seguros
         avg_metrics = {}
-        if metrics:
-            try:
-                avg_metrics = {
-                    'reach': sum(m['reach'] for m in metrics) / len(metrics) * 100,
-                    'impact': sum(m['impact'] for m in metrics) / len(metrics),
-                    'confidence': sum(m['confidence'] for m in metrics) / len(metrics) * 100,
-                    'effort': sum(m['effort'] for m in metrics) / len(metrics),
-                    'score': sum(m['score'] for m in metrics) / len(metrics)
-                }
-            except Exception as e:
-                logger.warning(f"Error calculating averages: {e}")
-                avg_metrics = {'reach': 0, 'impact': 0, 'confidence': 0, 'effort': 0, 'score': 0}
-        
-        # Porcentajes seguros
-        teams_pct = {team: (count/total)*100 for team, count in teams.most_common()} if total > 0 else {}
-        owners_pct = {owner: (count/total)*100 for owner, count in owners.most_common()} if total > 0 else {}
+        metric_rows = partial["metric_rows"]
+        if metric_rows:
+            sums = partial["sums"]
+            avg_metrics = {
+                'reach': sums['reach'] / metric_rows * 100,
+                'impact': sums['impact'] / metric_rows,
+                'confidence': sums['confidence'] / metric_rows * 100,
+                'effort': sums['effort'] / metric_rows,
+                'score': sums['score'] / metric_rows
+            }
+        
+        # Conteos exactos (de mayor a menor) y porcentajes seguros
+        team_counts = dict(teams.most_common())
+        owner_counts = dict(owners.most_common())
+        teams_pct = {team: (count/total)*100 for team, count in team_counts.items()} if total > 0 else {}
+        owners_pct = {owner: (count/total)*100 for owner, count in owner_counts.items()} if total > 0 else {}
         kpis_pct = {kpi: (count/total)*100 for kpi, count in kpis.most_common()} if total > 0 else {}
         portals_pct = {portal: (count/total)*100 for portal, count in portals.most_common()} if total > 0 else {}
         statuses_pct = {status: (count/total)*100 for status, count in statuses.most_common()} if total > 0 else {}
         
-        # NUEVO: Análisis específico de Growth
+        if index is not None:
+            # Top-K y conteos en O(log N + K) desde el índice
+            top_initiatives = [_initiative_summary(init, calculate_score_fast(init))
+                               for init in index.top_k(10) if calculate_score_fast(init) > 0]
+            priority_buckets = index.priority_buckets()
+        else:
+            top_initiatives = []
+            for position in partial["top"]:
+                init = sorted_initiatives[position]
+                top_initiatives.append(_initiative_summary(init, float(init.get('score', 0)) or init.get('calculated_score', 0)))
+            high, medium = partial["high"], partial["medium"]
+            priority_buckets = {'high': high, 'medium': medium, 'low': total - high - medium}
+        
+        # Enfoque Growth: vista materializada por snapshot (equipos foco, KPIs y portales)
+        growth_view = get_growth_view(initiatives)
+        growth = growth_view.growth
         growth_stats = {
-            'total_growth_initiatives': len(growth_initiatives),
-            'growth_percentage': (len(growth_initiatives)/total)*100 if total > 0 else 0,
-            'growth_avg_score': sum(g['score'] for g in growth_initiatives) / len(growth_initiatives) if growth_initiatives else 0,
-            'top_growth_initiatives': growth_initiatives[:5]
+            'total_growth_initiatives': growth.count,
+            'growth_percentage': (growth.count/total)*100 if total > 0 else 0,
+            'growth_avg_score': growth.average,
+            'growth_high_priority': growth.high_priority,
+            'top_growth_initiatives': [_initiative_summary(init, score) for score, init in growth.top(5)]
         }
         
         return {
@@ -133,6 +118,8 @@ def calculate_statistics_fast(initiatives):
             'kpis': kpis_pct,
             'portals': portals_pct,
             'statuses': statuses_pct,
+            'team_counts': team_counts,
+            'owner_counts': owner_counts,
             'average_metrics': avg_metrics,
             'top_teams': teams.most_common(5),
             'top_owners': owners.most_common(5),
@@ -140,7 +127,9 @@ def calculate_statistics_fast(initiatives):
             'top_statuses': statuses.most_common(),
             'top_initiatives_by_score': top_initiatives[:10],
             'sorted_initiatives': sorted_initiatives,
-            'growth_stats': growth_stats  # NUEVO: Stats específicos de Growth
+            'priority_buckets': priority_buckets,
+            'growth_stats': growth_stats,  # NUEVO: Stats específicos de Growth
+            'growth_portfolio': growth_view.to_dict()
         }
         
     except Exception as e:
@@ -148,137 +137,27 @@ def calculate_statistics_fast(initiatives):
         return {
             'total_initiatives': 0,
             'teams': {}, 'owners': {}, 'kpis': {}, 'portals': {}, 'statuses': {},
-            'average_metrics': {}, 'top_teams': [], 'top_owners': [], 'top_kpis': [],
+            'team_counts': {}, 'owner_counts': {}, 'average_metrics': {}, 'top_teams': [], 'top_owners': [], 'top_kpis': [],
             'top_statuses': [], 'top_initiatives_by_score': [], 'sorted_initiatives': [],
+            'priority_buckets': {'high': 0, 'medium': 0, 'low': 0},
             'growth_stats': {'total_growth_initiatives': 0, 'growth_percentage': 0, 'growth_avg_score': 0, 'top_growth_initiatives': []}
         }
 
 def format_statistics_text_fast(stats):
-    """Formatear estadísticas optimizado - GROWTH FOCUSED"""
-    if not stats:
-        return "No hay datos para mostrar estadísticas."
-    
+    """Formatear estadísticas optimizado - GROWTH FOCUSED (plantillas precompiladas de reports.py)"""
     try:
-        lines = [
-            f"🎯 **ESTADÍSTICAS SALUDIA - ENFOQUE GROWTH** ({stats['total_initiatives']} iniciativas)\n"
-        ]
-        
-        # NUEVO: Sección específica de Growth
-        growth_stats = stats.get('growth_stats', {})
-        if growth_stats:
-            lines.append("🚀 **ANÁLISIS DE GROWTH:**")
-            lines.append(f"• Iniciativas Growth: {growth_stats.get('total_growth_initiatives', 0)} ({growth_stats.get('growth_percentage', 0):.1f}%)")
-            lines.append(f"• Score promedio Growth: {growth_stats.get('growth_avg_score', 0):.2f}")
-            lines.append("")
-            
-            # Top Growth initiatives
-            top_growth = growth_stats.get('top_growth_initiatives', [])
-            if top_growth:
-                lines.append("🌟 **TOP INICIATIVAS GROWTH:**")
-                for i, init in enumerate(top_growth[:3], 1):
-                    priority_emoji = get_priority_emoji_safe(init.get('score', 0))
-                    lines.append(f"{i}. {priority_emoji} **{init.get('name', 'Sin nombre')}** - Score: {init.get('score', 0):.2f}")
-                    lines.append(f"   📊 {init.get('kpi', 'Sin KPI')} | 🖥️ {init.get('portal', 'Sin portal')}")
-                lines.append("")
-        
-        # TOP 5 INICIATIVAS GENERALES
-        if stats.get('top_initiatives_by_score'):
-            lines.append("🏆 **TOP 5 INICIATIVAS POR SCORE:**")
-            for i, init in enumerate(stats['top_initiatives_by_score'][:5], 1):
-                status_emoji = get_status_emoji_safe(init.get('status', ''))
-                priority_emoji = get_priority_emoji_safe(init.get('score', 0))
-                lines.append(f"{i}. {priority_emoji} **{init.get('name', 'Sin nombre')}** - Score: {init.get('score', 0):.2f}")
-                lines.append(f"   👥 {init.get('team', 'Sin equipo')} | 👤 {init.get('owner', 'Sin owner')} | {status_emoji} {init.get('status', 'Sin estado')}")
-                lines.append(f"   📝 {init.get('description', 'Sin descripción')}")
-                lines.append("")
-        
-        # Distribución por estados
-        if stats.get('top_statuses'):
-            lines.append("📊 **DISTRIBUCIÓN POR ESTADOS:**")
-            for status, count in stats['top_statuses']:
-                percentage = stats['statuses'].get(status, 0)
-                emoji = get_status_emoji_safe(status)
-                lines.append(f"• {emoji} {status}: {count} iniciativas ({percentage:.1f}%)")
-            lines.append("")
-        
-        # Distribución por equipos con enfoque en Growth
-        lines.append("👥 **DISTRIBUCIÓN POR EQUIPOS:**")
-        for team, percentage in list(stats['teams'].items())[:6]:  # Aumentado para mostrar Growth
-            count = next((count for t, count in stats['top_teams'] if t == team), 0)
-            emoji = "🚀" if team == "Growth" else "👥"
-            emphasis = "**" if team == "Growth" else ""
-            lines.append(f"• {emoji} {emphasis}{team}{emphasis}: {count} iniciativas ({percentage:.1f}%)")
-        
-        # Top owners
-        lines.append("\n👤 **TOP RESPONSABLES:**")
-        for owner, percentage in list(stats['owners'].items())[:5]:
-            count = next((count for o, count in stats['top_owners'] if o == owner), 0)
-            lines.append(f"• {owner}: {count} iniciativas ({percentage:.1f}%)")
-        
-        # Métricas promedio
-        if stats.get('average_metrics'):
-            lines.append("\n📈 **MÉTRICAS PROMEDIO:**")
-            metrics = stats['average_metrics']
-            lines.extend([
-                f"• Alcance: {metrics.get('reach', 0):.1f}%",
-                f"• Impacto: {metrics.get('impact', 0):.1f}/3",
-                f"• Confianza: {metrics.get('confidence', 0):.1f}%",
-                f"• Esfuerzo: {metrics.get('effort', 0):.1f} sprints",
-                f"• **Score Promedio: {metrics.get('score', 0):.2f}**"
-            ])
-        
-        # NUEVO: Recomendaciones de Growth
-        lines.append("\n💡 **RECOMENDACIONES GROWTH:**")
-        if growth_stats.get('total_growth_initiatives', 0) < 3:
-            lines.append("• ⚠️ Pocas iniciativas de Growth - Considerar más proyectos de crecimiento")
-        else:
-            lines.append("• ✅ Buen balance de iniciativas de Growth")
-            
-        high_score_count = sum(1 for init in stats.get('top_initiatives_by_score', []) if init.get('score', 0) >= 2.0)
-        if high_score_count < 3:
-            lines.append("• ⚠️ Pocas iniciativas de alto impacto (Score ≥ 2.0)")
-        else:
-            lines.append("• ✅ Suficientes iniciativas de alto impacto")
-        
-        return "\n".join(lines)
-        
+        return render_statistics(stats)
     except Exception as e:
         logger.error(f"❌ Error formatting statistics: {e}")
         return f"Error formateando estadísticas: {str(e)}"
 
 def get_status_emoji_safe(status):
     """Obtener emoji para estado de forma segura"""
-    try:
-        if not status:
-            return '📋'
-        status_emojis = {
-            'Pending': '⏳',
-            'Reviewed': '👁️',
-            'Prioritized': '⭐',
-            'Backlog': '📝',
-            'Sprint': '🔧',
-            'Production': '🚀',
-            'Monitoring': '📊',
-            'Discarded': '❌',
-            'Cancelled': '❌',
-            'On Hold': '⏸️'
-        }
-        return status_emojis.get(str(status).strip(), '📋')
-    except:
-        return '📋'
+    return status_emoji(status)
 
 def get_priority_emoji_safe(score):
     """Obtener emoji de prioridad de forma segura"""
-    try:
-        score_val = float(score) if score else 0
-        if score_val >= 2.0:
-            return "🔥"  # Alta prioridad
-        elif score_val >= 1.0:
-            return "⭐"  # Media prioridad
-        else:
-            return "📋"  # Baja prioridad
-    except:
-        return "📋"
+    return priority_emoji(score)
 
 def query_llm_optimized(prompt, context=None):
     """LLM optimizado con timeout reducido - GROWTH FOCUSED"""
@@ -339,7 +218,8 @@ SÉ CONCISO, ESTRATÉGICO y ORIENTADO A RESULTADOS. Prioriza insights accionable
             "temperature": 0.7  # Ligeramente más creativo
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=LLM_TIMEOUT)
+        with span('llm_call', model=GROQ_MODEL):
+            response = guarded_request('groq', 'POST', url, headers=headers, json=data)
         
         if response.status_code == 200:
             result = response.json()
@@ -349,6 +229,10 @@ SÉ CONCISO, ESTRATÉGICO y ORIENTADO A RESULTADOS. Prioriza insights accionable
             logger.error(f"LLM API error: {response.status_code}")
             return {"success": False, "error": f"HTTP {response.status_code}", "response": "Error consultando AI."}
     
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ {e}")
+        return {"success": False, "error": str(e), "response": "El asistente AI no está disponible temporalmente. Intenta en unos minutos."}
+    
     except Exception as e:
         logger.error(f"❌ LLM Error: {e}")
         return {"success": False, "error": str(e), "response": "Error técnico del asistente AI."}
@@ -381,6 +265,13 @@ def analyze_initiatives_with_llm_fast(initiatives):
             for init in growth_stats.get('top_growth_initiatives', [])[:3]:
                 context_lines.append(f"• {init['name']} - Score: {init['score']:.2f} - KPI: {init['kpi']}")
         
+        # Segmentos Growth de la vista materializada (solo los que tienen iniciativas)
+        portfolio = stats.get('growth_portfolio', {})
+        for label, key in (("KPIs growth", 'by_kpi'), ("Portales", 'by_portal')):
+            segments = [f"{name} {segment['count']}" for name, segment in portfolio.get(key, {}).items() if segment['count']]
+            if segments:
+                context_lines.append(f"• {label}: {', '.join(segments)}")
+        
         context_lines.append("\n🏆 TOP 5 GENERALES:")
         
         # Solo top 5 para reducir contexto
@@ -391,8 +282,8 @@ def analyze_initiatives_with_llm_fast(initiatives):
         
         # Distribución por equipos
         context_lines.append(f"\n👥 EQUIPOS:")
-        for team, percentage in list(stats['teams'].items())[:5]:
-            count = next((count for t, count in stats['top_teams'] if t == team), 0)
+        for team, count in list(stats['team_counts'].items())[:5]:
+            percentage = stats['teams'][team]
             emphasis = "**" if team == "Growth" else ""
             context_lines.append(f"• {emphasis}{team}{emphasis}: {count} ({percentage:.0f}%)")
         
@@ -1,7 +1,8 @@
 # 🚀 MCP Saludia MODULAR v2.5 - Archivo Principal
 import os
+import time
 from datetime import datetime
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, g, Response
 from flask_cors import CORS
 import logging
 
@@ -11,6 +12,19 @@ from database import get_initiatives, create_initiative
 from analytics import calculate_statistics_fast, analyze_initiatives_with_llm_fast
 from bot_handlers import setup_telegram_routes
 from utils import setup_webhook
+from resilience import get_resilience_status
+from rate_limiter import rate_limit
+from metrics import render_metrics, get_cache_hit_rate, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from tracing import start_trace, finish_trace, get_slowest_traces, clear_traces, profiler, is_admin_request
+from serialization import snapshot_json_response, get_json_backend
+from response_cache import response_cache
+from score_index import score_index
+from conversation_state import conversation_states
+from history_store import get_history_store, parse_time, TREND_BUCKETS
+from workflow_analytics import get_workflow_analytics
+from duplicate_index import duplicate_index
+from parallel_stats import get_status as get_parallel_stats_status
+from record_schema import initiative_schema
 
 # Configuración de logging
 logging.basicConfig(
@@ -26,6 +40,66 @@ CORS(app)
 # Variables globales
 bot_configured = False
 
+# ===== INSTRUMENTACIÓN =====
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    if request.path not in ('/metrics', '/health') and not request.path.startswith('/admin/'):
+        start_trace(request.path, method=request.method)
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route, request.method, response.status_code)
+    finish_trace(status=response.status_code)
+    return response
+
+@app.teardown_request
+def discard_unfinished_trace(exc):
+    # Si la vista lanzó una excepción after_request no corre: cerrar el trace igual
+    if exc is not None:
+        finish_trace(error=type(exc).__name__)
+
+# ===== ADMIN: TRACES Y PROFILER =====
+
+@app.route('/admin/traces')
+def admin_traces():
+    """Los N traces más lentos del ring buffer (requiere X-Admin-Token)"""
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    
+    if request.args.get('reset') == '1':
+        clear_traces()
+        return jsonify({"success": True, "cleared": True})
+    
+    limit = min(request.args.get('limit', 10, type=int), TRACE_CONFIG['buffer_size'])
+    traces = get_slowest_traces(limit, request.args.get('name'))
+    return jsonify({"success": True, "count": len(traces), "traces": traces})
+
+@app.route('/admin/profile')
+def admin_profile():
+    """Stacks muestreados en formato folded (flamegraph.pl / speedscope)"""
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    
+    if not TRACE_CONFIG['profiler_enabled']:
+        return jsonify({"error": "Profiler deshabilitado. Usa PROFILER_ENABLED=true"}), 400
+    
+    folded = profiler.folded()
+    if request.args.get('reset') == '1':
+        profiler.reset()
+    return Response(folded, mimetype='text/plain; charset=utf-8')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato de texto Prometheus"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ===== ENDPOINTS PRINCIPALES =====
 
 @app.route('/')
@@ -36,9 +110,9 @@ def home():
         "version": "2.6.0",
         "status": "running",
         "architecture": "modular",
-        "modules": ["config", "database", "analytics", "bot_handlers", "utils"],
-        "optimizations": ["cache_system", "fast_scoring", "reduced_timeouts", "compact_context"],
-        "new_features": ["pagination", "status_filtering", "sprint_tracking", "production_monitoring"],
+        "modules": ["config", "database", "analytics", "bot_handlers", "utils", "resilience", "rate_limiter", "metrics", "bulk_io", "snapshot", "serialization", "response_cache", "query_engine", "score_index", "conversation_state", "history_store", "workflow_analytics", "whatif", "sprint_planner", "duplicate_index", "parallel_stats", "record_schema", "json_stream"],
+        "optimizations": ["cache_system", "fast_scoring", "reduced_timeouts", "compact_context", "circuit_breakers", "adaptive_timeouts", "rate_limiting", "prometheus_metrics", "bulk_import", "streaming_export", "field_projection", "etag_304", "response_cache", "query_indexes", "order_statistics_index", "persistent_conversations", "growth_view", "history_trends", "workflow_analytics", "whatif_reranking", "knapsack_sprint_planner", "minhash_lsh_duplicates", "sharded_statistics", "compiled_record_schema", "streaming_ingest"],
+        "new_features": ["pagination", "cursor_pagination", "status_filtering", "sprint_tracking", "production_monitoring"],
         "timestamp": datetime.now().isoformat(),
         "cache_status": {
             "enabled": True,
@@ -57,14 +131,27 @@ def home():
         },
         "api_endpoints": {
             "initiatives": {
-                "/api/initiatives": "Lista con paginación y filtros",
+                "/api/initiatives": "Lista con paginación por cursor, orden y filtros",
                 "/api/initiatives/by-status/<status>": "Filtrar por estado específico",
                 "/api/initiatives/sprint": "Iniciativas en desarrollo",
                 "/api/initiatives/production": "Iniciativas implementadas",
-                "/api/initiatives/active": "Todas las activas"
+                "/api/initiatives/active": "Todas las activas",
+                "/api/initiatives/query?q=": "Consulta estructurada (team=Growth AND score>=2 AND status in active)",
+                "/api/initiatives/top?k=&team=&min=&max=": "Top-K, conteos por rango de score y percentiles",
+                "/api/initiatives/<id>/rank": "Posición y percentil de una iniciativa",
+                "/api/initiatives/duplicates?field=&threshold=": "Clusters de iniciativas duplicadas (MinHash/LSH)",
+                "/api/initiatives/duplicates/check?name=&description=": "Posibles duplicados de una iniciativa nueva",
+                "/api/initiatives/export": "Exportación en streaming NDJSON/CSV",
+                "/api/initiatives/import": "Importación masiva CSV/NDJSON (POST)"
             },
             "analysis": {
                 "/api/initiatives/statistics": "Estadísticas generales",
+                "/api/history/trends?metrics=&from=&to=&bucket=": "Tendencias históricas (day/week/month/raw)",
+                "/api/history/transitions?from=&to=&id=&status=": "Transiciones de estado registradas",
+                "/api/workflow?team=&from=&to=": "Cycle time, permanencia por etapa, throughput y WIP",
+                "/api/workflow/cfd?team=&from=&to=": "Flujo acumulado diario por equipo",
+                "/api/whatif": "Simulación what-if de ajustes RICE sobre un subconjunto (POST)",
+                "/api/sprint-plan": "Plan de sprint por capacidad de equipo que maximiza el score (POST)",
                 "/ai/analyze-initiatives": "Análisis AI estratégico"
             }
         },
@@ -84,10 +171,10 @@ def home():
 @app.route('/health')
 def health():
     """Health check optimizado"""
-    import time
     start_time = time.time()
     nocodb_test = get_initiatives()
     response_time = time.time() - start_time
+    history = get_history_store()
     
     return jsonify({
         "status": "healthy",
@@ -100,20 +187,33 @@ def health():
             "telegram_bot": "configured" if bot_configured else "not_configured",
             "ai_assistant": "configured" if GROQ_API_KEY else "not_configured"
         },
+        "circuit_breakers": get_resilience_status(),
+        "cache_hit_rate": get_cache_hit_rate(),
+        "json_backend": get_json_backend(),
+        "response_cache": response_cache.get_status(),
+        "score_index": score_index.get_status(),
+        "duplicate_index": duplicate_index.get_status(),
+        "parallel_stats": get_parallel_stats_status(),
+        "record_normalization": initiative_schema.get_status(),
+        "conversations": conversation_states.get_status(),
+        "history": history.get_status() if history else "disabled",
         "modules_loaded": {
             "config": "✅",
             "database": "✅", 
             "analytics": "✅",
             "bot_handlers": "✅",
-            "utils": "✅"
+            "utils": "✅",
+            "resilience": "✅",
+            "metrics": "✅"
         }
     })
 
 @app.route('/api/initiatives')
+@rate_limit('api')
 def api_initiatives():
-    """API para obtener iniciativas con paginación y filtros"""
-    from flask import request
-    from database import sort_initiatives_by_score
+    """API para obtener iniciativas con paginación por cursor sobre el ranking global"""
+    from snapshot import (SORTABLE_FIELDS, InvalidCursorError, get_snapshot, get_ranked_view,
+                          decode_cursor, paginate_ranked, status_filter_key)
     
     # Parámetros de consulta
     limit = request.args.get('limit', type=int)
@@ -121,15 +221,12 @@ def api_initiatives():
     status_filter = request.args.get('status')
     page = request.args.get('page', type=int)
     page_size = request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int)
+    cursor_param = request.args.get('cursor')
+    sort_field = request.args.get('sort', 'score')
+    descending = request.args.get('order', 'desc').lower() != 'asc'
     
-    # Convertir paginación por página a offset si se especifica
-    if page is not None:
-        offset = (page - 1) * page_size
-        limit = page_size
-    
-    # Validar límites
-    if limit and limit > MAX_LIMIT:
-        limit = MAX_LIMIT
+    if sort_field not in SORTABLE_FIELDS:
+        return jsonify({"error": f"Campo de orden inválido: {sort_field}", "sortable_fields": SORTABLE_FIELDS}), 400
     
     # Convertir filtro de status predefinido
     if status_filter and status_filter in STATUS_FILTERS:
@@ -138,29 +235,87 @@ def api_initiatives():
         # Convertir string a lista si es un status individual
         status_filter = [status_filter] if status_filter in VALID_STATUSES else None
     
-    data = get_initiatives(limit, offset, status_filter)
+    cursor = None
+    if cursor_param:
+        try:
+            cursor = decode_cursor(cursor_param)
+        except InvalidCursorError as e:
+            return jsonify({"error": str(e)}), 400
+        # El cursor fija orden y filtro: los parámetros deben coincidir
+        if (cursor["sort"] != sort_field or cursor["descending"] != descending
+                or cursor["status_key"] != status_filter_key(status_filter)):
+            return jsonify({"error": "El cursor no corresponde a sort/order/status del request"}), 400
+    
+    # Snapshot completo cacheado; el ranking se calcula una vez por versión
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
     
-    if data.get("success"):
-        sorted_initiatives = sort_initiatives_by_score(data.get("data", []))
-        data["data"] = sorted_initiatives
-        data["performance"] = {"cached": data.get("cached", False)}
+    page_size = max(1, min(page_size, MAX_LIMIT))
+    
+    def build_payload():
+        rows, keys = get_ranked_view(data.get("data", []), sort_field, descending, status_filter, version)
+        response = {
+            "success": True,
+            "cached": data.get("cached", False),
+            "total": len(rows),
+            "filter_applied": status_filter,
+            "performance": {"cached": data.get("cached", False)}
+        }
         
-        # Agregar información de paginación
-        if page is not None:
-            data["pagination"] = {
-                "page": page,
-                "page_size": page_size,
-                "total_pages": (data.get("total", 0) + page_size - 1) // page_size,
-                "has_next": data.get("has_more", False)
-            }
+        if cursor is not None or (page is None and limit is None and offset is None):
+            # Sin page_size se mantiene el tope histórico de DEFAULT_LIMIT filas, ahora con next_cursor
+            size = page_size if request.args.get('page_size') else min(DEFAULT_LIMIT, MAX_LIMIT)
+            page_data, pagination = paginate_ranked(rows, keys, size, cursor, version,
+                                                    sort_field, descending, status_filter)
+            response["data"] = page_data
+            response["pagination"] = pagination
+        else:
+            # Paginación por página/offset sobre el mismo ranking global
+            start = (max(page, 1) - 1) * page_size if page is not None else max(offset or 0, 0)
+            count = page_size if page is not None else min(limit or DEFAULT_LIMIT, MAX_LIMIT)
+            response["data"] = rows[start:start + count]
+            response["limit"] = count
+            response["offset"] = start
+            response["has_more"] = start + count < len(rows)
+            if page is not None:
+                response["pagination"] = {
+                    "page": page,
+                    "page_size": page_size,
+                    "total_pages": (len(rows) + page_size - 1) // page_size,
+                    "has_next": response["has_more"]
+                }
+        
+        return response
     
-    return jsonify(data)
+    return snapshot_json_response(version, build_payload)
+
+def status_initiatives_response(status_list, **extra):
+    """Iniciativas de uno o varios estados, ordenadas por score, desde el snapshot cacheado"""
+    from snapshot import get_snapshot, get_ranked_view
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    def build_payload():
+        rows, _ = get_ranked_view(data.get("data", []), 'score', True, status_list, version)
+        return {
+            "success": True,
+            "data": rows,
+            "total": len(rows),
+            "cached": data.get("cached", False),
+            "filter_applied": status_list,
+            **extra,
+            "performance": {"cached": data.get("cached", False)}
+        }
+    
+    return snapshot_json_response(version, build_payload)
 
 @app.route('/api/initiatives/by-status/<status>')
+@rate_limit('api')
 def api_initiatives_by_status(status):
     """API para obtener iniciativas por estado específico"""
-    from database import get_initiatives_by_status, sort_initiatives_by_score
-    
     # Manejar filtros predefinidos
     if status in STATUS_FILTERS:
         status_list = STATUS_FILTERS[status]
@@ -173,69 +328,32 @@ def api_initiatives_by_status(status):
             "predefined_filters": list(STATUS_FILTERS.keys())
         }), 400
     
-    data = get_initiatives_by_status(status_list)
-    
-    if data.get("success"):
-        sorted_initiatives = sort_initiatives_by_score(data.get("data", []))
-        data["data"] = sorted_initiatives
-        data["filter_applied"] = status_list
-        data["performance"] = {"cached": data.get("cached", False)}
-    
-    return jsonify(data)
+    return status_initiatives_response(status_list)
 
 @app.route('/api/initiatives/sprint')
+@rate_limit('api')
 def api_sprint_initiatives():
     """API para obtener iniciativas en sprint (desarrollo activo)"""
-    from database import get_sprint_initiatives, sort_initiatives_by_score
-    
-    data = get_sprint_initiatives()
-    
-    if data.get("success"):
-        sorted_initiatives = sort_initiatives_by_score(data.get("data", []))
-        data["data"] = sorted_initiatives
-        data["filter_applied"] = SPRINT_STATUSES
-        data["description"] = "Iniciativas en desarrollo activo"
-        data["performance"] = {"cached": data.get("cached", False)}
-    
-    return jsonify(data)
+    return status_initiatives_response(SPRINT_STATUSES, description="Iniciativas en desarrollo activo")
 
 @app.route('/api/initiatives/production')
+@rate_limit('api')
 def api_production_initiatives():
     """API para obtener iniciativas en producción/monitoreo"""
-    from database import get_production_initiatives, sort_initiatives_by_score
-    
-    data = get_production_initiatives()
-    
-    if data.get("success"):
-        sorted_initiatives = sort_initiatives_by_score(data.get("data", []))
-        data["data"] = sorted_initiatives
-        data["filter_applied"] = PRODUCTION_STATUSES
-        data["description"] = "Iniciativas implementadas y en monitoreo"
-        data["performance"] = {"cached": data.get("cached", False)}
-    
-    return jsonify(data)
+    return status_initiatives_response(PRODUCTION_STATUSES, description="Iniciativas implementadas y en monitoreo")
 
 @app.route('/api/initiatives/active')
+@rate_limit('api')
 def api_active_initiatives():
     """API para obtener todas las iniciativas activas"""
-    from database import get_active_initiatives, sort_initiatives_by_score
-    
-    data = get_active_initiatives()
-    
-    if data.get("success"):
-        sorted_initiatives = sort_initiatives_by_score(data.get("data", []))
-        data["data"] = sorted_initiatives
-        data["filter_applied"] = ACTIVE_STATUSES
-        data["description"] = "Todas las iniciativas activas (excluye canceladas y en pausa)"
-        data["performance"] = {"cached": data.get("cached", False)}
-    
-    return jsonify(data)
+    return status_initiatives_response(ACTIVE_STATUSES, description="Todas las iniciativas activas (excluye canceladas y en pausa)")
 
 @app.route('/api/initiatives/search', methods=['GET'])
+@rate_limit('search')
 def api_search_initiatives():
     """API para buscar iniciativas"""
-    from flask import request
     from database import search_initiatives
+    from snapshot import get_snapshot
     
     query = request.args.get('q', '').strip()
     field = request.args.get('field', 'all')
@@ -243,22 +361,325 @@ def api_search_initiatives():
     if not query:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
     
-    result = search_initiatives(query, field)
-    return jsonify(result)
+    _, version = get_snapshot()
+    return snapshot_json_response(version, lambda: search_initiatives(query, field), records_key='results')
+
+@app.route('/api/initiatives/query', methods=['GET'])
+@rate_limit('search')
+def api_query_initiatives():
+    """API consulta estructurada: ?q=team=Growth AND portal=Seller AND score>=2 AND status in active"""
+    from snapshot import get_snapshot
+    from query_engine import run_query
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    limit = min(request.args.get('limit', MAX_LIMIT, type=int), MAX_LIMIT)
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    def build_payload():
+        result = run_query(query, data.get("data", []), version, limit)
+        if not result.get("success"):
+            return result, 400
+        result["query"] = query
+        result["performance"] = {"cached": data.get("cached", False)}
+        return result
+    
+    return snapshot_json_response(version, build_payload)
+
+@app.route('/api/initiatives/top', methods=['GET'])
+@rate_limit('api')
+def api_top_initiatives():
+    """API top-K, conteos por rango de score y percentiles desde el índice de orden estadístico"""
+    from snapshot import get_snapshot
+    from score_index import get_score_index
+    
+    k = max(min(request.args.get('k', 10, type=int), MAX_LIMIT), 0)
+    team = request.args.get('team', '').strip() or None
+    min_score = request.args.get('min', type=float)
+    max_score = request.args.get('max', type=float)
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    def build_payload():
+        index = get_score_index(data.get("data", []))
+        if index is None:
+            return {"success": False, "error": "Score index not available"}, 503
+        payload = {
+            "success": True,
+            "data": index.top_k(k, team),
+            "team": team,
+            "total": index.size(team),
+            "average_score": round(index.average(team), 4),
+            "priority_buckets": index.priority_buckets(team),
+            "percentiles": {f"p{p}": index.percentile(p, team) for p in (50, 75, 90, 99)},
+            "snapshot_version": version
+        }
+        if min_score is not None or max_score is not None:
+            payload["score_range"] = {
+                "min": min_score, "max": max_score,
+                "count": index.count_between(min_score if min_score is not None else float('-inf'),
+                                             max_score if max_score is not None else float('inf'), team)
+            }
+        return payload
+    
+    return snapshot_json_response(version, build_payload)
+
+@app.route('/api/initiatives/<int:initiative_id>/rank', methods=['GET'])
+@rate_limit('api')
+def api_initiative_rank(initiative_id):
+    """API posición de una iniciativa en el ranking global (o de su equipo con ?team=)"""
+    from snapshot import get_snapshot
+    from score_index import get_score_index
+    
+    team = request.args.get('team', '').strip() or None
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    index = get_score_index(data.get("data", []))
+    rank = index.rank(initiative_id, team) if index is not None else None
+    if rank is None:
+        return jsonify({"success": False, "error": f"Initiative {initiative_id} not found"}), 404
+    return jsonify({
+        "success": True,
+        "id": initiative_id,
+        "team": team,
+        "rank": rank,
+        "of": index.size(team),
+        "percentile": index.percentile_of(initiative_id, team),
+        "snapshot_version": version
+    })
+
+@app.route('/api/initiatives/duplicates', methods=['GET'])
+@rate_limit('api')
+def api_duplicate_clusters():
+    """API clusters de duplicados de todo el portfolio: ?field=name|full&threshold=0.6"""
+    from snapshot import get_snapshot
+    from duplicate_index import get_duplicate_clusters, FIELDS
+    
+    field = request.args.get('field', 'name')
+    if field not in FIELDS:
+        return jsonify({"error": f"field debe ser uno de {list(FIELDS)}"}), 400
+    threshold = request.args.get('threshold', type=float)
+    if threshold is not None and not 0 < threshold <= 1:
+        return jsonify({"error": "threshold debe estar entre 0 y 1"}), 400
+    limit = min(request.args.get('limit', DUPLICATES_CONFIG['max_clusters'], type=int), DUPLICATES_CONFIG['max_clusters'])
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    def build_payload():
+        start_time = time.time()
+        clusters = get_duplicate_clusters(field, threshold)
+        return {
+            "success": True,
+            "field": field,
+            "threshold": threshold if threshold is not None else DUPLICATES_CONFIG[f'{field}_threshold'],
+            "total_clusters": len(clusters),
+            "duplicated_initiatives": sum(cluster["size"] for cluster in clusters),
+            "clusters": clusters[:limit],
+            "query_time_ms": round((time.time() - start_time) * 1000, 2)
+        }
+    
+    return snapshot_json_response(version, build_payload)
+
+@app.route('/api/initiatives/duplicates/check', methods=['GET'])
+@rate_limit('search')
+def api_duplicate_check():
+    """API posibles duplicados de una iniciativa aún no creada: ?name=&description="""
+    from snapshot import get_snapshot
+    from duplicate_index import get_duplicate_index
+    
+    name = request.args.get('name', '').strip()
+    if not name:
+        return jsonify({"error": "Query parameter 'name' is required"}), 400
+    
+    data, _ = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    start_time = time.perf_counter()
+    index = get_duplicate_index()
+    matches = index.find_similar(name, request.args.get('description')) if index is not None else []
+    return jsonify({
+        "success": True,
+        "name": name,
+        "matches": matches,
+        "query_time_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    })
 
 @app.route('/api/initiatives/statistics', methods=['GET'])
+@rate_limit('api')
 def api_statistics():
     """API estadísticas optimizada"""
-    data = get_initiatives()
+    from snapshot import get_snapshot
+    
+    data, version = get_snapshot()
     
     if not data.get("success"):
         return jsonify({"error": "Could not fetch initiatives"}), 500
     
-    stats = calculate_statistics_fast(data.get("data", []))
-    stats["performance"] = {"cached": data.get("cached", False)}
-    return jsonify(stats)
+    def build_payload():
+        stats = calculate_statistics_fast(data.get("data", []))
+        stats["performance"] = {"cached": data.get("cached", False)}
+        return stats
+    
+    return snapshot_json_response(version, build_payload)
+
+def _history_range():
+    """(inicio, fin) epoch de los parámetros from/to; por defecto los últimos default_days"""
+    end = parse_time(request.args.get('to'), time.time())
+    start = parse_time(request.args.get('from'), end - HISTORY_CONFIG['default_days'] * 86400)
+    return start, end
+
+@app.route('/api/history/trends', methods=['GET'])
+@rate_limit('api')
+def api_history_trends():
+    """API series temporales de agregados del portfolio (total, avg_score, status:<Estado>, team:<Equipo>...)"""
+    store = get_history_store()
+    if store is None:
+        return jsonify({"success": False, "error": "Historial deshabilitado"}), 503
+    
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in TREND_BUCKETS:
+        return jsonify({"error": f"Bucket inválido: {bucket}", "valid_buckets": TREND_BUCKETS}), 400
+    try:
+        start, end = _history_range()
+    except ValueError as e:
+        return jsonify({"error": f"Fecha inválida: {e}"}), 400
+    
+    metrics = [m.strip() for m in request.args.get('metrics', 'total,avg_score,status:Sprint').split(',') if m.strip()]
+    start_time = time.time()
+    series = store.trends(metrics, start, end, bucket)
+    return jsonify({
+        "success": True,
+        "bucket": bucket,
+        "from": start,
+        "to": end,
+        "series": series,
+        "available_metrics": store.metric_names(),
+        "query_time_ms": round((time.time() - start_time) * 1000, 2)
+    })
+
+@app.route('/api/history/transitions', methods=['GET'])
+@rate_limit('api')
+def api_history_transitions():
+    """API transiciones de estado por iniciativa (filtros opcionales id y status destino)"""
+    store = get_history_store()
+    if store is None:
+        return jsonify({"success": False, "error": "Historial deshabilitado"}), 503
+    
+    try:
+        start, end = _history_range()
+    except ValueError as e:
+        return jsonify({"error": f"Fecha inválida: {e}"}), 400
+    
+    limit = max(min(request.args.get('limit', 1000, type=int), HISTORY_CONFIG['max_transitions']), 1)
+    transitions = store.transitions(start, end, request.args.get('id', type=int),
+                                    request.args.get('status') or None, limit)
+    return jsonify({"success": True, "from": start, "to": end, "count": len(transitions), "transitions": transitions})
+
+@app.route('/api/workflow', methods=['GET'])
+@rate_limit('api')
+def api_workflow():
+    """API analítica del flujo de estados (incremental sobre el historial)"""
+    workflow = get_workflow_analytics()
+    if workflow is None:
+        return jsonify({"success": False, "error": "Historial deshabilitado"}), 503
+    
+    try:
+        start, end = _history_range()
+    except ValueError as e:
+        return jsonify({"error": f"Fecha inválida: {e}"}), 400
+    
+    team = request.args.get('team', '').strip() or None
+    return jsonify({"success": True, "team": team, "from": start, "to": end, **workflow.summary(start, end, team)})
+
+@app.route('/api/workflow/cfd', methods=['GET'])
+@rate_limit('api')
+def api_workflow_cfd():
+    """API flujo acumulado (conteo diario por etapa) de un equipo o de todo el portfolio"""
+    workflow = get_workflow_analytics()
+    if workflow is None:
+        return jsonify({"success": False, "error": "Historial deshabilitado"}), 503
+    
+    try:
+        start, end = _history_range()
+    except ValueError as e:
+        return jsonify({"error": f"Fecha inválida: {e}"}), 400
+    
+    team = request.args.get('team', '').strip() or None
+    return jsonify({"success": True, "team": team, "series": workflow.cumulative_flow(start, end, team)})
+
+@app.route('/api/whatif', methods=['POST'])
+@rate_limit('search')
+def api_whatif():
+    """API what-if: {"filter": "team=Growth", "adjust": {"confidence": 0.8}} o {"scenarios": [...]}"""
+    from snapshot import get_snapshot
+    from whatif import simulate
+    
+    body = request.get_json(silent=True) or {}
+    scenarios = body.get('scenarios') if 'scenarios' in body else [body]
+    if not isinstance(scenarios, list) or not scenarios:
+        return jsonify({"error": "Body JSON con 'adjust' o lista 'scenarios' requerido"}), 400
+    if len(scenarios) > WHATIF_CONFIG['max_scenarios']:
+        return jsonify({"error": f"Máximo {WHATIF_CONFIG['max_scenarios']} escenarios por request"}), 400
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    try:
+        top = int(request.args.get('top') or body.get('top') or 0) or None
+    except (TypeError, ValueError):
+        return jsonify({"error": "'top' debe ser un entero"}), 400
+    
+    records = data.get("data", [])
+    results = []
+    for scenario in scenarios:
+        if not isinstance(scenario, dict):
+            return jsonify({"error": "Cada escenario debe ser un objeto JSON"}), 400
+        result = simulate(records, scenario.get('filter', ''), scenario.get('adjust'), version, top)
+        if not result.get("success"):
+            return jsonify(result), 400
+        if scenario.get('name'):
+            result["name"] = scenario['name']
+        results.append(result)
+    
+    if 'scenarios' not in body:
+        return jsonify(results[0])
+    return jsonify({"success": True, "scenarios": results, "snapshot_version": version})
+
+@app.route('/api/sprint-plan', methods=['POST'])
+@rate_limit('search')
+def api_sprint_plan():
+    """API planificador: {"capacity": {"Growth": 3, "Product": 2}, "must_have": [12, 40]}"""
+    from snapshot import get_snapshot
+    from sprint_planner import plan_sprints
+    
+    body = request.get_json(silent=True) or {}
+    must_have = body.get('must_have') or []
+    if not isinstance(must_have, list):
+        return jsonify({"error": "'must_have' debe ser una lista de ids"}), 400
+    
+    data, version = get_snapshot()
+    if not data.get("success"):
+        return jsonify(data)
+    
+    result = plan_sprints(data.get("data", []), body.get('capacity'), must_have, version)
+    if not result.get("success"):
+        return jsonify(result), 400
+    return jsonify(result)
 
 @app.route('/api/create', methods=['POST'])
+@rate_limit('create')
 def api_create():
     """API crear iniciativa"""
     from flask import request
@@ -269,7 +690,103 @@ def api_create():
     result = create_initiative(request.json)
     return jsonify(result)
 
+@app.route('/api/initiatives/export')
+@rate_limit('api')
+def api_export_initiatives():
+    """API exportación en streaming (NDJSON o CSV) con proyección de campos y gzip opcional"""
+    import itertools
+    from flask import stream_with_context
+    from database import iter_nocodb_records
+    from bulk_io import EXPORT_FORMATS, EXPORT_FIELDS, parse_export_fields, generate_export
+    from resilience import CircuitOpenError
+
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Formato inválido: {fmt}", "valid_formats": list(EXPORT_FORMATS)}), 400
+
+    fields, invalid_fields = parse_export_fields(request.args.get('fields'))
+    if invalid_fields or not fields:
+        return jsonify({"error": f"Campos inválidos: {', '.join(invalid_fields)}", "valid_fields": EXPORT_FIELDS}), 400
+
+    status_filter = request.args.get('status')
+    if status_filter in STATUS_FILTERS:
+        status_filter = STATUS_FILTERS[status_filter]
+    elif status_filter:
+        if status_filter not in VALID_STATUSES:
+            return jsonify({"error": f"Estado inválido: {status_filter}", "valid_statuses": VALID_STATUSES}), 400
+        status_filter = [status_filter]
+
+    # Fuente: snapshot cacheado si está fresco, si no lectura paginada de NocoDB
+    source = request.args.get('source', 'auto')
+    cache_usable = initiatives_cache["data"] is not None and initiatives_cache.get("complete")
+    cache_fresh = cache_usable and time.time() - initiatives_cache["timestamp"] < initiatives_cache["ttl"]
+
+    if source != 'nocodb' and (cache_fresh or (source == 'cache' and cache_usable)):
+        snapshot = initiatives_cache["data"]
+        source = 'cache'
+        if status_filter:
+            wanted = set(status_filter)
+            records = (r for r in snapshot if r.get('status') in wanted)
+        else:
+            records = iter(snapshot)
+    else:
+        source = 'nocodb'
+        records = iter_nocodb_records(status_filter)
+        # Pedir la primera página antes de enviar headers para poder responder con error
+        try:
+            first = next(records, None)
+        except CircuitOpenError as e:
+            return jsonify({"success": False, "error": "NocoDB no disponible temporalmente",
+                            "retry_after": round(e.retry_after, 1)}), 503
+        except Exception as e:
+            logger.error(f"❌ Export error: {e}")
+            return jsonify({"success": False, "error": str(e)}), 502
+        if first is not None:
+            records = itertools.chain([first], records)
+
+    compress = (request.args.get('gzip', '').lower() in ('1', 'true', 'yes') or
+                'gzip' in request.headers.get('Accept-Encoding', '').lower())
+
+    filename = f"initiatives_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    response = Response(stream_with_context(generate_export(records, fmt, fields, compress)),
+                        mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Export-Source'] = source
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/api/initiatives/import', methods=['POST'])
+@rate_limit('import')
+def api_import_initiatives():
+    """API importación masiva (CSV o NDJSON) con inserts bulk en NocoDB"""
+    from bulk_io import detect_import_format, import_initiatives
+
+    upload = request.files.get('file')
+    if upload:
+        fmt = detect_import_format(upload.content_type, upload.filename, request.args.get('format'))
+        stream = upload.stream
+    else:
+        fmt = detect_import_format(request.content_type, requested=request.args.get('format'))
+        stream = request.stream
+
+    if not fmt:
+        return jsonify({
+            "success": False,
+            "error": "Formato no soportado. Usa CSV o NDJSON (?format=csv|ndjson)"
+        }), 415
+
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    result = import_initiatives(stream, fmt, dry_run=dry_run)
+
+    status_code = 200 if result.get("success") else 400
+    if result.get("success") and result["failed"] and not result["created"] and not dry_run:
+        status_code = 422
+    return jsonify(result), status_code
+
 @app.route('/ai/analyze-initiatives', methods=['POST'])
+@rate_limit('ai')
 def analyze_initiatives_endpoint():
     """Endpoint análisis optimizado"""
     import time
@@ -313,6 +830,7 @@ def analyze_initiatives_endpoint():
         }), 500
 
 @app.route('/setup-webhook', methods=['POST'])
+@rate_limit('api')
 def setup_webhook_endpoint():
     """Endpoint para configurar webhook"""
     global bot_configured
@@ -0,0 +1 @@
+# ⏱️ benchmarks - Suite de benchmarks reproducibles para los hot paths de datos y analytics
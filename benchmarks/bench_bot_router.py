@@ -0,0 +1,151 @@
+# 🧭 bench_bot_router.py - Costo de dispatch por update: cadena if/elif original vs router compilado
+#
+# Uso:
+#   python -m benchmarks.bench_bot_router --updates 200000
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from benchmarks.run_benchmarks import configure_environment
+
+SAMPLE_TEXTS = [
+    'iniciativas', '/start', 'help', 'growth', 'sprint', 'monitoreo', 'descartadas', 'estados',
+    'buscar growth', 'buscar api de pagos', 'consulta team=growth and score>=2',
+    'hola, quiero ver la lista de proyectos', 'cómo va el desarrollo del checkout?',
+    'necesito crear una nueva iniciativa', 'qué iniciativas están en producción',
+    'gracias!', 'me ayudas con el análisis del trimestre', 'ok', 'Integración API de pagos PSE'
+]
+
+# Copia fiel del router anterior (cadena de comparaciones contra listas + any() por intent)
+def legacy_resolve(text):
+    if text in ['/start', 'start', 'inicio', 'hola']:
+        return 'start'
+    elif text in ['/help', 'help', 'ayuda']:
+        return 'help'
+    elif text in ['/iniciativas', 'iniciativas', 'lista']:
+        return 'iniciativas'
+    elif text in ['/crear', 'crear', 'nueva']:
+        return 'crear'
+    elif text in ['/analizar', 'analizar', 'análisis']:
+        return 'analizar'
+    elif text.startswith(('consulta ', '/consulta ')) or text in ['consulta', '/consulta']:
+        return 'consulta'
+    elif text.startswith(('buscar ', '/buscar ')):
+        return 'buscar'
+    elif text in ['/pending', 'pending', 'pendiente']:
+        return 'pending'
+    elif text in ['/reviewed', 'reviewed', 'revisadas']:
+        return 'reviewed'
+    elif text in ['/prioritized', 'prioritized', 'priorizadas']:
+        return 'prioritized'
+    elif text in ['/backlog', 'backlog']:
+        return 'backlog'
+    elif text in ['/sprint', 'sprint', 'desarrollo', 'dev']:
+        return 'sprint'
+    elif text in ['/production', 'production', 'produccion', 'prod']:
+        return 'production'
+    elif text in ['/monitoring', 'monitoring', 'monitoreo']:
+        return 'monitoring'
+    elif text in ['/discarded', 'discarded', 'descartadas']:
+        return 'discarded'
+    elif text in ['/estados', 'estados', 'status', 'comandos']:
+        return 'estados'
+    elif text in ['/growth', 'growth', 'crecimiento']:
+        return 'growth'
+    return legacy_intent(text)
+
+def legacy_intent(text_lower):
+    if any(word in text_lower for word in ['crecimiento', 'growth', 'crecer']):
+        return 0
+    elif any(word in text_lower for word in ['iniciativa', 'proyecto', 'lista']):
+        return 1
+    elif any(word in text_lower for word in ['buscar', 'encontrar']):
+        return 2
+    elif any(word in text_lower for word in ['crear', 'nueva']):
+        return 3
+    elif any(word in text_lower for word in ['análisis', 'analizar']):
+        return 4
+    elif any(word in text_lower for word in ['sprint', 'desarrollo', 'dev']):
+        return 5
+    elif any(word in text_lower for word in ['producción', 'production', 'implementado']):
+        return 6
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark del router del bot")
+    parser.add_argument('--updates', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--keywords', type=int, default=1000, help="Palabras clave del caso de escala")
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    from bot_handlers import router
+    router.compile()
+
+    def compiled_resolve(text):
+        route, _ = router.resolve(text)
+        if route is not None:
+            return route.name
+        intent = router.automaton.match(text)
+        return intent
+
+    # Ambos routers (y ambas estrategias del autómata) deben elegir lo mismo para cada texto
+    for strategy in ('automaton', 'scan'):
+        router.automaton.compile(strategy)
+        for text in SAMPLE_TEXTS:
+            assert legacy_resolve(text.lower()) == compiled_resolve(text.lower()), (strategy, text)
+    router.automaton.compile()
+
+    rng = random.Random(args.seed)
+    corpus = [rng.choice(SAMPLE_TEXTS).lower() for _ in range(args.updates)]
+
+    results = {}
+    for name, resolve in (('legacy_if_elif', legacy_resolve), ('compiled_router', compiled_resolve)):
+        start = time.perf_counter()
+        for text in corpus:
+            resolve(text)
+        elapsed = time.perf_counter() - start
+        results[name] = {"updates": len(corpus), "seconds": round(elapsed, 4),
+                         "per_update_ns": round(elapsed * 1e9 / len(corpus), 1)}
+        print(f"  {name:<16} {results[name]['per_update_ns']:>9.1f} ns/update")
+
+    # Peor caso: texto natural largo sin palabras clave (recorre todos los any() en la cadena)
+    long_text = ("por favor me confirmas el estado del tablero del equipo de operaciones " * 4).strip()
+    for name, resolve in (('legacy_if_elif', legacy_resolve), ('compiled_router', compiled_resolve)):
+        start = time.perf_counter()
+        for _ in range(20000):
+            resolve(long_text)
+        elapsed = time.perf_counter() - start
+        results[f"{name}_long_unmatched"] = {"per_update_ns": round(elapsed * 1e9 / 20000, 1)}
+        print(f"  {name + ' (long text)':<28} {elapsed * 1e9 / 20000:>9.1f} ns/update")
+
+    # Escala: con cientos de palabras clave el autómata Aho-Corasick gana al escaneo por palabra
+    from bot_router import KeywordAutomaton
+    many = [(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6)), i // 5) for i in range(args.keywords)]
+    for strategy in ('scan', 'automaton'):
+        automaton = KeywordAutomaton()
+        for keyword, priority in many:
+            automaton.add(keyword, priority)
+        automaton.compile(strategy)
+        start = time.perf_counter()
+        for _ in range(2000):
+            automaton.match(long_text)
+        elapsed = time.perf_counter() - start
+        results[f"{args.keywords}_keywords_{strategy}"] = {"per_update_ns": round(elapsed * 1e9 / 2000, 1)}
+        print(f"  {f'{args.keywords} keywords ({strategy})':<28} {elapsed * 1e9 / 2000:>9.1f} ns/update")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"updates": args.updates, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# 💬 bench_conversation_state.py - Costo por mensaje del estado del asistente según backend
+#
+# Uso:
+#   python -m benchmarks.bench_conversation_state --users 500
+#   python -m benchmarks.bench_conversation_state --users 500 --processes 4   # contención entre workers (SQLite)
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Cada mensaje del asistente = lectura en el webhook + actualización atómica del paso
+WIZARD_STEPS = [
+    {'initiative_name': 'Integración API de pagos PSE'},
+    {'description': 'Implementar PSE y tarjetas para mejorar la conversión del checkout' * 3},
+    {'owner': 'Juan Pérez'},
+    {'team': 'Product'},
+    {'portal': 'Droguista'},
+    {'main_kpi': 'Conversion Rate'},
+    {'reach': 0.85, 'impact': 3, 'confidence': 0.9, 'effort': 2.0}
+]
+
+def make_backend(name, db_path):
+    from conversation_state import MemoryConversationBackend, SQLiteConversationBackend
+    if name == 'memory':
+        return MemoryConversationBackend(ttl=1800, max_sessions=100000)
+    return SQLiteConversationBackend(db_path, ttl=1800)
+
+def run_wizards(backend, users, user_offset=0):
+    """Simular `users` flujos completos de creación; devuelve (mensajes, segundos)"""
+    from conversation_state import ConversationStore
+    store = ConversationStore(backend)
+    messages = 0
+    start = time.perf_counter()
+    for n in range(users):
+        user_id = user_offset + n
+        store.start(user_id, 'creating_initiative')
+        messages += 1
+        for step, changes in enumerate(WIZARD_STEPS, start=2):
+            store.get(user_id)
+            store.update(user_id, changes, step=step)
+            messages += 1
+        store.get(user_id)
+        store.end(user_id)
+        messages += 1
+    return messages, time.perf_counter() - start
+
+def _worker(args):
+    name, db_path, users, offset = args
+    logging.disable(logging.WARNING)
+    return run_wizards(make_backend(name, db_path), users, offset)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del estado de conversaciones")
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=1, help="Workers concurrentes (simula gunicorn)")
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('memory', 'sqlite'):
+            db_path = os.path.join(tmp, f'{name}.db')
+            make_backend(name, db_path)  # crear el esquema antes de lanzar workers
+            if args.processes > 1 and name == 'sqlite':
+                jobs = [(name, db_path, args.users, i * args.users) for i in range(args.processes)]
+                start = time.perf_counter()
+                with multiprocessing.Pool(args.processes) as pool:
+                    outcomes = pool.map(_worker, jobs)
+                elapsed = time.perf_counter() - start
+                messages = sum(m for m, _ in outcomes)
+            else:
+                messages, elapsed = run_wizards(make_backend(name, db_path), args.users)
+
+            per_message_us = elapsed * 1e6 / messages
+            results[name] = {"messages": messages, "seconds": round(elapsed, 4),
+                             "per_message_us": round(per_message_us, 2),
+                             "messages_per_second": round(messages / elapsed)}
+            print(f"  {name:<8} {per_message_us:>9.2f} µs/message  {results[name]['messages_per_second']:>9} msg/s  ({messages} messages)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"users": args.users, "processes": args.processes, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# 🪞 bench_duplicates.py - Índice MinHash/LSH: construcción, consultas del asistente y clusters
+#
+# Uso:
+#   python -m benchmarks.bench_duplicates --size 10000 --duplicates 500
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.run_benchmarks import configure_environment, measure
+from benchmarks.synthetic import KPIS, PORTALS
+
+VERBS = ['Automatizar', 'Rediseñar', 'Lanzar', 'Medir', 'Integrar', 'Simplificar', 'Escalar', 'Auditar']
+OBJECTS = ['facturación', 'inventario', 'pedidos recurrentes', 'cupones', 'logística inversa', 'reportes',
+           'pagos contra entrega', 'alertas de stock', 'perfil del droguista', 'búsqueda de productos',
+           'devoluciones', 'comisiones', 'créditos', 'rutas de entrega', 'catálogo', 'encuestas NPS']
+QUALIFIERS = ['por región', 'para laboratorios', 'en móvil', 'con IA', 'en tiempo real', 'por lote',
+              'para nuevos sellers', 'multi-bodega', 'con WhatsApp', 'self-service']
+
+def _codename(rng):
+    """Nombre clave pseudo-aleatorio ('Kalumo'), como los que usan los equipos para sus proyectos"""
+    return ''.join(rng.choice('bcdfgklmnprstvz') + rng.choice('aeiou') for _ in range(rng.randint(2, 4))).capitalize()
+
+def _edit(text, rng):
+    """Copia casi idéntica: cambia mayúsculas/tildes y a veces agrega una palabra"""
+    words = text.split()
+    if rng.random() < 0.5:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(['nuevo', 'v2', 'mejorado', 'fase 2']))
+    text = ' '.join(words)
+    return text.lower() if rng.random() < 0.5 else text.replace('ó', 'o').replace('í', 'i')
+
+def generate_portfolio(size, duplicates, seed):
+    """Nombres combinatorios (casi todos distintos) + `duplicates` copias editadas de iniciativas existentes"""
+    rng = random.Random(seed)
+    records, planted = [], []
+    for i in range(1, size + 1):
+        if i > duplicates * 2 and len(planted) < duplicates:
+            original = records[rng.randrange(len(records))]
+            name, description = _edit(original['initiative_name'], rng), original['description']
+            planted.append((i, original['id']))
+        else:
+            name = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {_codename(rng)} {_codename(rng)}"
+            description = (f"{name} {rng.choice(QUALIFIERS)} en el portal {rng.choice(PORTALS)} para mover {rng.choice(KPIS)}; "
+                           f"piloto con {rng.randint(5, 500)} droguerías en {rng.choice(['Bogotá', 'Medellín', 'Cali', 'Barranquilla'])}.")
+        records.append({'id': i, 'initiative_name': name, 'description': description,
+                        'team': 'Growth', 'owner': 'Bench', 'status': 'Backlog'})
+    return records, planted
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del índice de duplicados")
+    parser.add_argument('--size', type=int, default=10000, help="Iniciativas del portfolio")
+    parser.add_argument('--duplicates', type=int, default=500, help="Copias casi idénticas sembradas")
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    from duplicate_index import DuplicateIndex
+
+    records, planted = generate_portfolio(args.size, args.duplicates, args.seed)
+    by_id = {r['id']: r for r in records}
+    index = DuplicateIndex()
+    t0 = time.perf_counter()
+    index.rebuild(records, 1)
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"  build ({args.size} initiatives, name + full)     {build_ms:>9.1f} ms")
+
+    # Diff con 1% de textos editados
+    edited = [dict(r) for r in records]
+    for record in random.Random(args.seed).sample(edited, max(args.size // 100, 1)):
+        record['initiative_name'] += ' fase 2'
+    t0 = time.perf_counter()
+    index.apply_snapshot(edited, 2)
+    diff_ms = (time.perf_counter() - t0) * 1000
+    print(f"  incremental refresh (1% edited)              {diff_ms:>9.1f} ms")
+    index.apply_snapshot(records, 3)
+
+    rng = random.Random(args.seed + 1)
+    results = {"build_ms": round(build_ms, 2), "incremental_ms": round(diff_ms, 2)}
+    for label, with_description in (('step1_name', False), ('step8_full', True)):
+        timings = []
+        for _ in range(args.queries):
+            record = records[rng.randrange(len(records))]
+            t0 = time.perf_counter()
+            index.find_similar(_edit(record['initiative_name'], rng),
+                               record['description'] if with_description else None)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        results[label] = {"p50_ms": round(statistics.median(timings), 4),
+                          "p99_ms": round(timings[int(len(timings) * 0.99) - 1], 4)}
+        print(f"  query {label:<12} p50 {results[label]['p50_ms']:.3f} ms  p99 {results[label]['p99_ms']:.3f} ms")
+
+    found = sum(1 for copy_id, original_id in planted
+                if original_id in {m['id'] for m in index.find_similar(by_id[copy_id]['initiative_name'], exclude_id=copy_id)})
+    results["planted_recall"] = round(found / len(planted), 4) if planted else None
+    print(f"  planted duplicates found at step 1           {found}/{len(planted)}")
+
+    results["clusters"] = measure(lambda: index.clusters('name'))
+    clusters = index.clusters('name')
+    print(f"  clusters (name)                              {results['clusters']['median_ms']:>9.1f} ms "
+          f"({len(clusters)} clusters, {sum(c['size'] for c in clusters)} initiatives)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"size": args.size, "duplicates": args.duplicates, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
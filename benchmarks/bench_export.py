@@ -0,0 +1,84 @@
+# 📤 bench_export.py - Memoria pico y throughput del export en streaming vs jsonify completo
+#
+# Uso:
+#   python -m benchmarks.bench_export --rows 100000
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_raw_initiatives
+from benchmarks.stub_nocodb import StubNocoDB
+from benchmarks.run_benchmarks import configure_environment
+
+def measure_peak(label, func):
+    """Ejecutar func bajo tracemalloc: memoria pico (MB), tiempo y bytes producidos"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    produced = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"peak_mb": round(peak / 1024 / 1024, 2), "seconds": round(elapsed, 3), "bytes": produced}
+    print(f"  {label:<32} peak {result['peak_mb']:>8.2f} MB  {result['seconds']:>7.3f}s  {produced / 1024 / 1024:>8.2f} MB out")
+    return result
+
+def drain(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del export en streaming")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    stub = StubNocoDB(generate_raw_initiatives(args.rows)).start()
+    configure_environment(stub)
+    logging.disable(logging.WARNING)
+
+    import config
+    from database import process_initiative_records, sort_initiatives_by_score, iter_nocodb_records
+    from bulk_io import EXPORT_FIELDS, generate_export
+    from app import app
+
+    snapshot = process_initiative_records(stub.rows)
+    config.initiatives_cache.update(data=snapshot, timestamp=time.time(), complete=True)
+    print(f"📤 Export of {args.rows} initiatives (snapshot already in memory)")
+
+    def full_jsonify():
+        # Lo que hace /api/initiatives: ordenar y serializar todo en un solo string
+        with app.app_context():
+            body = json.dumps({"success": True, "data": sort_initiatives_by_score(snapshot)})
+        return len(body)
+
+    results = {
+        "jsonify_full_list": measure_peak("jsonify (baseline)", full_jsonify),
+        "ndjson_from_cache": measure_peak("ndjson from cache", lambda: drain(generate_export(iter(snapshot), 'ndjson', EXPORT_FIELDS))),
+        "csv_from_cache": measure_peak("csv from cache", lambda: drain(generate_export(iter(snapshot), 'csv', EXPORT_FIELDS))),
+        "ndjson_gzip_from_cache": measure_peak("ndjson+gzip from cache", lambda: drain(generate_export(iter(snapshot), 'ndjson', EXPORT_FIELDS, compress=True))),
+        "ndjson_projected": measure_peak("ndjson fields=id,score,status", lambda: drain(generate_export(iter(snapshot), 'ndjson', ['id', 'score', 'status']))),
+        "ndjson_from_nocodb_pages": measure_peak("ndjson from NocoDB pages", lambda: drain(generate_export(iter_nocodb_records(), 'ndjson', EXPORT_FIELDS)))
+    }
+
+    client = app.test_client()
+    def route_stream():
+        response = client.get('/api/initiatives/export?format=ndjson', buffered=False)
+        try:
+            return drain(response.response)
+        finally:
+            response.close()
+    results["route_export_ndjson"] = measure_peak("GET /api/initiatives/export", route_stream)
+
+    stub.stop()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# 🕰️ bench_history.py - Consultas de tendencias sobre un año de historial sintético
+#
+# Uso:
+#   python -m benchmarks.bench_history --days 365 --refreshes-per-day 24 --size 500
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.run_benchmarks import configure_environment, measure
+from benchmarks.synthetic import generate_raw_initiatives
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del historial del portfolio")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--refreshes-per-day', type=int, default=24)
+    parser.add_argument('--size', type=int, default=500, help="Iniciativas del portfolio")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    import database
+    from analytics import calculate_statistics_fast
+    from config import VALID_STATUSES
+    from history_store import HistoryStore
+
+    rng = random.Random(args.seed)
+    records = database.process_initiative_records(generate_raw_initiatives(args.size, seed=args.seed))
+    start_ts = time.time() - args.days * 86400
+    step = 86400 / args.refreshes_per_day
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, 'history.db'))
+
+        # Cargar el año: cada refresh mueve algunas iniciativas de estado
+        t0 = time.perf_counter()
+        refreshes = args.days * args.refreshes_per_day
+        for n in range(refreshes):
+            for record in rng.sample(records, 3):
+                record['status'] = rng.choice(VALID_STATUSES)
+            store.record_refresh(records, calculate_statistics_fast(records), n, ts=start_ts + n * step)
+        load_seconds = time.perf_counter() - t0
+        print(f"  loaded {refreshes} refreshes in {load_seconds:.1f}s "
+              f"({load_seconds * 1000 / refreshes:.2f} ms/refresh incl. stats)")
+
+        end_ts = start_ts + refreshes * step
+        metrics = ['total', 'avg_score', 'status:Sprint', 'status:Production', 'team:Growth']
+        results = {"load_ms_per_refresh": round(load_seconds * 1000 / refreshes, 3)}
+        for bucket in ('day', 'week', 'month', 'raw'):
+            results[f"trends_{bucket}"] = measure(lambda: store.trends(metrics, start_ts, end_ts, bucket))
+            print(f"  trends ({bucket}, {len(metrics)} metrics, {args.days}d) {results[f'trends_{bucket}']['median_ms']:>9.3f} ms")
+        results["transitions_30d"] = measure(lambda: store.transitions(end_ts - 30 * 86400, end_ts, to_status='Sprint'))
+        print(f"  transitions (30d, to Sprint)          {results['transitions_30d']['median_ms']:>9.3f} ms")
+        results["store"] = store.get_status()
+        results["db_size_mb"] = round(os.path.getsize(os.path.join(tmp, 'history.db')) / 1e6, 2)
+        print(f"  db size {results['db_size_mb']} MB, {results['store']['metric_points']} metric points, "
+              f"{results['store']['transitions']} transitions")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"days": args.days, "refreshes_per_day": args.refreshes_per_day, "size": args.size,
+                       "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
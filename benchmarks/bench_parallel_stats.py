@@ -0,0 +1,139 @@
+# 🧮 bench_parallel_stats.py - Estadísticas en serie vs por shards en el pool de procesos
+#
+# Mide, por tamaño de portfolio, el tiempo de calculate_statistics_fast en ambos modos y
+# cuánto se bloquea un thread vecino (como los demás requests de Flask) mientras corre.
+#
+# El crossover es el menor tamaño desde el cual el modo por shards gana por al menos --margin
+# en ese tamaño y en todos los mayores (mediana de --runs corridas alternadas por modo).
+# Con menos de 2 CPUs o 2 workers no hay paralelismo real y se informa "not applicable".
+#
+# Uso:
+#   python -m benchmarks.bench_parallel_stats --sizes 5000 20000 50000 100000 --workers 4
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.run_benchmarks import configure_environment
+from benchmarks.synthetic import generate_raw_initiatives
+
+class StallProbe:
+    """Thread que despierta cada 1 ms y registra el mayor retraso (tiempo sin obtener el GIL)"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.max_stall = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            self.max_stall = max(self.max_stall, now - last - self.interval)
+            last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def timed_pair(serial, parallel, runs):
+    """Corridas alternadas serie/paralelo (el ruido del host afecta a ambos por igual): medianas y stalls máximos"""
+    times = {'serial': [], 'parallel': []}
+    stalls = {'serial': 0.0, 'parallel': 0.0}
+    for _ in range(runs):
+        for mode, func in (('serial', serial), ('parallel', parallel)):
+            with StallProbe() as probe:
+                started = time.perf_counter()
+                func()
+                times[mode].append(time.perf_counter() - started)
+            stalls[mode] = max(stalls[mode], probe.max_stall)
+    return {mode: (statistics.median(values) * 1000, stalls[mode] * 1000) for mode, values in times.items()}
+
+def find_crossover(results, margin):
+    """Menor tamaño desde el cual el speedup es >= margin en él y en todos los tamaños mayores"""
+    crossover = None
+    for result in reversed(results):
+        if result["speedup"] < margin:
+            break
+        crossover = result["size"]
+    return crossover
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de estadísticas por shards")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000, 100000])
+    parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 4))
+    parser.add_argument('--runs', type=int, default=5, help="Corridas por modo y tamaño (se usa la mediana)")
+    parser.add_argument('--margin', type=float, default=1.1, help="Speedup mínimo para considerar que el paralelo gana")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    import config
+    import database
+    import parallel_stats
+    from analytics import calculate_statistics_fast
+
+    config.PARALLEL_STATS_CONFIG.update(enabled=True, min_rows=0, workers=args.workers, min_shard_rows=1)
+    started = time.perf_counter()
+    parallel_stats.warm_up()
+    startup_ms = (time.perf_counter() - started) * 1000
+    print(f"  pool startup ({args.workers} workers, once per process)  {startup_ms:>9.1f} ms   cpus={os.cpu_count()}")
+
+    cpus = os.cpu_count() or 1
+    applicable = args.workers >= 2 and cpus >= 2
+    results = []
+    for size in sorted(args.sizes):
+        records = database.process_initiative_records(generate_raw_initiatives(size, seed=args.seed))
+        shards = len(parallel_stats._shards(records))
+        applicable = applicable and shards > 1
+
+        def run(enabled):
+            config.PARALLEL_STATS_CONFIG['enabled'] = enabled
+            calculate_statistics_fast(list(records))
+        measured = timed_pair(lambda: run(False), lambda: run(True), args.runs)
+        (serial_ms, serial_stall), (parallel_ms, parallel_stall) = measured['serial'], measured['parallel']
+        speedup = serial_ms / parallel_ms
+        results.append({"size": size, "shards": shards, "serial_ms": round(serial_ms, 1), "parallel_ms": round(parallel_ms, 1),
+                        "speedup": round(speedup, 3), "serial_max_stall_ms": round(serial_stall, 1),
+                        "parallel_max_stall_ms": round(parallel_stall, 1)})
+        print(f"  {size:>7} rows  serial {serial_ms:>8.1f} ms (stall {serial_stall:>6.1f})  "
+              f"parallel {parallel_ms:>8.1f} ms (stall {parallel_stall:>6.1f})  x{speedup:.2f}  shards={shards}")
+
+    if not applicable:
+        crossover = None
+        print(f"  crossover: not applicable (cpus={cpus}, workers={args.workers}: "
+              f"no real parallelism, keep PARALLEL_STATS_ENABLED=false)")
+    else:
+        crossover = find_crossover(results, args.margin)
+        if crossover:
+            print(f"  crossover: {crossover} rows (x{args.margin:.2f}+ here and at every larger size; "
+                  f"set PARALLEL_STATS_MIN_ROWS accordingly for this host)")
+        else:
+            print(f"  crossover: not reached (no size holds x{args.margin:.2f} up to the largest; "
+                  f"keep PARALLEL_STATS_ENABLED=false)")
+    parallel_stats.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"workers": args.workers, "cpus": cpus, "startup_ms": round(startup_ms, 1),
+                       "applicable": applicable, "margin": args.margin, "runs": args.runs,
+                       "crossover_rows": crossover, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
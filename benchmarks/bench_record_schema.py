@@ -0,0 +1,97 @@
+# 🧬 bench_record_schema.py - Normalización por esquema compilado vs safe_get_value por campo
+#
+# Uso:
+#   python -m benchmarks.bench_record_schema --size 50000 --dirty 0.1
+import argparse
+import json
+import logging
+import random
+import sys
+
+from benchmarks.run_benchmarks import configure_environment, measure
+from benchmarks.synthetic import generate_raw_initiatives
+
+DIRTY_VALUES = [None, '', '  ', 'n/a', ' 3 ', '2.5', 'true', 0]
+
+def legacy_process(initiatives, safe_get_value, calculate_score_fast):
+    """Flujo anterior: 13 llamadas a safe_get_value por fila + calculate_score_fast (4 más)"""
+    processed_initiatives = []
+    for init in initiatives:
+        try:
+            if not isinstance(init, dict):
+                continue
+            processed_init = {
+                'id': safe_get_value(init, 'id', 0, int),
+                'initiative_name': safe_get_value(init, 'initiative_name', 'Sin nombre', str),
+                'description': safe_get_value(init, 'description', 'Sin descripción', str),
+                'owner': safe_get_value(init, 'owner', 'Sin owner', str),
+                'team': safe_get_value(init, 'team', 'Sin equipo', str),
+                'portal': safe_get_value(init, 'portal', 'Sin portal', str),
+                'main_kpi': safe_get_value(init, 'main_kpi', 'Sin KPI', str),
+                'reach': safe_get_value(init, 'reach', 0.0, float),
+                'impact': safe_get_value(init, 'impact', 1, int),
+                'confidence': safe_get_value(init, 'confidence', 0.0, float),
+                'effort': safe_get_value(init, 'effort', 1.0, float),
+                'status': safe_get_value(init, 'status', 'Pending', str),
+                'must_have': safe_get_value(init, 'must_have', False, bool)
+            }
+            processed_init['score'] = calculate_score_fast(processed_init)
+            processed_init['calculated_score'] = processed_init['score']
+            processed_initiatives.append(processed_init)
+        except Exception:
+            continue
+    return processed_initiatives
+
+def dirty_copy(rows, ratio, seed):
+    """Copia con una fracción de valores numéricos/texto reemplazados por basura típica de NocoDB"""
+    rng = random.Random(seed)
+    fields = ['reach', 'impact', 'confidence', 'effort', 'owner', 'team', 'must_have']
+    result = []
+    for row in rows:
+        row = dict(row)
+        if rng.random() < ratio:
+            row[rng.choice(fields)] = rng.choice(DIRTY_VALUES)
+        result.append(row)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de normalización de registros")
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--dirty', type=float, default=0.1, help="Fracción de filas con un valor sucio")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.CRITICAL)  # el flujo anterior loguea un warning por valor inválido
+    import database
+    from record_schema import initiative_schema
+
+    datasets = {"clean": generate_raw_initiatives(args.size, seed=args.seed)}
+    datasets["dirty"] = dirty_copy(datasets["clean"], args.dirty, args.seed)
+
+    results = {}
+    for name, rows in datasets.items():
+        legacy = legacy_process(rows, database.safe_get_value, database.calculate_score_fast)
+        current = initiative_schema.normalize_rows(rows)
+        assert [sorted(r.items()) for r in legacy] == [sorted(r.items()) for r in current], "resultados distintos"
+
+        old = measure(lambda: legacy_process(rows, database.safe_get_value, database.calculate_score_fast))
+        new = measure(lambda: initiative_schema.normalize_rows(rows))
+        old_us, new_us = old["median_ms"] * 1000 / args.size, new["median_ms"] * 1000 / args.size
+        results[name] = {"legacy": old, "schema": new, "legacy_per_row_us": round(old_us, 3),
+                         "schema_per_row_us": round(new_us, 3), "speedup": round(old_us / new_us, 2)}
+        print(f"  {name:<6} {args.size} rows  safe_get_value {old_us:>6.2f} µs/row   "
+              f"schema {new_us:>6.2f} µs/row   x{old_us / new_us:.2f}")
+    print(f"  invalid values counted: {initiative_schema.last_batch['invalid_values']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"size": args.size, "dirty": args.dirty, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
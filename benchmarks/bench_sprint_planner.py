@@ -0,0 +1,67 @@
+# 🗓️ bench_sprint_planner.py - Planificador knapsack con miles de candidatas
+#
+# Uso:
+#   python -m benchmarks.bench_sprint_planner --candidates 1000 2000 5000 --capacity 20
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from benchmarks.run_benchmarks import configure_environment
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del planificador de sprints")
+    parser.add_argument('--candidates', type=int, nargs='+', default=[1000, 2000, 5000, 10000],
+                        help="Candidatas (Backlog/Prioritized) en un solo equipo")
+    parser.add_argument('--capacity', type=float, default=20.0, help="Capacidad del equipo en sprints")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    from config import SPRINT_PLANNER_CONFIG
+    from sprint_planner import plan_sprints, knapsack_dp, _units
+
+    rng = random.Random(args.seed)
+    results = []
+    for n in args.candidates:
+        records = [{
+            'id': i, 'initiative_name': f"Iniciativa {i}", 'team': 'Growth',
+            'status': rng.choice(SPRINT_PLANNER_CONFIG['candidate_statuses']),
+            'reach': round(rng.uniform(0.05, 1.0), 2), 'impact': rng.choice([1, 2, 3]),
+            'confidence': round(rng.uniform(0.3, 1.0), 2), 'effort': round(rng.uniform(0.5, 6.0), 1),
+            'must_have': False
+        } for i in range(n)]
+
+        started = time.perf_counter()
+        plan = plan_sprints(records, {'Growth': args.capacity})
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        team = plan['teams']['Growth']
+
+        # Referencia: DP exacta sobre las mismas candidatas
+        values = [r['reach'] * r['impact'] * r['confidence'] / r['effort'] for r in records]
+        values = [round(v, 4) for v in values]
+        weights = [_units(r['effort']) for r in records]
+        started = time.perf_counter()
+        dp_value, _, _ = knapsack_dp(values, weights, _units(args.capacity))
+        dp_ms = (time.perf_counter() - started) * 1000
+
+        results.append({"candidates": n, "plan_ms": round(elapsed_ms, 2), "engine": team['engine'],
+                        "optimal": team['optimal'], "total_score": team['total_score'],
+                        "dp_ms": round(dp_ms, 2), "dp_score": round(dp_value, 4)})
+        print(f"  {n:>6} candidates  plan {elapsed_ms:>8.1f} ms ({team['engine']}, optimal={team['optimal']}) "
+              f"score {team['total_score']:.4f} | dp {dp_ms:>8.1f} ms score {dp_value:.4f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"capacity": args.capacity, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# 🌊 bench_streaming_ingest.py - Memoria pico al leer una página grande de NocoDB: response.json() vs stream
+#
+# Sirve una página JSON pre-serializada (~50 MB por defecto) desde un servidor local y mide, para cada modo,
+# el pico de memoria Python (tracemalloc) y el tiempo de fetch_records_page.
+#
+# Uso:
+#   python -m benchmarks.bench_streaming_ingest --megabytes 50
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.run_benchmarks import configure_environment
+from benchmarks.synthetic import generate_raw_initiatives
+
+def build_page(megabytes, seed):
+    """Body JSON de una sola página con ~megabytes MB (descripciones largas como en producción)"""
+    def padded(count):
+        rows = generate_raw_initiatives(count, seed=seed)
+        for row in rows:
+            if row['description']:
+                row['description'] = (row['description'] + ' ') * 3
+        return rows
+
+    sample = padded(1000)
+    count = int(megabytes * 1024 * 1024 / (len(json.dumps(sample)) / len(sample)))
+    rows = padded(count)
+    body = json.dumps({"list": rows, "pageInfo": {"totalRows": count, "page": 1, "pageSize": count,
+                                                  "isLastPage": True}}).encode('utf-8')
+    return body, count
+
+class PageServer:
+    """Servidor HTTP local que devuelve siempre el mismo body ya codificado (sin asignar memoria por request)"""
+
+    def __init__(self, body, table_id='bench'):
+        self.table_id = table_id
+        page = memoryview(body)
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                for start in range(0, len(page), 1 << 20):
+                    self.wfile.write(page[start:start + (1 << 20)])
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta en streaming")
+    parser.add_argument('--megabytes', type=float, default=50)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    body, count = build_page(args.megabytes, args.seed)
+    server = PageServer(body)
+    configure_environment(server)
+    logging.disable(logging.WARNING)
+    import config
+    import database
+
+    url = f"{config.NOCODB_BASE_URL}/tables/{config.NOCODB_TABLE_ID}/records"
+    headers = {'accept': 'application/json', 'xc-token': config.NOCODB_TOKEN}
+    params = {'limit': count}
+    print(f"  page: {len(body) / 1024 / 1024:.1f} MB, {count} records")
+
+    results, outputs = {}, {}
+    for mode, streaming in (("response_json", False), ("streaming", True)):
+        config.NOCODB_STREAMING_CONFIG['enabled'] = streaming
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            response, records, _, meta = database.fetch_records_page(url, headers, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            del response, records, meta
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        response, records, rows, meta = database.fetch_records_page(url, headers, params)
+        del response, meta  # get_cached_initiatives también los suelta antes de devolver
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        outputs[mode] = records
+        results[mode] = {"rows": rows, "median_ms": round(sorted(timings)[len(timings) // 2], 1),
+                         "peak_mb": round((peak - baseline) / 1024 / 1024, 1),
+                         "retained_mb": round((current - baseline) / 1024 / 1024, 1)}
+        print(f"  {mode:<14} peak {results[mode]['peak_mb']:>7.1f} MB  retained {results[mode]['retained_mb']:>7.1f} MB  "
+              f"time {results[mode]['median_ms']:>8.1f} ms")
+
+    assert outputs["response_json"] == outputs["streaming"], "resultados distintos"
+    saved = results["response_json"]["peak_mb"] - results["streaming"]["peak_mb"]
+    print(f"  peak reduction: {saved:.1f} MB "
+          f"(x{results['response_json']['peak_mb'] / results['streaming']['peak_mb']:.2f})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"page_mb": round(len(body) / 1024 / 1024, 1), "records": count, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# 🧪 bench_whatif.py - Escenarios what-if por segundo sobre un portfolio sintético
+#
+# Uso:
+#   python -m benchmarks.bench_whatif --size 10000
+import argparse
+import json
+import logging
+import sys
+import time
+
+from benchmarks.run_benchmarks import configure_environment
+from benchmarks.synthetic import generate_raw_initiatives
+
+SCENARIOS = [
+    ("status=Production", "reach+10%"),
+    ("team=Growth", "confianza -20%"),
+    ("portal=Admin", "effort*2"),
+    ("status in active", "impact*1.2, confidence*0.9"),
+    ("", "impact*1.1"),
+]
+
+def scenarios_per_second(simulate, records, filter_query, adjustments, seconds):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        simulate(records, filter_query, adjustments, 1)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del simulador what-if")
+    parser.add_argument('--size', type=int, default=10000, help="Iniciativas del portfolio")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Duración por escenario")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    class _Stub:
+        base_url, table_id = 'http://127.0.0.1:9', 'bench'
+    configure_environment(_Stub)
+    logging.disable(logging.WARNING)
+    import database
+    from whatif import simulate, get_whatif_base
+
+    records = database.process_initiative_records(generate_raw_initiatives(args.size, seed=args.seed))
+    t0 = time.perf_counter()
+    get_whatif_base(records, 1)
+    base_ms = (time.perf_counter() - t0) * 1000
+    print(f"  base ranking ({args.size} initiatives, once per snapshot) {base_ms:>9.1f} ms")
+
+    results = {"base_ms": round(base_ms, 2), "scenarios": []}
+    for filter_query, adjustments in SCENARIOS:
+        affected = simulate(records, filter_query, adjustments, 1)["affected"]
+        rate = scenarios_per_second(simulate, records, filter_query, adjustments, args.seconds)
+        results["scenarios"].append({"filter": filter_query or "*", "adjust": adjustments,
+                                     "affected": affected, "scenarios_per_second": round(rate, 1)})
+        print(f"  {filter_query or '*':<18} {adjustments:<28} affected {affected:>6}  {rate:>8.1f} scenarios/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"size": args.size, "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
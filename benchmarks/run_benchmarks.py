@@ -0,0 +1,206 @@
+# ⏱️ run_benchmarks.py - Benchmarks de hot paths (procesamiento, scoring, stats, API)
+#
+# Uso:
+#   python -m benchmarks.run_benchmarks                          # 1k, 10k, 100k
+#   python -m benchmarks.run_benchmarks --sizes 1000,10000 --output base.json
+#   python -m benchmarks.run_benchmarks --compare base.json new.json --threshold 0.15
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import generate_raw_initiatives
+from benchmarks.stub_nocodb import StubNocoDB
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def configure_environment(stub):
+    """Apuntar la app al stub local ANTES de importar config (lee env al importar)"""
+    os.environ['NOCODB_BASE_URL'] = stub.base_url
+    os.environ['NOCODB_TABLE_ID'] = stub.table_id
+    os.environ['NOCODB_TOKEN'] = 'bench-token'
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['TRACING_ENABLED'] = 'false'
+    os.environ.setdefault('GROQ_API_KEY', '')
+    os.environ.pop('TELEGRAM_TOKEN', None)
+
+def measure(func, min_runs=3, max_runs=20, budget_seconds=2.0):
+    """Ejecutar func varias veces dentro de un presupuesto de tiempo; tiempos en ms"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_runs:
+        t0 = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - t0) * 1000)
+        if len(timings) >= min_runs and time.perf_counter() - started > budget_seconds:
+            break
+    return {
+        "runs": len(timings),
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "max_ms": round(max(timings), 4)
+    }
+
+def seed_cache(processed):
+    """Cargar el snapshot procesado en el cache como si viniera de NocoDB"""
+    import config
+    config.initiatives_cache["data"] = processed
+    config.initiatives_cache["timestamp"] = time.time()
+
+def run_size(size, stub, seed):
+    import config
+    import database
+    import analytics
+    from app import app
+
+    raw = generate_raw_initiatives(size, seed=seed)
+    stub.rows = raw
+    results = {}
+
+    def bench(name, func, **kwargs):
+        results[name] = measure(func, **kwargs)
+        results[name]["per_row_us"] = round(results[name]["median_ms"] * 1000 / size, 4)
+        print(f"  {name:<40} {results[name]['median_ms']:>10.3f} ms  ({results[name]['runs']} runs)")
+
+    processed = database.process_initiative_records(raw)
+
+    bench("record_processing", lambda: database.process_initiative_records(raw))
+
+    unscored = [{k: v for k, v in row.items() if k not in ('score', 'calculated_score')} for row in processed]
+    bench("scoring", lambda: [database.calculate_score_fast(row) for row in unscored])
+
+    bench("sorting", lambda: database.sort_initiatives_by_score(processed))
+
+    seed_cache(processed)
+    bench("search", lambda: database.search_initiatives('pagos'))
+
+    bench("statistics", lambda: analytics.calculate_statistics_fast(processed))
+
+    stats = analytics.calculate_statistics_fast(processed)
+    bench("text_formatting", lambda: analytics.format_statistics_text_fast(stats))
+
+    import reports
+    bench("text_formatting_cached", lambda: reports.render_cached(
+        'statistics', config.initiatives_cache["version"], lambda: analytics.format_statistics_text_fast(stats)))
+
+    def fetch_from_stub():
+        config.initiatives_cache["data"] = None
+        config.initiatives_cache["timestamp"] = 0
+        database.get_cached_initiatives()
+    bench("nocodb_fetch_and_process", fetch_from_stub)
+
+    seed_cache(processed)
+    client = app.test_client()
+    routes = [
+        '/api/initiatives',
+        '/api/initiatives/statistics',
+        '/api/initiatives/sprint',
+        '/api/initiatives/production',
+        '/api/initiatives/active',
+        '/api/initiatives/by-status/Backlog',
+        '/api/initiatives/search?q=pagos'
+    ]
+    for route in routes:
+        def call(route=route):
+            response = client.get(route)
+            assert response.status_code == 200, f"{route} -> {response.status_code}"
+            return response.data
+        bench(f"route:{route}", call)
+        results[f"route:{route}"]["response_bytes"] = len(call())
+
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def run(sizes, seed, output):
+    stub = StubNocoDB([]).start()
+    configure_environment(stub)
+    logging.disable(logging.WARNING)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "sizes": sizes
+        },
+        "results": {}
+    }
+
+    try:
+        for size in sizes:
+            print(f"📊 {size} initiatives")
+            report["results"][str(size)] = run_size(size, stub, seed)
+    finally:
+        stub.stop()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {output}")
+    return report
+
+def compare(baseline_path, current_path, threshold):
+    """Comparar medianas de dos corridas; exit code 1 si alguna regresión supera threshold"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+
+    regressions = []
+    print(f"{'size':>7}  {'benchmark':<42} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for size, benches in current["results"].items():
+        for name, result in benches.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if not base:
+                continue
+            change = (result["median_ms"] - base["median_ms"]) / base["median_ms"] if base["median_ms"] else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  ⚠️ REGRESSION"
+                regressions.append((size, name, change))
+            elif change < -threshold:
+                flag = "  ✅ faster"
+            print(f"{size:>7}  {name:<42} {base['median_ms']:>10.3f} {result['median_ms']:>10.3f} {change:>+7.1%}{flag}")
+
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de hot paths de MCP Saludia")
+    parser.add_argument('--sizes', default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Tamaños del portfolio sintético, separados por coma")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Comparar dos archivos de resultados")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Cambio relativo de la mediana considerado regresión (default 0.15)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    run(sizes, args.seed, output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
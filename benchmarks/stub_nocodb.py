@@ -0,0 +1,88 @@
+# 🗄️ stub_nocodb.py - Servidor NocoDB local mínimo para benchmarks
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+_WHERE_EQ = re.compile(r"\((\w+),eq,([^)]*)\)")
+
+def _parse_where(where):
+    """Soporta el subconjunto que usa database.py: (campo,eq,valor) unidos con ,or,"""
+    conditions = _WHERE_EQ.findall(where or '')
+    if not conditions:
+        return None
+    return lambda row: any(str(row.get(field)) == value for field, value in conditions)
+
+class StubNocoDB:
+    """Sirve /tables/<id>/records (GET con limit/offset/where, POST simple o bulk) y /health"""
+
+    def __init__(self, rows, table_id='bench_table', host='127.0.0.1', port=0):
+        self.rows = rows
+        self.table_id = table_id
+        self.created = []
+        self.request_count = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stub.request_count += 1
+                parsed = urlparse(self.path)
+                if parsed.path.endswith('/health'):
+                    return self._send(200, {"ok": True})
+                if parsed.path != f"/tables/{stub.table_id}/records":
+                    return self._send(404, {"msg": "not found"})
+
+                query = parse_qs(parsed.query)
+                limit = int(query.get('limit', ['25'])[0])
+                offset = int(query.get('offset', ['0'])[0])
+                predicate = _parse_where(query.get('where', [None])[0])
+                rows = [r for r in stub.rows if predicate(r)] if predicate else stub.rows
+                page = rows[offset:offset + limit]
+                self._send(200, {
+                    "list": page,
+                    "pageInfo": {"totalRows": len(rows), "page": offset // max(limit, 1) + 1,
+                                 "pageSize": limit, "isLastPage": offset + limit >= len(rows)}
+                })
+
+            def do_POST(self):
+                stub.request_count += 1
+                if urlparse(self.path).path != f"/tables/{stub.table_id}/records":
+                    return self._send(404, {"msg": "not found"})
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'null')
+                records = payload if isinstance(payload, list) else [payload]
+                ids = []
+                for record in records:
+                    new_id = len(stub.rows) + len(stub.created) + 1
+                    stub.created.append(dict(record, id=new_id))
+                    ids.append({"id": new_id})
+                self._send(200, ids if isinstance(payload, list) else ids[0])
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,46 @@
+# 🧪 synthetic.py - Generador de iniciativas sintéticas (forma de registros crudos NocoDB)
+import random
+
+TEAMS = ['Product', 'Sales', 'Ops', 'CS', 'Controlling', 'Growth']
+PORTALS = ['Seller', 'Droguista', 'Admin']
+STATUSES = ['Pending', 'Reviewed', 'Prioritized', 'Backlog', 'Sprint', 'Production', 'Monitoring', 'Discarded']
+KPIS = ['GMV', 'Conversion Rate', 'Take Rate', 'User Retention', 'NPS', 'CAC', 'LTV', 'Order Frequency']
+OWNERS = ['Juan Pérez', 'María García', 'Carlos López', 'Ana Martín', 'Luis Rodríguez',
+          'Laura Gómez', 'Andrés Torres', 'Sofía Ramírez', 'Diego Herrera', 'Valentina Castro']
+TOPICS = ['Integración API de pagos PSE', 'Onboarding de sellers', 'Dashboard de analytics',
+          'Chat de soporte', 'Optimización SEO', 'Programa de referidos', 'Checkout en un paso',
+          'Catálogo de laboratorios', 'Notificaciones push', 'Recompra automática']
+
+def generate_raw_initiatives(count, seed=42):
+    """Registros como los devuelve NocoDB, incluyendo nulos y strings vacíos ocasionales"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, count + 1):
+        topic = rng.choice(TOPICS)
+        row = {
+            'id': i,
+            'initiative_name': f"{topic} {i}",
+            'description': f"{topic} para el portal {rng.choice(PORTALS)}: mejora la conversión y reduce fricción "
+                           f"en el flujo de compra de droguerías (iniciativa #{i}).",
+            'owner': rng.choice(OWNERS),
+            'team': rng.choice(TEAMS),
+            'portal': rng.choice(PORTALS),
+            'main_kpi': rng.choice(KPIS),
+            'reach': round(rng.random(), 2),
+            'impact': rng.choice([1, 2, 3]),
+            'confidence': round(rng.uniform(0.3, 1.0), 2),
+            'effort': round(rng.uniform(0.5, 6.0), 1),
+            'status': rng.choice(STATUSES),
+            'must_have': rng.random() < 0.1,
+            'CreatedAt': '2025-01-01 00:00:00+00:00',
+            'UpdatedAt': '2025-01-01 00:00:00+00:00'
+        }
+        # Datos "sucios" reales: nulos y vacíos que ejercitan los caminos safe_*
+        if rng.random() < 0.05:
+            row['main_kpi'] = None
+        if rng.random() < 0.02:
+            row['description'] = ''
+        if rng.random() < 0.02:
+            row['effort'] = None
+        rows.append(row)
+    return rows
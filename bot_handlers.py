@@ -1,25 +1,59 @@
 # 🤖 bot_handlers.py - Manejadores del Bot v2.6 - FIXED - NO FREEZING
 import logging
 import time
+from functools import partial
 from flask import request
 from config import *
 from database import get_initiatives, search_initiatives, create_initiative, calculate_score_fast
 from analytics import calculate_statistics_fast, format_statistics_text_fast, analyze_initiatives_with_llm_fast
-from utils import send_telegram_message
+from utils import send_telegram_message, edit_telegram_message, answer_callback_query
+from resilience import retry_call
+from rate_limiter import check_rate_limit
+from metrics import registry, BOT_COMMAND_DURATION
+from tracing import span, current_trace
+from conversation_state import conversation_states
+from bot_router import CommandRouter
+from growth_view import get_growth_view
+from reports import (render_cached, render_growth_analysis, render_initiative_summary,
+                     render_wizard_summary, render_creation_success, render_duplicate_warning, priority_emoji)
+from duplicate_index import find_duplicates
+from result_pages import result_pages, parse_page_callback
+from snapshot import get_snapshot, get_snapshot_view, get_ranked_view
 
 logger = logging.getLogger(__name__)
 
-# Variables globales para estados de usuario
-user_states = {}
+# Router compilado: los handlers se registran con @router.command / @router.prefix / router.add_intent
+router = CommandRouter()
+
+registry.gauge('saludia_wizard_sessions_active', 'Usuarios con el asistente de creación en curso',
+               callback=lambda: conversation_states.active_count())
+
+# Filtros por estado del bot: estado -> alias
+BOT_STATUS_COMMANDS = {
+    'pending': ['pendiente'],
+    'reviewed': ['revisadas'],
+    'prioritized': ['priorizadas'],
+    'backlog': [],
+    'sprint': ['desarrollo', 'dev'],
+    'production': ['produccion', 'prod'],
+    'monitoring': ['monitoreo'],
+    'discarded': ['descartadas']
+}
 
 def setup_telegram_routes(app):
     """Configurar rutas del bot de Telegram - FIXED VERSION"""
+    router.compile()
     
     @app.route('/telegram-webhook', methods=['POST'])
     def telegram_webhook():
         """Webhook optimizado con timeout protection"""
         try:
-            update_data = request.get_json()
+            with span('webhook_parse'):
+                update_data = request.get_json()
+            
+            if update_data and 'callback_query' in update_data:
+                handle_callback_query(update_data['callback_query'])
+                return "OK", 200
             
             if not update_data or 'message' not in update_data:
                 return "OK", 200
@@ -33,57 +67,41 @@ def setup_telegram_routes(app):
             
             text = message['text'].strip().lower()
             
+            # Con el asistente activo el texto libre es su respuesta: solo comandos exactos o con '/'
+            wizard_state = conversation_states.get(user_id)
+            in_wizard = wizard_state is not None
+            
+            # Resolución O(1) del comando (tabla exacta o prefijo) antes del rate limiting
+            route, args = router.resolve(text, in_wizard)
+            
+            # Rate limiting por usuario de Telegram y clase de comando
+            rate_class = 'api' if in_wizard or route is None else route.rate_class
+            rate_result = check_rate_limit(f"tg:{user_id}", rate_class)
+            if not rate_result["allowed"]:
+                send_telegram_message(chat_id, f"🚦 **Demasiadas solicitudes.** Intenta nuevamente en {rate_result['retry_after']}s.")
+                return "OK", 200
+            
             # Timeout wrapper para evitar colgado
             start_time = time.time()
             
             try:
-                # Router optimizado - CON TIMEOUT PROTECTION
-                if text in ['/start', 'start', 'inicio', 'hola']:
-                    handle_start_command(chat_id)
-                elif text in ['/help', 'help', 'ayuda']:
-                    handle_help_command(chat_id)
-                elif text in ['/iniciativas', 'iniciativas', 'lista']:
-                    handle_list_initiatives_safe(chat_id)  # FIXED VERSION
-                elif text in ['/crear', 'crear', 'nueva']:
-                    handle_create_command(chat_id, user_id)
-                elif text in ['/analizar', 'analizar', 'análisis']:
-                    handle_analyze_command_safe(chat_id)  # FIXED VERSION
-                elif text.startswith(('buscar ', '/buscar ')):
-                    query = text.split(' ', 1)[1] if ' ' in text else ""
-                    if query:
-                        handle_search_command_fast(chat_id, query)
-                    else:
-                        send_telegram_message(chat_id, "🔍 **¿Qué quieres buscar?**\n\nEjemplos:\n• buscar Product\n• buscar API")
-                
-                # ESTADOS REALES DE LA DB
-                elif text in ['/pending', 'pending', 'pendiente']:
-                    handle_filter_by_status(chat_id, 'pending')
-                elif text in ['/reviewed', 'reviewed', 'revisadas']:
-                    handle_filter_by_status(chat_id, 'reviewed')
-                elif text in ['/prioritized', 'prioritized', 'priorizadas']:
-                    handle_filter_by_status(chat_id, 'prioritized')
-                elif text in ['/backlog', 'backlog']:
-                    handle_filter_by_status(chat_id, 'backlog')
-                elif text in ['/sprint', 'sprint', 'desarrollo', 'dev']:
-                    handle_filter_by_status(chat_id, 'sprint')
-                elif text in ['/production', 'production', 'produccion', 'prod']:
-                    handle_filter_by_status(chat_id, 'production')
-                elif text in ['/monitoring', 'monitoring', 'monitoreo']:
-                    handle_filter_by_status(chat_id, 'monitoring')
-                elif text in ['/discarded', 'discarded', 'descartadas']:
-                    handle_filter_by_status(chat_id, 'discarded')
-                elif text in ['/estados', 'estados', 'status', 'comandos']:
-                    handle_status_info(chat_id)
-                elif text in ['/growth', 'growth', 'crecimiento']:  # NUEVO: Comando específico Growth
-                    handle_growth_analysis(chat_id)
-                else:
-                    if user_id in user_states:
-                        handle_text_message(chat_id, user_id, message['text'])
+                command_label = route.name if route is not None else ('wizard' if in_wizard else 'natural')
+                with span('command', command=command_label):
+                    if route is not None:
+                        route(chat_id, user_id, args, text)
+                    elif in_wizard:
+                        handle_text_message(chat_id, user_id, message['text'], wizard_state)
                     else:
                         handle_natural_message_fast(chat_id, text)
                 
                 # Check for timeout
                 elapsed_time = time.time() - start_time
+                BOT_COMMAND_DURATION.observe(elapsed_time, command_label)
+                trace = current_trace()
+                if trace is not None:
+                    trace.attrs['command'] = command_label
+                    if elapsed_time * 1000 > TRACE_CONFIG['slow_trace_ms']:
+                        logger.warning(f"🐢 Slow command '{command_label}' ({elapsed_time:.1f}s) trace #{trace.trace_id}: {trace.summary()}")
                 if elapsed_time > 25:  # 25 seconds timeout
                     logger.warning(f"⚠️ Command took too long: {elapsed_time:.1f}s")
                     send_telegram_message(chat_id, "⚠️ Comando tardó más de lo esperado. Reintenta.")
@@ -98,6 +116,56 @@ def setup_telegram_routes(app):
             logger.error(f"❌ Webhook error: {e}")
             return "Handled with error", 200
 
+def handle_callback_query(callback):
+    """Botones inline: enrutar por prefijo de callback_data y confirmar siempre el callback"""
+    callback_id = callback.get('id')
+    message = callback.get('message') or {}
+    chat_id = (message.get('chat') or {}).get('id')
+    user_id = (callback.get('from') or {}).get('id')
+    
+    route, args = router.resolve_callback(callback.get('data'))
+    if route is None or chat_id is None:
+        answer_callback_query(callback_id)
+        return
+    
+    rate_result = check_rate_limit(f"tg:{user_id}", route.rate_class)
+    if not rate_result["allowed"]:
+        answer_callback_query(callback_id, f"🚦 Demasiadas solicitudes. Intenta en {rate_result['retry_after']}s.")
+        return
+    
+    start_time = time.time()
+    try:
+        with span('command', command=route.name):
+            route(chat_id, user_id, args, callback=callback)
+    except Exception as e:
+        logger.error(f"❌ Callback processing error: {e}")
+        answer_callback_query(callback_id, "❌ Error procesando la acción")
+    BOT_COMMAND_DURATION.observe(time.time() - start_time, route.name)
+
+@router.callback(RESULT_PAGES_CONFIG['callback_prefix'])
+def handle_page_callback(callback, args):
+    """Cambiar de página editando el mismo mensaje desde el handle guardado (sin re-consultar)"""
+    handle, page = parse_page_callback(args)
+    result = result_pages.get(handle) if handle else None
+    if result is None:
+        answer_callback_query(callback['id'], "⌛ Estos resultados expiraron. Ejecuta el comando de nuevo.")
+        return
+    if page is None:
+        answer_callback_query(callback['id'])
+        return
+    
+    records_by_id = result_pages.snapshot_records(result)
+    if records_by_id is None:
+        result_pages.expire(handle)
+        answer_callback_query(callback['id'], "🔄 Los datos se actualizaron desde este listado. Ejecuta el comando de nuevo.")
+        return
+    text, keyboard = result_pages.render(handle, result, page, records_by_id, format_initiative_summary_safe)
+    
+    message = callback['message']
+    edit_telegram_message(message['chat']['id'], message['message_id'], text, parse_mode='Markdown', reply_markup=keyboard)
+    answer_callback_query(callback['id'])
+
+@router.command('iniciativas', 'lista')
 def handle_list_initiatives_safe(chat_id):
     """Listar iniciativas con protección contra colgado - FIXED VERSION"""
     logger.info(f"📱 List initiatives SAFE from chat {chat_id}")
@@ -109,29 +177,14 @@ def handle_list_initiatives_safe(chat_id):
         # Timeout protection
         start_time = time.time()
         
-        # Intentar obtener datos con timeout
-        data = None
-        max_attempts = 3
-        
-        for attempt in range(max_attempts):
-            try:
-                logger.info(f"🔄 Attempt {attempt + 1}/{max_attempts} to fetch initiatives")
-                data = get_initiatives()
-                
-                if data and data.get("success"):
-                    break
-                else:
-                    logger.warning(f"⚠️ Attempt {attempt + 1} failed: {data.get('error') if data else 'No data'}")
-                    if attempt < max_attempts - 1:
-                        time.sleep(2)  # Wait 2 seconds before retry
-                        
-            except Exception as e:
-                logger.error(f"❌ Attempt {attempt + 1} exception: {e}")
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-                else:
-                    send_telegram_message(chat_id, f"❌ Error después de {max_attempts} intentos: {str(e)}")
-                    return
+        # Reintentos con backoff exponencial + jitter (RETRY_CONFIG); fail fast si el circuito está abierto
+        try:
+            data = retry_call(get_initiatives, dependency='nocodb',
+                              should_retry=lambda result: not (result and result.get("success")),
+                              deadline=20)
+        except Exception as e:
+            send_telegram_message(chat_id, f"❌ Error después de {RETRY_CONFIG['max_attempts']} intentos: {str(e)}")
+            return
         
         # Check timeout
         elapsed_time = time.time() - start_time
@@ -155,8 +208,7 @@ def handle_list_initiatives_safe(chat_id):
         # Procesar estadísticas de forma segura
         try:
             send_telegram_message(chat_id, "📊 **Generando estadísticas...**")
-            stats = calculate_statistics_fast(initiatives)
-            stats_text = format_statistics_text_fast(stats)
+            stats, stats_text = get_statistics_report(initiatives)
             
             # Enviar estadísticas en chunks si es muy largo
             if len(stats_text) > MAX_MESSAGE_LENGTH:
@@ -174,38 +226,16 @@ def handle_list_initiatives_safe(chat_id):
             logger.error(f"❌ Error generating stats: {e}")
             send_telegram_message(chat_id, f"❌ Error generando estadísticas: {str(e)}")
         
-        # Lista rápida - solo top 10 para evitar saturación
+        # Lista paginada: primera página + botones ⬅️/➡️ sobre el mismo resultado
         try:
-            send_telegram_message(chat_id, "📋 **Generando lista top...**")
-            
             # Usar las iniciativas ya ordenadas de stats si están disponibles
             sorted_initiatives = stats.get('sorted_initiatives', initiatives) if 'stats' in locals() else initiatives
             
-            text = f"📋 **TOP {min(MAX_RESULTS_LIST, len(sorted_initiatives))} INICIATIVAS POR SCORE RICE:**\n\n"
-            
-            for i, init in enumerate(sorted_initiatives[:MAX_RESULTS_LIST], 1):
-                try:
-                    formatted = format_initiative_summary_safe(init, i)
-                    text += f"{formatted}\n\n"
-                except Exception as e:
-                    logger.warning(f"Error formatting initiative {i}: {e}")
-                    text += f"{i}. ❌ **Error formateando iniciativa**\n\n"
-            
-            if len(sorted_initiatives) > MAX_RESULTS_LIST:
-                text += f"📌 **{len(sorted_initiatives) - MAX_RESULTS_LIST} iniciativas más...**\nUsa `buscar` para encontrar específicas."
-            
-            # Info de cache
             cache_info = " (Cache)" if data.get("cached") else " (Fresh)"
-            text += f"\n💡 **Datos actualizados{cache_info}** - Tiempo: {elapsed_time:.1f}s"
-            
-            # Enviar lista en chunks si es necesario
-            if len(text) > MAX_MESSAGE_LENGTH:
-                chunks = [text[i:i+MAX_MESSAGE_LENGTH] for i in range(0, len(text), MAX_MESSAGE_LENGTH)]
-                for chunk in chunks:
-                    send_telegram_message(chat_id, chunk, parse_mode='Markdown')
-                    time.sleep(1)
-            else:
-                send_telegram_message(chat_id, text, parse_mode='Markdown')
+            text, keyboard = result_pages.publish(
+                "📋 **INICIATIVAS POR SCORE RICE**", sorted_initiatives, initiatives_cache["version"],
+                format_initiative_summary_safe, footer=f"💡 **Datos actualizados{cache_info}** - Tiempo: {elapsed_time:.1f}s")
+            send_telegram_message(chat_id, text, parse_mode='Markdown', reply_markup=keyboard)
                 
         except Exception as e:
             logger.error(f"❌ Error generating list: {e}")
@@ -226,6 +256,7 @@ def handle_list_initiatives_safe(chat_id):
         logger.error(f"❌ Fatal error in handle_list_initiatives_safe: {e}")
         send_telegram_message(chat_id, f"❌ Error crítico: {str(e)}\n\n💡 Intenta nuevamente en unos momentos.")
 
+@router.command('analizar', 'análisis', rate_class='ai')
 def handle_analyze_command_safe(chat_id):
     """Análisis con protección contra colgado y enfoque Growth - FIXED VERSION"""
     logger.info(f"📱 Analyze SAFE with Growth focus from chat {chat_id}")
@@ -235,26 +266,14 @@ def handle_analyze_command_safe(chat_id):
         
         start_time = time.time()
         
-        # Obtener datos con timeout protection
+        # Obtener datos con backoff exponencial + jitter - menos intentos para análisis
         data = None
-        max_attempts = 2  # Menos intentos para análisis
-        
-        for attempt in range(max_attempts):
-            try:
-                logger.info(f"🔄 Analysis attempt {attempt + 1}/{max_attempts}")
-                data = get_initiatives()
-                
-                if data and data.get("success"):
-                    break
-                else:
-                    logger.warning(f"⚠️ Analysis attempt {attempt + 1} failed")
-                    if attempt < max_attempts - 1:
-                        time.sleep(3)
-                        
-            except Exception as e:
-                logger.error(f"❌ Analysis attempt {attempt + 1} exception: {e}")
-                if attempt < max_attempts - 1:
-                    time.sleep(3)
+        try:
+            data = retry_call(get_initiatives, dependency='nocodb',
+                              should_retry=lambda result: not (result and result.get("success")),
+                              max_attempts=2, deadline=15)
+        except Exception as e:
+            logger.error(f"❌ Analysis data fetch exception: {e}")
         
         if not data or not data.get("success"):
             error_msg = data.get('error', 'Error desconocido') if data else 'No se obtuvieron datos'
@@ -270,8 +289,7 @@ def handle_analyze_command_safe(chat_id):
         # Estadísticas rápidas primero
         try:
             send_telegram_message(chat_id, "📊 **Calculando métricas...**")
-            stats = calculate_statistics_fast(initiatives)
-            stats_text = format_statistics_text_fast(stats)
+            stats, stats_text = get_statistics_report(initiatives)
             
             cache_info = " (Cache)" if data.get("cached") else " (Fresh)"
             stats_text += f"\n⚡ **Datos{cache_info}**"
@@ -344,6 +362,7 @@ def handle_analyze_command_safe(chat_id):
         logger.error(f"❌ Fatal error in analyze command: {e}")
         send_telegram_message(chat_id, f"❌ Error crítico en análisis: {str(e)}")
 
+@router.command('growth', 'crecimiento')  # NUEVO: Comando específico Growth
 def handle_growth_analysis(chat_id):
     """Nuevo comando específico para análisis de Growth"""
     logger.info(f"📱 Growth-specific analysis from chat {chat_id}")
@@ -363,80 +382,8 @@ def handle_growth_analysis(chat_id):
             send_telegram_message(chat_id, "🔭 No hay iniciativas para analizar.")
             return
         
-        # Filtrar iniciativas de Growth
-        growth_initiatives = [init for init in initiatives if 
-                            str(init.get('team', '')).strip().lower() == 'growth']
-        
-        total_initiatives = len(initiatives)
-        growth_count = len(growth_initiatives)
-        
-        # Calcular métricas específicas de Growth
-        if growth_initiatives:
-            growth_scores = [calculate_score_fast(init) for init in growth_initiatives]
-            avg_growth_score = sum(growth_scores) / len(growth_scores)
-            high_priority_growth = len([s for s in growth_scores if s >= 2.0])
-            
-            # Ordenar por score
-            growth_initiatives.sort(key=calculate_score_fast, reverse=True)
-            
-            analysis = f"""🚀 **ANÁLISIS ESPECÍFICO GROWTH - SALUDIA**
-
-📊 **MÉTRICAS GROWTH:**
-• Iniciativas Growth: {growth_count} de {total_initiatives} ({(growth_count/total_initiatives)*100:.1f}%)
-• Score promedio Growth: {avg_growth_score:.2f}
-• Alta prioridad (≥2.0): {high_priority_growth} iniciativas
-
-🏆 **TOP INICIATIVAS GROWTH:**
-"""
-            
-            for i, init in enumerate(growth_initiatives[:5], 1):
-                score = calculate_score_fast(init)
-                priority_emoji = "🔥" if score >= 2.0 else "⭐" if score >= 1.0 else "📋"
-                
-                analysis += f"""
-{i}. {priority_emoji} **{init.get('initiative_name', 'Sin nombre')}** (Score: {score:.2f})
-   👤 {init.get('owner', 'Sin owner')} | 🖥️ {init.get('portal', 'Sin portal')}
-   📊 KPI: {init.get('main_kpi', 'Sin KPI')}
-   📝 {init.get('description', 'Sin descripción')[:100]}...
-"""
-            
-            analysis += f"""
-
-💡 **RECOMENDACIONES GROWTH:**
-"""
-            
-            if high_priority_growth == 0:
-                analysis += "• ⚠️ No hay iniciativas Growth de alta prioridad (Score ≥ 2.0)"
-            else:
-                analysis += f"• ✅ {high_priority_growth} iniciativas Growth de alta prioridad - Ejecutar inmediatamente"
-            
-            if avg_growth_score < 1.0:
-                analysis += "\n• ⚠️ Score promedio Growth bajo - Revisar estimaciones RICE"
-            else:
-                analysis += f"\n• ✅ Score promedio Growth saludable: {avg_growth_score:.2f}"
-            
-            if growth_count < 3:
-                analysis += "\n• ⚠️ Pocas iniciativas Growth - Considerar más proyectos de crecimiento"
-            
-        else:
-            analysis = f"""🚀 **ANÁLISIS ESPECÍFICO GROWTH - SALUDIA**
-
-⚠️ **NO HAY INICIATIVAS DE GROWTH IDENTIFICADAS**
-
-📊 **Estado actual:**
-• Total iniciativas: {total_initiatives}
-• Iniciativas Growth: 0 (0%)
-
-💡 **RECOMENDACIONES CRÍTICAS:**
-• 🚨 URGENTE: Crear iniciativas específicas para el equipo Growth
-• 🎯 Enfocar en: Adquisición de usuarios, Retention, Conversion Rate
-• 📈 KPIs sugeridos: GMV, Take Rate, User Acquisition Cost
-• 🚀 Considerar iniciativas de marketing, onboarding, referral programs
-
-🎯 **Próximos pasos:**
-1. Usar comando `crear` para agregar iniciativas Growth
-2. Balancear portfolio con iniciativas de crecimiento
-3. Establecer KPIs claros de Growth para Saludia marketplace"""
+        # El texto se renderiza una vez por versión del snapshot
+        analysis = render_cached('growth', initiatives_cache["version"], lambda: build_growth_analysis(initiatives))
         
         send_telegram_message(chat_id, analysis, parse_mode='Markdown')
         
@@ -444,6 +391,18 @@ def handle_growth_analysis(chat_id):
         logger.error(f"❌ Growth analysis error: {e}")
         send_telegram_message(chat_id, f"❌ Error en análisis Growth: {str(e)}")
 
+def get_statistics_report(initiatives):
+    """(stats, texto) del snapshot actual; se calculan y renderizan una vez por versión"""
+    version = initiatives_cache["version"]
+    stats = get_snapshot_view('statistics', lambda: calculate_statistics_fast(initiatives), version)
+    return stats, render_cached('statistics', version, lambda: format_statistics_text_fast(stats))
+
+def build_growth_analysis(initiatives):
+    """Texto del análisis Growth desde la vista materializada del snapshot"""
+    growth = get_growth_view(initiatives).growth
+    return render_growth_analysis(len(initiatives), growth.count, growth.average,
+                                  growth.high_priority, growth.top(5))
+
 def format_initiative_summary_safe(initiative, index=None):
     """Formatear iniciativa optimizado y seguro - FIXED VERSION"""
     try:
@@ -460,13 +419,7 @@ def format_initiative_summary_safe(initiative, index=None):
             logger.warning(f"Error calculating score: {e}")
             score = 0.0
         
-        priority_emoji = "🔥" if score >= 2.0 else "⭐" if score >= 1.0 else "📋"
-        prefix = f"**{index}.** " if index else ""
-        
-        # Emoji especial para Growth
-        team_emoji = "🚀" if team.lower() == "growth" else "👥"
-        
-        return f"{prefix}{priority_emoji} **{name}** (Score: {score:.2f})\n{team_emoji} {team} | 👤 {owner}"
+        return render_initiative_summary(name, owner, team, score, index)
         
     except Exception as e:
         logger.error(f"Format error: {e}")
@@ -482,6 +435,7 @@ def safe_get_string_local(obj, key, default=''):
     except:
         return default
 
+@router.command('start', 'inicio', 'hola')
 def handle_start_command(chat_id):
     """Comando start optimizado"""
     logger.info(f"📱 /start from chat {chat_id}")
@@ -520,6 +474,7 @@ Asistente especializado en gestión de iniciativas con metodología RICE, enfoca
     
     send_telegram_message(chat_id, text, parse_mode='Markdown')
 
+@router.command('help', 'ayuda')
 def handle_help_command(chat_id):
     """Comando help optimizado con enfoque Growth"""
     text = """📚 **Comandos Disponibles** ⚡ v2.6 - GROWTH FOCUSED
@@ -531,6 +486,9 @@ def handle_help_command(chat_id):
 **📊 Comandos Básicos:**
 • `iniciativas` - Lista completa por score RICE
 • `buscar <término>` - Búsqueda optimizada
+• `consulta <condiciones>` - Filtros combinados (ej. `consulta team=growth and score>=2`)
+• `simular <filtro> : <ajustes>` - What-if RICE (ej. `simular team=growth : confianza -20%`)
+• `planificar <equipo>=<sprints>` - Plan de sprint por capacidad (ej. `planificar growth=3 product=2`)
 • `crear` - Nueva iniciativa con validaciones RICE
 
 **📈 Filtros por Estado:**
@@ -560,25 +518,23 @@ Pending → Reviewed → Prioritized → Backlog → Sprint → Production → M
     
     send_telegram_message(chat_id, text, parse_mode='Markdown')
 
+# Intents de lenguaje natural en orden de prioridad: (palabras clave, sugerencia)
+NATURAL_INTENTS = [
+    (['crecimiento', 'growth', 'crecer'], "🚀 Análisis Growth: `growth`"),
+    (['iniciativa', 'proyecto', 'lista'], "🎯 Ver iniciativas: `iniciativas`"),
+    (['buscar', 'encontrar'], "🔍 Buscar: `buscar Growth`"),
+    (['crear', 'nueva'], "🆕 Crear: `crear`"),
+    (['análisis', 'analizar'], "📊 Análisis: `analizar`"),
+    (['sprint', 'desarrollo', 'dev'], "🔧 En desarrollo: `sprint`"),
+    (['producción', 'production', 'implementado'], "🚀 Implementadas: `production`")
+]
+
+for _keywords, _reply in NATURAL_INTENTS:
+    router.add_intent(_keywords, lambda chat_id, reply=_reply: send_telegram_message(chat_id, reply))
+
 def handle_natural_message_fast(chat_id, text):
     """Manejar mensajes naturales optimizado con sugerencias Growth"""
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['crecimiento', 'growth', 'crecer']):
-        send_telegram_message(chat_id, "🚀 Análisis Growth: `growth`")
-    elif any(word in text_lower for word in ['iniciativa', 'proyecto', 'lista']):
-        send_telegram_message(chat_id, "🎯 Ver iniciativas: `iniciativas`")
-    elif any(word in text_lower for word in ['buscar', 'encontrar']):
-        send_telegram_message(chat_id, "🔍 Buscar: `buscar Growth`")
-    elif any(word in text_lower for word in ['crear', 'nueva']):
-        send_telegram_message(chat_id, "🆕 Crear: `crear`")
-    elif any(word in text_lower for word in ['análisis', 'analizar']):
-        send_telegram_message(chat_id, "📊 Análisis: `analizar`")
-    elif any(word in text_lower for word in ['sprint', 'desarrollo', 'dev']):
-        send_telegram_message(chat_id, "🔧 En desarrollo: `sprint`")
-    elif any(word in text_lower for word in ['producción', 'production', 'implementado']):
-        send_telegram_message(chat_id, "🚀 Implementadas: `production`")
-    else:
+    if not router.dispatch_intent(chat_id, text.lower()):
         send_telegram_message(chat_id, """💬 **Comandos disponibles:**
 
 **🚀 Growth:** `growth`, `analizar`
@@ -587,8 +543,13 @@ def handle_natural_message_fast(chat_id, text):
 
 💡 **Tip:** Escribe `help` para ver todos los comandos.""")
 
+@router.prefix('buscar', rate_class='search')
 def handle_search_command_fast(chat_id, query):
     """Búsqueda optimizada con timeout protection"""
+    if not query:
+        send_telegram_message(chat_id, "🔍 **¿Qué quieres buscar?**\n\nEjemplos:\n• buscar Product\n• buscar API")
+        return
+    
     logger.info(f"📱 Search FAST '{query}' from chat {chat_id}")
     
     try:
@@ -643,19 +604,145 @@ def handle_search_command_fast(chat_id, query):
         logger.error(f"❌ Search error: {e}")
         send_telegram_message(chat_id, f"❌ Error en búsqueda: {str(e)}")
 
+@router.prefix('consulta', rate_class='search')
+def handle_query_command(chat_id, query):
+    """Consulta estructurada sobre los índices del snapshot: consulta team=growth and score>=2"""
+    from snapshot import get_snapshot
+    from query_engine import run_query
+    
+    if not query:
+        send_telegram_message(chat_id, """🧭 **Consulta estructurada**
+
+Combina condiciones con `and`:
+• `consulta team=growth and portal=seller and score>=2`
+• `consulta status in active and owner=juan pérez`
+• `consulta kpi=gmv and effort<=1`
+
+**Campos:** team, portal, status, owner, kpi, score, reach, impact, confidence, effort
+**Operadores:** `=`, `!=`, `>=`, `<=`, `>`, `<`, `in` (valores separados por coma)""")
+        return
+    
+    try:
+        start_time = time.time()
+        data, version = get_snapshot()
+        if not data.get("success"):
+            send_telegram_message(chat_id, f"❌ Error: {data.get('error')}")
+            return
+        
+        result = run_query(query, data.get("data", []), version, MAX_RESULTS_SEARCH)
+        elapsed = time.time() - start_time
+        
+        if not result.get("success"):
+            send_telegram_message(chat_id, f"❌ {result.get('error')}\n\nEscribe `consulta` para ver la sintaxis.")
+            return
+        
+        total = result.get("total", 0)
+        if not total:
+            send_telegram_message(chat_id, f"🧭 **Sin resultados:** `{query}`")
+            return
+        
+        text = f"🧭 **CONSULTA:** `{query}` ({total} encontradas)\n\n"
+        for i, init in enumerate(result["data"], 1):
+            text += format_initiative_summary_safe(init, i) + "\n"
+        
+        if total > MAX_RESULTS_SEARCH:
+            text += f"📌 **{total - MAX_RESULTS_SEARCH} resultados más...** Agrega condiciones para refinar."
+        text += f"\n⚡ Consulta resuelta en {elapsed * 1000:.0f}ms"
+        
+        send_telegram_message(chat_id, text, parse_mode='Markdown')
+        
+    except Exception as e:
+        logger.error(f"❌ Query error: {e}")
+        send_telegram_message(chat_id, f"❌ Error en consulta: {str(e)}")
+
+@router.prefix('simular', 'whatif', rate_class='search')
+def handle_whatif_command(chat_id, args):
+    """Simulación what-if: simular team=growth : confianza -20%"""
+    from snapshot import get_snapshot
+    from whatif import simulate, parse_whatif_command
+    from reports import render_whatif
+    
+    if not args:
+        send_telegram_message(chat_id, """🧪 **Simulador what-if**
+
+`simular <filtro> : <ajustes>` re-rankea el portfolio sin modificar NocoDB:
+• `simular team=growth : confianza -20%`
+• `simular portal=admin : effort*2`
+• `simular status in active : reach+10%, impact*1.5`
+• `simular confianza -10%` (todo el portfolio)
+
+**Ajustes:** reach/alcance, impact/impacto, confidence/confianza, effort/esfuerzo con `*factor` o `±N%`
+**Filtro:** misma sintaxis que `consulta`""")
+        return
+    
+    try:
+        data, version = get_snapshot()
+        if not data.get("success"):
+            send_telegram_message(chat_id, f"❌ Error: {data.get('error')}")
+            return
+        
+        filter_query, adjustments = parse_whatif_command(args)
+        result = simulate(data.get("data", []), filter_query, adjustments, version)
+        if not result.get("success"):
+            send_telegram_message(chat_id, f"❌ {result.get('error')}\n\nEscribe `simular` para ver la sintaxis.")
+            return
+        if not result["affected"]:
+            send_telegram_message(chat_id, f"🧪 **Ninguna iniciativa cumple:** `{filter_query}`")
+            return
+        
+        send_telegram_message(chat_id, render_whatif(result), parse_mode='Markdown')
+        
+    except Exception as e:
+        logger.error(f"❌ What-if error: {e}")
+        send_telegram_message(chat_id, f"❌ Error en simulación: {str(e)}")
+
+@router.prefix('planificar', rate_class='search')
+def handle_plan_command(chat_id, args):
+    """Plan de sprint por capacidad: planificar growth=3 product=2"""
+    from snapshot import get_snapshot
+    from sprint_planner import plan_sprints, parse_plan_command
+    from reports import render_sprint_plan
+    
+    try:
+        capacity = parse_plan_command(args)
+    except ValueError:
+        send_telegram_message(chat_id, f"""🗓️ **Planificador de sprint**
+
+Elige entre Backlog y Prioritized lo que maximiza el score RICE sin exceder la capacidad (en sprints):
+• `planificar growth=3 product=2` - Capacidad por equipo
+• `planificar 2` - Misma capacidad para todos los equipos
+• `planificar` - {SPRINT_PLANNER_CONFIG['default_team_capacity']:g} sprints por equipo
+
+Las iniciativas marcadas must-have 📌 entran siempre.""")
+        return
+    
+    try:
+        data, version = get_snapshot()
+        if not data.get("success"):
+            send_telegram_message(chat_id, f"❌ Error: {data.get('error')}")
+            return
+        
+        result = plan_sprints(data.get("data", []), capacity, version=version)
+        if not result.get("success"):
+            send_telegram_message(chat_id, f"❌ {result.get('error')}")
+            return
+        
+        send_telegram_message(chat_id, render_sprint_plan(result), parse_mode='Markdown')
+        
+    except Exception as e:
+        logger.error(f"❌ Sprint plan error: {e}")
+        send_telegram_message(chat_id, f"❌ Error en planificación: {str(e)}")
+
 # ===== FUNCIONES DEL COMANDO "crear" =====
 
+@router.command('crear', 'nueva', rate_class='create', takes=('chat_id', 'user_id'))
 def handle_create_command(chat_id, user_id):
     """Iniciar proceso de creación de iniciativa - 8 pasos"""
     logger.info(f"📱 Create command from chat {chat_id}, user {user_id}")
     
     try:
         # Inicializar estado del usuario
-        user_states[user_id] = {
-            'state': 'creating_initiative',
-            'step': 1,
-            'data': {}
-        }
+        conversation_states.start(user_id, 'creating_initiative')
         
         text = """🆕 **CREAR NUEVA INICIATIVA** 🎯
 
@@ -675,6 +762,7 @@ def handle_create_command(chat_id, user_id):
 • Sé específico en nombre y descripción
 • Las métricas RICE determinan la prioridad
 • Puedes cancelar escribiendo "cancelar"
+• Mientras tanto, los comandos con argumentos van con / (ej. /buscar API)
 
 **➡️ PASO 1/8: Nombre de la Iniciativa**
 Escribe un nombre claro y descriptivo (máximo 255 caracteres):
@@ -687,25 +775,25 @@ Escribe un nombre claro y descriptivo (máximo 255 caracteres):
         logger.error(f"❌ Error starting create command: {e}")
         send_telegram_message(chat_id, f"❌ Error iniciando creación: {str(e)}")
 
-def handle_text_message(chat_id, user_id, text):
+def handle_text_message(chat_id, user_id, text, user_state=None):
     """Manejar mensajes de texto en estado de creación"""
     try:
-        if user_id not in user_states:
-            # Usuario no está en proceso de creación
+        if user_state is None:
+            user_state = conversation_states.get(user_id)
+        if user_state is None:
+            # Usuario no está en proceso de creación (o el flujo expiró)
             handle_natural_message_fast(chat_id, text.lower())
             return
         
-        user_state = user_states[user_id]
-        
         if user_state['state'] != 'creating_initiative':
             # Estado no válido
-            del user_states[user_id]
+            conversation_states.end(user_id)
             handle_natural_message_fast(chat_id, text.lower())
             return
         
         # Verificar comando de cancelación
         if text.lower().strip() in ['cancelar', 'cancel', 'salir', 'exit']:
-            del user_states[user_id]
+            conversation_states.end(user_id)
             send_telegram_message(chat_id, "❌ **Creación cancelada.**\n\n💡 Usa `crear` para intentar nuevamente.")
             return
         
@@ -727,18 +815,28 @@ def handle_text_message(chat_id, user_id, text):
         elif step == 7:
             handle_step_7_rice(chat_id, user_id, text)
         elif step == 8:
-            handle_step_8_confirmation(chat_id, user_id, text)
+            handle_step_8_confirmation(chat_id, user_id, text, user_state['data'])
+        elif step == WIZARD_CREATING_STEP:
+            send_telegram_message(chat_id, "⏳ **La iniciativa se está creando.** Espera la confirmación.")
         else:
             # Estado inválido, resetear
-            del user_states[user_id]
+            conversation_states.end(user_id)
             send_telegram_message(chat_id, "❌ **Estado inválido.** Proceso reiniciado.\n\nUsa `crear` para comenzar nuevamente.")
             
     except Exception as e:
         logger.error(f"❌ Error handling text message: {e}")
-        if user_id in user_states:
-            del user_states[user_id]
+        conversation_states.end(user_id)
         send_telegram_message(chat_id, f"❌ Error procesando mensaje: {str(e)}\n\nUsa `crear` para intentar nuevamente.")
 
+# Paso transitorio mientras se crea la iniciativa: reclamar la sesión (8 -> 9) evita que dos
+# "confirmar" seguidos o un reintento de Telegram (en cualquier worker) la creen dos veces
+WIZARD_CREATING_STEP = 9
+
+def send_wizard_session_lost(chat_id):
+    """El flujo expiró o ya avanzó con otro mensaje: no se guardó la respuesta"""
+    send_telegram_message(chat_id, "⌛ **La sesión de creación expiró o ya avanzó con otro mensaje.** "
+                                   "Esta respuesta no se guardó.\n\nUsa `crear` para comenzar nuevamente.")
+
 def handle_step_1_name(chat_id, user_id, text):
     """PASO 1: Nombre de la iniciativa"""
     try:
@@ -754,8 +852,10 @@ def handle_step_1_name(chat_id, user_id, text):
             return
         
         # Guardar y continuar
-        user_states[user_id]['data']['initiative_name'] = name
-        user_states[user_id]['step'] = 2
+        if conversation_states.update(user_id, {'initiative_name': name}, step=2, expected_step=1) is None:
+            send_wizard_session_lost(chat_id)
+            return
+        duplicate_warning = render_duplicate_warning(find_duplicates(name))
         
         text_response = f"""✅ **Nombre guardado:** {name}
 
@@ -763,6 +863,8 @@ def handle_step_1_name(chat_id, user_id, text):
 Describe qué hace esta iniciativa, por qué es importante y cómo impacta el negocio (máximo {MAX_DESCRIPTION} caracteres):
 
 *Ejemplo: "Implementar integración con PSE y tarjetas de crédito para mejorar la conversión de checkout en el portal de droguerías. Reducirá abandono del carrito y aumentará GMV."*"""
+        if duplicate_warning:
+            text_response = f"{duplicate_warning}\n\n{text_response}"
         
         send_telegram_message(chat_id, text_response, parse_mode='Markdown')
         
@@ -785,8 +887,9 @@ def handle_step_2_description(chat_id, user_id, text):
             return
         
         # Guardar y continuar
-        user_states[user_id]['data']['description'] = description
-        user_states[user_id]['step'] = 3
+        if conversation_states.update(user_id, {'description': description}, step=3, expected_step=2) is None:
+            send_wizard_session_lost(chat_id)
+            return
         
         text_response = f"""✅ **Descripción guardada:** {description[:100]}{'...' if len(description) > 100 else ''}
 
@@ -816,8 +919,9 @@ def handle_step_3_owner(chat_id, user_id, text):
             return
         
         # Guardar y continuar
-        user_states[user_id]['data']['owner'] = owner
-        user_states[user_id]['step'] = 4
+        if conversation_states.update(user_id, {'owner': owner}, step=4, expected_step=3) is None:
+            send_wizard_session_lost(chat_id)
+            return
         
         teams_text = "• " + "\n• ".join(VALID_TEAMS)
         
@@ -853,8 +957,9 @@ Escribe exactamente uno de los equipos listados:""", parse_mode='Markdown')
             return
         
         # Guardar y continuar
-        user_states[user_id]['data']['team'] = team
-        user_states[user_id]['step'] = 5
+        if conversation_states.update(user_id, {'team': team}, step=5, expected_step=4) is None:
+            send_wizard_session_lost(chat_id)
+            return
         
         portals_text = "• " + "\n• ".join(VALID_PORTALS)
         
@@ -890,8 +995,9 @@ Escribe exactamente uno de los portales listados:""", parse_mode='Markdown')
             return
         
         # Guardar y continuar
-        user_states[user_id]['data']['portal'] = portal
-        user_states[user_id]['step'] = 6
+        if conversation_states.update(user_id, {'portal': portal}, step=6, expected_step=5) is None:
+            send_wizard_session_lost(chat_id)
+            return
         
         text_response = f"""✅ **Portal guardado:** {portal}
 
@@ -925,10 +1031,9 @@ def handle_step_6_kpi(chat_id, user_id, text):
             kpi = kpi_input
         
         # Guardar KPI (puede ser None)
-        if kpi:
-            user_states[user_id]['data']['main_kpi'] = kpi
-        
-        user_states[user_id]['step'] = 7
+        if conversation_states.update(user_id, {'main_kpi': kpi} if kpi else None, step=7, expected_step=6) is None:
+            send_wizard_session_lost(chat_id)
+            return
         
         kpi_text = kpi if kpi else "Ninguno"
         
@@ -1009,53 +1114,21 @@ Intenta nuevamente:""", parse_mode='Markdown')
             score = (reach * impact * confidence) / effort
             
             # Guardar métricas
-            user_states[user_id]['data'].update({
+            state = conversation_states.update(user_id, {
                 'reach': reach,
                 'impact': impact,
                 'confidence': confidence,
                 'effort': effort
-            })
-            
-            user_states[user_id]['step'] = 8
-            
-            # Determinar prioridad
-            if score >= 2.0:
-                priority = "🔥 **ALTA PRIORIDAD** - Ejecutar inmediatamente"
-                priority_class = "alta"
-            elif score >= 1.0:
-                priority = "⭐ **MEDIA PRIORIDAD** - Próximos sprints"
-                priority_class = "media"
-            else:
-                priority = "📋 **BAJA PRIORIDAD** - Re-evaluar necesidad"
-                priority_class = "baja"
+            }, step=8, expected_step=7)
+            if state is None:
+                send_wizard_session_lost(chat_id)
+                return
             
-            # Resumen completo
-            data = user_states[user_id]['data']
-            
-            text_response = f"""✅ **Métricas RICE calculadas:**
-
-📊 **Score RICE: {score:.3f}** - {priority}
-
-**📋 RESUMEN COMPLETO:**
-• **Nombre:** {data['initiative_name']}
-• **Responsable:** {data['owner']}
-• **Equipo:** {data['team']}
-• **Portal:** {data['portal']}
-• **KPI:** {data.get('main_kpi', 'Ninguno')}
-
-**📏 Métricas:**
-• **Alcance:** {reach_pct}% de usuarios
-• **Impacto:** {impact}/3 ({"Bajo" if impact == 1 else "Medio" if impact == 2 else "Alto"})
-• **Confianza:** {confidence_pct}% 
-• **Esfuerzo:** {effort} sprints
-
-**📊 Score = ({reach_pct}% × {impact} × {confidence_pct}%) ÷ {effort} = {score:.3f}**
-
-**➡️ PASO 8/8: Confirmación**
-¿Todo está correcto? Escribe:
-• **"confirmar"** - Crear la iniciativa
-• **"cancelar"** - Cancelar proceso
-• **"editar"** - Corregir datos"""
+            text_response = render_wizard_summary(state['data'], score, reach_pct, impact, confidence_pct, effort)
+            duplicate_warning = render_duplicate_warning(
+                find_duplicates(state['data'].get('initiative_name'), state['data'].get('description')))
+            if duplicate_warning:
+                text_response = f"{text_response}\n\n{duplicate_warning}"
             
             send_telegram_message(chat_id, text_response, parse_mode='Markdown')
             
@@ -1074,14 +1147,22 @@ Intenta nuevamente:""", parse_mode='Markdown')
         logger.error(f"❌ Step 7 error: {e}")
         send_telegram_message(chat_id, f"❌ Error en paso 7: {str(e)}")
 
-def handle_step_8_confirmation(chat_id, user_id, text):
+def handle_step_8_confirmation(chat_id, user_id, text, data=None):
     """PASO 8: Confirmación final"""
     try:
         command = text.strip().lower()
         
         if command in ['confirmar', 'confirm', 'sí', 'si', 'yes', 'ok']:
-            # Crear la iniciativa
-            data = user_states[user_id]['data']
+            # Reclamar la sesión antes de crear: solo un mensaje pasa de 8 a WIZARD_CREATING_STEP
+            state = conversation_states.update(user_id, step=WIZARD_CREATING_STEP, expected_step=8)
+            if state is None:
+                current = conversation_states.get(user_id)
+                if current is not None and current.get('step') == WIZARD_CREATING_STEP:
+                    send_telegram_message(chat_id, "⏳ **La iniciativa ya se está creando.** Espera la confirmación.")
+                else:
+                    send_wizard_session_lost(chat_id)
+                return
+            data = state['data']
             
             send_telegram_message(chat_id, "⚡ **Creando iniciativa...** Esto puede tardar unos segundos.")
             
@@ -1091,34 +1172,12 @@ def handle_step_8_confirmation(chat_id, user_id, text):
             if result.get('success'):
                 # Calcular score para mostrar
                 score = calculate_score_fast(data)
-                priority_emoji = get_priority_emoji_safe(score)
-                
-                success_text = f"""✅ **¡INICIATIVA CREADA EXITOSAMENTE!** 🎉
-
-{priority_emoji} **{data['initiative_name']}**
-📊 **Score RICE:** {score:.3f}
-
-**Datos guardados:**
-👤 **Responsable:** {data['owner']}
-👥 **Equipo:** {data['team']}  
-🖥️ **Portal:** {data['portal']}
-📈 **KPI:** {data.get('main_kpi', 'Ninguno')}
-
-**Métricas RICE:**
-• Alcance: {data['reach']*100:.0f}%
-• Impacto: {data['impact']}/3
-• Confianza: {data['confidence']*100:.0f}%
-• Esfuerzo: {data['effort']} sprints
-
-**🚀 Próximos pasos:**
-• Aparecerá en lista principal: `iniciativas`
-• Incluida en análisis AI: `analizar`
-• Buscar por equipo: `buscar {data['team']}`"""
+                success_text = render_creation_success(data, score)
                 
                 send_telegram_message(chat_id, success_text, parse_mode='Markdown')
                 
                 # Limpiar estado
-                del user_states[user_id]
+                conversation_states.end(user_id)
                 
             else:
                 error_msg = result.get('error', 'Error desconocido')
@@ -1136,11 +1195,13 @@ def handle_step_8_confirmation(chat_id, user_id, text):
                 error_text += "\n• **'cancelar'** - Cancelar proceso"
                 error_text += "\n• **'confirmar'** - Reintentar creación"
                 
+                # Liberar la sesión para poder reintentar
+                conversation_states.update(user_id, step=8, expected_step=WIZARD_CREATING_STEP)
                 send_telegram_message(chat_id, error_text, parse_mode='Markdown')
                 
         elif command in ['cancelar', 'cancel', 'no']:
             # Cancelar proceso
-            del user_states[user_id]
+            conversation_states.end(user_id)
             send_telegram_message(chat_id, """❌ **Proceso cancelado.**
 
 💾 **Datos no guardados.** La iniciativa no fue creada.
@@ -1149,7 +1210,7 @@ def handle_step_8_confirmation(chat_id, user_id, text):
             
         elif command in ['editar', 'edit', 'corregir']:
             # Opción de edición (simplificada - volver al inicio)
-            del user_states[user_id]
+            conversation_states.end(user_id)
             send_telegram_message(chat_id, """📝 **Edición solicitada.**
 
 🔄 **Proceso reiniciado.** Tendrás que ingresar todos los datos nuevamente.
@@ -1169,62 +1230,47 @@ Escribe una de las opciones:""", parse_mode='Markdown')
             
     except Exception as e:
         logger.error(f"❌ Step 8 error: {e}")
-        if user_id in user_states:
-            del user_states[user_id]
+        conversation_states.end(user_id)
         send_telegram_message(chat_id, f"❌ Error en confirmación: {str(e)}\n\nProceso cancelado. Usa `crear` para intentar nuevamente.")
 
 # ===== FUNCIONES AUXILIARES ADICIONALES =====
 
 def get_priority_emoji_safe(score):
     """Obtener emoji de prioridad de forma segura"""
-    try:
-        score_val = float(score) if score else 0
-        if score_val >= 2.0:
-            return "🔥"  # Alta prioridad
-        elif score_val >= 1.0:
-            return "⭐"  # Media prioridad
-        else:
-            return "📋"  # Baja prioridad
-    except:
-        return "📋"
+    return priority_emoji(score)
 
 def handle_filter_by_status(chat_id, status):
-    """Filtrar iniciativas por estado"""
+    """Filtrar iniciativas por estado (ranking del snapshot, paginado con botones)"""
     try:
-        send_telegram_message(chat_id, f"⏳ **Filtrando por estado:** {status}")
+        status_name = status.title()
+        if status_name not in VALID_STATUSES:
+            send_telegram_message(chat_id, f"❌ Error: Estados inválidos. Válidos: {VALID_STATUSES}")
+            return
         
-        from database import get_initiatives_by_status
-        data = get_initiatives_by_status([status.title()])
+        data, version = get_snapshot()
         
         if not data.get("success"):
             send_telegram_message(chat_id, f"❌ Error: {data.get('error')}")
             return
         
-        initiatives = data.get("data", [])
+        initiatives, _ = get_ranked_view(data.get("data", []), 'score', True, [status_name], version)
         
         if not initiatives:
             send_telegram_message(chat_id, f"📭 **No hay iniciativas con estado:** {status}")
             return
         
-        text = f"📊 **INICIATIVAS - {status.upper()}** ({len(initiatives)} encontradas)\n\n"
-        
-        for i, init in enumerate(initiatives[:10], 1):
-            try:
-                formatted = format_initiative_summary_safe(init, i)
-                text += f"{formatted}\n\n"
-            except Exception as e:
-                logger.warning(f"Error formatting initiative {i}: {e}")
-                continue
-        
-        if len(initiatives) > 10:
-            text += f"📌 **{len(initiatives) - 10} iniciativas más...** Usa `buscar` para filtrar."
-        
-        send_telegram_message(chat_id, text, parse_mode='Markdown')
+        text, keyboard = result_pages.publish(f"📊 **INICIATIVAS - {status.upper()}**", initiatives, version,
+                                              format_initiative_summary_safe)
+        send_telegram_message(chat_id, text, parse_mode='Markdown', reply_markup=keyboard)
         
     except Exception as e:
         logger.error(f"❌ Filter by status error: {e}")
         send_telegram_message(chat_id, f"❌ Error filtrando: {str(e)}")
 
+for _status, _aliases in BOT_STATUS_COMMANDS.items():
+    router.add_command(_status, partial(handle_filter_by_status, status=_status), _aliases)
+
+@router.command('estados', 'status', 'comandos')
 def handle_status_info(chat_id):
     """Mostrar información de estados disponibles"""
     text = """📋 **ESTADOS DE INICIATIVAS** - Flujo Real
@@ -0,0 +1,231 @@
+# 🧭 bot_router.py - Router Compilado de Comandos del Bot (tabla exacta, prefijos, Aho-Corasick) v2.6
+import logging
+import threading
+from collections import deque
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# Con pocas palabras clave, N búsquedas de substring en C ordenadas por prioridad son más rápidas
+# que recorrer el texto carácter a carácter en Python; el autómata gana desde ~decenas de palabras
+AUTOMATON_MIN_KEYWORDS = 64
+
+class Route:
+    """Comando registrado: nombre canónico (etiqueta de métricas), handler y clase de rate limit"""
+
+    __slots__ = ('name', 'handler', 'rate_class', 'takes')
+
+    def __init__(self, name, handler, rate_class='api', takes=('chat_id',)):
+        self.name = name
+        self.handler = handler
+        self.rate_class = rate_class
+        self.takes = takes
+
+    def __call__(self, chat_id, user_id=None, args="", text="", **extra):
+        update = {'chat_id': chat_id, 'user_id': user_id, 'args': args, 'text': text, **extra}
+        return self.handler(*(update[field] for field in self.takes))
+
+class KeywordAutomaton:
+    """Autómata Aho-Corasick: encuentra en una sola pasada qué palabras clave aparecen en el texto.
+
+    Cada palabra tiene la prioridad de su intent (orden de registro); match() devuelve la
+    de menor prioridad entre todas las que aparecen, igual que la cadena `any(...) elif ...`.
+    Con menos de AUTOMATON_MIN_KEYWORDS palabras compile() elige un escaneo ordenado por prioridad.
+    """
+
+    def __init__(self):
+        self.keywords = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]  # menor prioridad que termina en el nodo (incluye sufijos vía fail)
+        self.delta = [{}]
+        self.ordered = ()
+        self.strategy = 'scan'
+        self.compiled = False
+
+    def add(self, keyword, priority):
+        self.keywords.append((keyword.lower(), priority))
+        self.compiled = False
+
+    def compile(self, strategy=None):
+        self.ordered = tuple(sorted(self.keywords, key=lambda item: item[1]))
+        self.strategy = strategy or ('automaton' if len(self.keywords) >= AUTOMATON_MIN_KEYWORDS else 'scan')
+        self.goto, self.fail, self.best = [{}], [0], [None]
+        for keyword, priority in self.keywords:
+            node = 0
+            for char in keyword:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = nxt
+            if self.best[node] is None or priority < self.best[node]:
+                self.best[node] = priority
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                if node:
+                    state = self.fail[node]
+                    while state and char not in self.goto[state]:
+                        state = self.fail[state]
+                    self.fail[child] = self.goto[state].get(char, 0)
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited < self.best[child]):
+                    self.best[child] = inherited
+
+        # Transiciones completas (DFA): cada carácter es un solo dict.get, sin seguir enlaces fail
+        self.delta = [None] * len(self.goto)
+        self.delta[0] = dict(self.goto[0])
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            transitions = dict(self.delta[self.fail[node]])
+            transitions.update(self.goto[node])
+            self.delta[node] = transitions
+            queue.extend(self.goto[node].values())
+        self.compiled = True
+
+    def match(self, text):
+        """Prioridad ganadora entre las palabras clave contenidas en text (None si ninguna)"""
+        if self.strategy == 'scan':
+            # La primera palabra encontrada en orden de prioridad es la ganadora
+            for keyword, priority in self.ordered:
+                if keyword in text:
+                    return priority
+            return None
+        delta, best = self.delta, self.best
+        node, winner = 0, None
+        for char in text:
+            node = delta[node].get(char, 0)
+            found = best[node]
+            if found is not None and (winner is None or found < winner):
+                winner = found
+                if winner == 0:
+                    break
+        return winner
+
+class CommandRouter:
+    """Router construido una vez: comandos exactos (dict), comandos con argumentos (mapa de
+    prefijos por primera palabra), intents de lenguaje natural (autómata de palabras clave)
+    y callback_query de botones inline (prefijo de callback_data antes de ':').
+
+    Los handlers se registran con decoradores; la tabla se compila en el primer dispatch.
+    """
+
+    def __init__(self):
+        self.exact = {}
+        self.prefixes = {}
+        self.intents = []
+        self.callbacks = {}
+        self.automaton = KeywordAutomaton()
+        self._compiled = False
+        self._lock = threading.Lock()
+
+    def _add(self, table, aliases, route):
+        for alias in aliases:
+            alias = alias.lower()
+            for key in (alias, f"/{alias}"):
+                if key in table and table[key] is not route:
+                    logger.warning(f"⚠️ Bot command '{key}' re-registered for {route.name}")
+                table[key] = route
+        self._compiled = False
+
+    def command(self, name, *aliases, rate_class='api', takes=('chat_id',)):
+        """Decorador: comando exacto (`name` y sus alias, con o sin '/')"""
+        def decorator(handler):
+            self.add_command(name, handler, aliases, rate_class, takes)
+            return handler
+        return decorator
+
+    def add_command(self, name, handler, aliases=(), rate_class='api', takes=('chat_id',)):
+        self._add(self.exact, (name,) + tuple(aliases), Route(name, handler, rate_class, takes))
+
+    def prefix(self, name, *aliases, rate_class='api', takes=('chat_id', 'args')):
+        """Decorador: comando con argumentos ('buscar <término>'); también responde sin argumentos"""
+        def decorator(handler):
+            self._add(self.prefixes, (name,) + tuple(aliases), Route(name, handler, rate_class, takes))
+            return handler
+        return decorator
+
+    def callback(self, prefix, rate_class='api', takes=('callback', 'args')):
+        """Decorador: handler de callback_query cuyo callback_data empieza por '<prefix>:'"""
+        def decorator(handler):
+            self.callbacks[prefix] = Route(f"callback:{prefix}", handler, rate_class, takes)
+            return handler
+        return decorator
+
+    def resolve_callback(self, data):
+        """(route, resto del callback_data) o (None, None)"""
+        prefix, _, args = (data or '').partition(':')
+        route = self.callbacks.get(prefix)
+        return (route, args) if route is not None else (None, None)
+
+    def intent(self, keywords, name='natural', takes=('chat_id',)):
+        """Decorador: intent de lenguaje natural; gana el registrado primero si coinciden varios"""
+        def decorator(handler):
+            self.add_intent(keywords, handler, name, takes)
+            return handler
+        return decorator
+
+    def add_intent(self, keywords, handler, name='natural', takes=('chat_id',)):
+        priority = len(self.intents)
+        self.intents.append(Route(name, handler, 'api', takes))
+        for keyword in keywords:
+            self.automaton.add(keyword, priority)
+        self._compiled = False
+
+    def compile(self):
+        with self._lock:
+            if not self._compiled:
+                self.automaton.compile()
+                self._compiled = True
+                logger.info(f"✅ Bot router compiled: {len(self.exact)} exact, {len(self.prefixes)} prefix, "
+                            f"{len(self.intents)} intents, {len(self.callbacks)} callbacks")
+
+    def resolve(self, text, in_wizard=False):
+        """(route, argumentos) del comando para text ya normalizado; (None, None) si no es un comando.
+
+        Con un asistente activo los comandos con argumentos exigen '/': 'plan de fidelización'
+        o 'consulta médica virtual' son respuestas del asistente, no comandos.
+        """
+        route = self.exact.get(text)
+        if route is not None:
+            return route, ""
+        head, _, args = text.partition(' ')
+        if in_wizard and not head.startswith('/'):
+            return None, None
+        route = self.prefixes.get(head)
+        if route is not None:
+            return route, args.strip()
+        return None, None
+
+    def resolve_intent(self, text):
+        if not self._compiled:
+            self.compile()
+        priority = self.automaton.match(text)
+        return self.intents[priority] if priority is not None else None
+
+    def dispatch(self, chat_id, user_id, text, in_wizard=False):
+        """Ejecutar el comando que corresponde a text; False si no hay comando (wizard o lenguaje natural)"""
+        route, args = self.resolve(text, in_wizard)
+        if route is None:
+            return False
+        route(chat_id, user_id, args, text)
+        return True
+
+    def dispatch_intent(self, chat_id, text):
+        route = self.resolve_intent(text)
+        if route is None:
+            return False
+        route(chat_id, text=text)
+        return True
+
+    def command_names(self):
+        routes = list(self.exact.values()) + list(self.prefixes.values()) + list(self.callbacks.values())
+        return {route.name for route in routes}
@@ -0,0 +1,283 @@
+# 📦 bulk_io.py - Importación y Exportación Masiva de Iniciativas (CSV / NDJSON) v2.6
+import csv
+import io
+import json
+import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import *
+from database import validate_initiative_data, build_nocodb_record, create_initiatives_bulk
+from tracing import span
+from metrics import IMPORT_BATCHES_PENDING
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+def detect_import_format(content_type, filename=None, requested=None):
+    """Formato de importación según ?format=, extensión del archivo o Content-Type"""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in IMPORT_FORMATS else None
+
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+
+    content_type = (content_type or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonlines' in content_type or 'json' in content_type:
+        return 'ndjson'
+    return None
+
+def iter_import_rows(binary_stream, fmt):
+    """Leer filas una a una desde el stream: yield (número de fila, dict | None, error | None)"""
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for row_number, row in enumerate(reader, start=1):
+            # Normalizar encabezados (" Initiative_Name " -> "initiative_name")
+            yield row_number, {(k or '').strip().lower(): v for k, v in row.items() if k}, None
+        return
+
+    row_number = 0
+    for line in text_stream:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield row_number, record, None
+
+def import_initiatives(binary_stream, fmt, dry_run=False, batch_size=None, max_concurrency=None):
+    """Importar iniciativas en lotes bulk con concurrencia acotada.
+
+    Cada fila pasa por validate_initiative_data; las válidas se agrupan en lotes de
+    batch_size y se envían a NocoDB con a lo sumo max_concurrency lotes en vuelo.
+    El cache se invalida una sola vez al final.
+    """
+    batch_size = batch_size or BULK_IMPORT_CONFIG['batch_size']
+    max_concurrency = max_concurrency or BULK_IMPORT_CONFIG['max_concurrency']
+    max_errors = BULK_IMPORT_CONFIG['max_reported_errors']
+    start_time = time.time()
+
+    summary = {
+        "success": True,
+        "dry_run": dry_run,
+        "total_rows": 0,
+        "valid": 0,
+        "created": 0,
+        "failed": 0,
+        "batches": 0,
+        "truncated": False,
+        "created_ids": [],
+        "errors": []
+    }
+
+    def add_error(row_number, errors):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": row_number, "errors": errors})
+
+    def collect(future):
+        row_numbers, result = future.result()
+        if result.get("success"):
+            summary["created"] += len(row_numbers)
+            created = result.get("data")
+            if isinstance(created, list):
+                summary["created_ids"].extend(r.get("id") for r in created if isinstance(r, dict))
+        else:
+            for row_number in row_numbers:
+                add_error(row_number, [f"Error al insertar lote: {result.get('error')}"])
+
+    def insert_batch(batch):
+        row_numbers = [row_number for row_number, _ in batch]
+        return row_numbers, create_initiatives_bulk([record for _, record in batch])
+
+    try:
+        with span('bulk_import', format=fmt), ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = set()
+            batch = []
+
+            def submit(batch):
+                # Concurrencia acotada: esperar a que termine un lote antes de enviar otro
+                while len(pending) >= max_concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        collect(future)
+                future = executor.submit(insert_batch, batch)
+                IMPORT_BATCHES_PENDING.inc()
+                future.add_done_callback(lambda _: IMPORT_BATCHES_PENDING.dec())
+                pending.add(future)
+                summary["batches"] += 1
+
+            try:
+                for row_number, record, parse_error in iter_import_rows(binary_stream, fmt):
+                    if row_number > BULK_IMPORT_CONFIG['max_rows']:
+                        summary["truncated"] = True
+                        break
+                    summary["total_rows"] = row_number
+
+                    if parse_error:
+                        add_error(row_number, [parse_error])
+                        continue
+
+                    validation = validate_initiative_data(record)
+                    if not validation["valid"]:
+                        add_error(row_number, validation["errors"])
+                        continue
+
+                    summary["valid"] += 1
+                    if dry_run:
+                        continue
+
+                    batch.append((row_number, build_nocodb_record(validation["data"])))
+                    if len(batch) >= batch_size:
+                        submit(batch)
+                        batch = []
+
+                if batch:
+                    submit(batch)
+            finally:
+                # También si la lectura falla a mitad: los lotes ya enviados se insertan igual y deben contarse
+                for future in pending:
+                    try:
+                        collect(future)
+                    except Exception as e:
+                        logger.error(f"❌ Bulk import batch error: {e}")
+                        summary["success"] = False
+                        summary.setdefault("error", str(e))
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"❌ Import parse error: {e}")
+        summary["success"] = False
+        summary["error"] = f"Archivo inválido: {e}"
+
+    except Exception as e:
+        logger.error(f"❌ Bulk import error: {e}")
+        summary["success"] = False
+        summary["error"] = str(e)
+
+    if summary["created"]:
+        # Una sola invalidación por importación
+        initiatives_cache["timestamp"] = 0
+
+    summary["duration_ms"] = round((time.time() - start_time) * 1000, 2)
+    logger.info(f"✅ Bulk import: {summary['created']} created, {summary['failed']} failed "
+                f"of {summary['total_rows']} rows in {summary['batches']} batches ({summary['duration_ms']}ms)")
+    return summary
+
+# ===== EXPORTACIÓN EN STREAMING =====
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Campos exportables en orden de columna (calculated_score se omite: es igual a score)
+EXPORT_FIELDS = ['id', 'initiative_name', 'description', 'owner', 'team', 'portal', 'main_kpi',
+                 'reach', 'impact', 'confidence', 'effort', 'status', 'must_have', 'score']
+
+def parse_export_fields(raw_fields):
+    """Proyección ?fields=a,b,c -> (campos, campos inválidos)"""
+    if not raw_fields:
+        return list(EXPORT_FIELDS), []
+    requested = [f.strip() for f in raw_fields.split(',') if f.strip()]
+    invalid = [f for f in requested if f not in EXPORT_FIELDS]
+    return [f for f in requested if f in EXPORT_FIELDS], invalid
+
+def iter_ndjson_rows(records, fields):
+    """Una línea JSON por registro, codificada de a una (sin construir la lista completa)"""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for record in records:
+        yield (encoder.encode({f: record.get(f) for f in fields}) + '\n').encode('utf-8')
+
+def iter_csv_rows(records, fields):
+    """Encabezado + una fila CSV por registro reutilizando un único buffer"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for record in records:
+        writer.writerow([record.get(f) for f in fields])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_chunks(byte_rows, chunk_bytes=None):
+    """Agrupar filas pequeñas en chunks de ~chunk_bytes para no escribir al socket fila a fila"""
+    chunk_bytes = chunk_bytes or EXPORT_CONFIG['chunk_bytes']
+    pending = []
+    size = 0
+    for row in byte_rows:
+        pending.append(row)
+        size += len(row)
+        if size >= chunk_bytes:
+            yield b''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield b''.join(pending)
+
+def iter_gzip(chunks, level=None):
+    """Comprimir en streaming (formato gzip: wbits=31)"""
+    compressor = zlib.compressobj(level or EXPORT_CONFIG['gzip_level'], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def iter_ndjson_error_tail(byte_rows, failure):
+    """Si la fuente falla a mitad del export NDJSON, cerrar con una línea {"_error": ...} en vez de cortar en silencio"""
+    count = 0
+    try:
+        for row in byte_rows:
+            count += 1
+            yield row
+    except Exception as e:
+        failure.update(error=str(e), rows=count)
+        yield (json.dumps({"_error": str(e), "_exported_rows": count}, ensure_ascii=False) + '\n').encode('utf-8')
+
+def generate_export(records, fmt, fields, compress=False):
+    """Generador de bytes del export completo; memoria constante respecto al tamaño de la tabla.
+
+    Un fallo a mitad no puede cambiar el status (los headers ya salieron con 200): en NDJSON
+    se agrega una última línea de error; en CSV se relanza para que el servidor corte la
+    respuesta chunked sin el chunk final y el cliente vea la transferencia incompleta.
+    """
+    failure = {}
+    if fmt == 'csv':
+        rows = iter_csv_rows(records, fields)
+    else:
+        rows = iter_ndjson_error_tail(iter_ndjson_rows(records, fields), failure)
+    chunks = iter_chunks(rows)
+    if compress:
+        chunks = iter_gzip(chunks)
+
+    exported = 0
+    try:
+        for chunk in chunks:
+            exported += len(chunk)
+            yield chunk
+    except Exception as e:
+        logger.error(f"❌ Export aborted after {exported} bytes: {e}")
+        raise
+    if failure:
+        logger.error(f"❌ Export {fmt} truncated after {failure['rows']} rows: {failure['error']}")
+    else:
+        logger.info(f"✅ Export {fmt} finished: {exported} bytes{' (gzip)' if compress else ''}")
@@ -1,6 +1,7 @@
 # 🔧 config.py - Configuración Central v2.6 - FIXED & SECURE
 import os
 import logging
+import tempfile
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -37,7 +38,9 @@ else:
 initiatives_cache = {
     "data": None, 
     "timestamp": 0, 
-    "ttl": 300  # 5 minutos - reducido para datos más frescos
+    "ttl": 300,  # 5 minutos - reducido para datos más frescos
+    "complete": False,  # True si el snapshot contiene todas las filas de la tabla
+    "version": 0  # Se incrementa cada vez que cambia el snapshot (claves de vistas derivadas)
 }
 
 # ===== CONFIGURACIÓN VALIDACIÓN =====
@@ -111,6 +114,22 @@ RETRY_CONFIG = {
     'backoff_factor': 2.0 # Exponential backoff factor
 }
 
+# ===== CONFIGURACIÓN CIRCUIT BREAKER =====
+CIRCUIT_BREAKER_CONFIG = {
+    'failure_threshold': 5,    # Fallos consecutivos antes de abrir el circuito
+    'recovery_timeout': 30.0,  # Segundos en estado abierto antes de probar (half-open)
+    'half_open_max_calls': 1   # Llamadas de prueba permitidas en half-open
+}
+
+# ===== TIMEOUTS ADAPTATIVOS (basados en p95 observado) =====
+ADAPTIVE_TIMEOUT_CONFIG = {
+    'enabled': True,
+    'window_size': 100,     # Latencias recientes por dependencia
+    'min_samples': 20,      # Muestras mínimas antes de adaptar
+    'p95_multiplier': 2.0,  # Timeout = p95 * multiplier
+    'min_timeout': 2.0      # Nunca bajar de este valor (segundos)
+}
+
 # ===== HEALTH CHECK ENDPOINTS =====
 HEALTH_CHECKS = {
     'nocodb': True,
@@ -205,6 +224,7 @@ TELEGRAM_COMMANDS = {
     'create': ['crear', 'nueva', 'nuevo'],
     'analyze': ['analizar', 'análisis'],
     'search': ['buscar', 'encontrar'],
+    'query': ['consulta', 'filtrar'],
     
     # Status filters
     'pending': ['pending', 'pendiente', 'pendientes'],
@@ -222,7 +242,11 @@ API_ENDPOINTS = {
     'initiatives': '/api/initiatives',
     'statistics': '/api/initiatives/statistics', 
     'search': '/api/initiatives/search',
+    'query': '/api/initiatives/query',
+    'top': '/api/initiatives/top',
     'create': '/api/create',
+    'import': '/api/initiatives/import',
+    'export': '/api/initiatives/export',
     'analyze': '/ai/analyze-initiatives',
     'health': '/health',
     'webhook_setup': '/setup-webhook'
@@ -281,12 +305,149 @@ MONITORING_METRICS = {
     }
 }
 
+# ===== MÉTRICAS (/metrics formato Prometheus) =====
+METRICS_CONFIG = {
+    'enabled': True,
+    # Buckets de latencia en segundos
+    'latency_buckets': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0]
+}
+
+# ===== TRACING Y PROFILING =====
+TRACE_CONFIG = {
+    'enabled': os.environ.get('TRACING_ENABLED', 'true').lower() != 'false',
+    'buffer_size': 200,            # Traces recientes guardados (ring buffer)
+    'slow_trace_ms': 2000,         # Loggear desglose de spans por encima de este valor
+    'profiler_enabled': os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true',
+    'profiler_interval': 0.005,    # Segundos entre muestras del profiler
+    'admin_token': os.environ.get('ADMIN_TOKEN')  # Requerido para /admin/*
+}
+
 # ===== RATE LIMITING =====
 RATE_LIMITS = {
     'api_requests_per_minute': 60,
     'ai_analysis_per_hour': 10,
     'search_queries_per_minute': 30,
-    'initiative_creation_per_hour': 5
+    'initiative_creation_per_hour': 5,
+    'bulk_imports_per_hour': 5
+}
+
+# Clase de endpoint -> (límite en RATE_LIMITS, ventana en segundos)
+RATE_LIMIT_CLASSES = {
+    'api': ('api_requests_per_minute', 60),
+    'ai': ('ai_analysis_per_hour', 3600),
+    'search': ('search_queries_per_minute', 60),
+    'create': ('initiative_creation_per_hour', 3600),
+    'import': ('bulk_imports_per_hour', 3600)
+}
+
+RATE_LIMIT_CONFIG = {
+    'enabled': os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'false',
+    'backend': os.environ.get('RATE_LIMIT_BACKEND', 'sqlite'),  # sqlite (compartido entre workers) | memory
+    'db_path': os.environ.get('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'saludia_rate_limits.db')),
+    'cleanup_interval': 300,  # Segundos entre limpiezas de buckets inactivos
+    'trusted_proxies': int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1'))  # Proxies propios delante (Render: 1)
+}
+
+# ===== IMPORTACIÓN MASIVA =====
+BULK_IMPORT_CONFIG = {
+    'batch_size': int(os.environ.get('BULK_IMPORT_BATCH_SIZE', '100')),     # Registros por llamada bulk a NocoDB
+    'max_concurrency': int(os.environ.get('BULK_IMPORT_CONCURRENCY', '3')),  # Lotes en vuelo simultáneamente
+    'max_rows': 5000,                # Filas máximas por importación
+    'max_reported_errors': 200       # Errores por fila incluidos en la respuesta
+}
+
+# ===== EXPORTACIÓN EN STREAMING =====
+EXPORT_CONFIG = {
+    'nocodb_page_size': 1000,   # Registros por página al leer directo de NocoDB
+    'chunk_bytes': 64 * 1024,   # Tamaño de los chunks enviados al cliente
+    'gzip_level': 6
+}
+
+# ===== SERIALIZACIÓN JSON =====
+SERIALIZATION_CONFIG = {
+    'json_backend': os.environ.get('JSON_BACKEND', 'auto')  # auto (orjson si está instalado) | orjson | stdlib
+}
+
+# ===== CACHE DE RESPUESTAS HTTP =====
+RESPONSE_CACHE_CONFIG = {
+    'enabled': os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false',
+    'max_bytes': int(os.environ.get('RESPONSE_CACHE_MAX_MB', '32')) * 1024 * 1024,  # Presupuesto de memoria
+    'gzip_min_bytes': 1024,  # No comprimir respuestas pequeñas
+    'gzip_level': 6
+}
+
+# ===== ESTADO DE CONVERSACIONES (asistente "crear") =====
+CONVERSATION_STATE_CONFIG = {
+    'backend': os.environ.get('CONVERSATION_STATE_BACKEND', 'sqlite'),  # sqlite (compartido entre workers) | memory
+    'db_path': os.environ.get('CONVERSATION_STATE_DB', os.path.join(tempfile.gettempdir(), 'saludia_conversations.db')),
+    'ttl_seconds': int(os.environ.get('CONVERSATION_TTL_SECONDS', '1800')),  # Flujos abandonados expiran
+    'max_sessions': 10000,     # Límite LRU del backend en memoria
+    'sweep_interval': 300      # Segundos entre barridos de sesiones expiradas
+}
+
+# ===== PAGINACIÓN DE RESULTADOS EN EL BOT (botones inline) =====
+RESULT_PAGES_CONFIG = {
+    'page_size': MAX_RESULTS_LIST,   # Iniciativas por página
+    'ttl_seconds': int(os.environ.get('RESULT_PAGES_TTL_SECONDS', '3600')),  # Vida del handle de resultados
+    'callback_prefix': 'pg'          # callback_data = "pg:<handle>:<página>" (máx. 64 bytes)
+}
+
+# ===== HISTORIAL DEL PORTFOLIO (tendencias) =====
+HISTORY_CONFIG = {
+    'enabled': os.environ.get('HISTORY_ENABLED', 'true').lower() == 'true',
+    'db_path': os.environ.get('HISTORY_DB', os.path.join(tempfile.gettempdir(), 'saludia_history.db')),
+    'default_days': 90,          # Rango de /api/history/trends sin from/to
+    'max_transitions': 5000      # Límite de filas de /api/history/transitions
+}
+
+# ===== ANALÍTICA DEL FLUJO DE ESTADOS =====
+WORKFLOW_CONFIG = {
+    'cycle_start': 'Sprint',       # El cycle time empieza al entrar a esta etapa (o una posterior)
+    'cycle_end': 'Production',     # ... y termina al llegar a esta
+}
+
+# ===== SIMULADOR WHAT-IF =====
+WHATIF_CONFIG = {
+    'max_scenarios': 50,           # Escenarios por request en /api/whatif
+    'default_top': 10,             # Top-K del ranking simulado
+    'max_top': 100,
+    'movers_limit': 20,            # Iniciativas que más cambian de posición
+}
+
+# ===== PLANIFICADOR DE SPRINTS (knapsack) =====
+SPRINT_PLANNER_CONFIG = {
+    'candidate_statuses': ['Backlog', 'Prioritized'],
+    'default_team_capacity': 2.0,  # Sprints por equipo si no se indica capacidad
+    'effort_resolution': 0.1,      # El esfuerzo se discretiza en pasos de 0.1 sprint
+    'bnb_node_limit': 200_000,     # Nodos del branch-and-bound antes de recurrir a la DP
+    'dp_cell_limit': 3_000_000,    # n·C máximo para la DP exacta (~1 s); si no, mejor solución encontrada
+}
+
+# ===== DETECCIÓN DE DUPLICADOS (MinHash/LSH) =====
+DUPLICATES_CONFIG = {
+    'shingle_size': 4,             # k-gramas de caracteres
+    'num_perm': 64,                # Bins de la firma MinHash
+    'bands': 16,                   # Bandas LSH (64/16 = 4 filas: umbral efectivo ≈ 0.5)
+    'name_threshold': 0.6,         # Jaccard mínimo comparando solo nombres
+    'full_threshold': 0.5,         # Jaccard mínimo con nombre + descripción
+    'max_matches': 3,              # Avisos por iniciativa en el asistente
+    'max_candidates': 64,          # Candidatos LSH verificados con Jaccard exacto por consulta
+    'max_clusters': 100,           # Clusters por respuesta en /api/initiatives/duplicates
+}
+
+# ===== ESTADÍSTICAS EN PARALELO (pool de procesos) =====
+PARALLEL_STATS_CONFIG = {
+    'enabled': os.environ.get('PARALLEL_STATS_ENABLED', 'false').lower() == 'true',
+    'workers': int(os.environ.get('PARALLEL_STATS_WORKERS', str(min(os.cpu_count() or 1, 4)))),
+    'min_rows': int(os.environ.get('PARALLEL_STATS_MIN_ROWS', '50000')),  # Por debajo se agrega en serie
+    'min_shard_rows': 5000,        # Shards más chicos no compensan el pickling
+    'start_method': 'forkserver',  # Seguro con los threads de Flask (fork no lo es)
+}
+
+# ===== INGESTA EN STREAMING (páginas NocoDB) =====
+NOCODB_STREAMING_CONFIG = {
+    'enabled': os.environ.get('NOCODB_STREAMING', 'true').lower() == 'true',  # false = response.json() completo
+    'chunk_bytes': 256 * 1024,  # Lectura del body por chunks; cada registro se normaliza al llegar
 }
 
 # Log successful configuration
@@ -336,7 +497,10 @@ def get_config_summary():
                 "telegram": TELEGRAM_TIMEOUT
             },
             "cache_ttl": initiatives_cache["ttl"],
-            "retry_config": RETRY_CONFIG
+            "retry_config": RETRY_CONFIG,
+            "circuit_breaker": CIRCUIT_BREAKER_CONFIG,
+            "rate_limits": RATE_LIMITS,
+            "adaptive_timeouts": ADAPTIVE_TIMEOUT_CONFIG
         },
         "business_context": SALUDIA_CONTEXT,
         "rice_config": RICE_CONFIG,
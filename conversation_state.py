@@ -0,0 +1,244 @@
+# 💬 conversation_state.py - Estado de Conversaciones del Bot (memoria LRU+TTL o SQLite compartido) v2.6
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import *
+
+logger = logging.getLogger(__name__)
+
+def _merge_state(state, changes=None, step=None):
+    """Aplicar cambios de datos y paso sobre una copia del estado"""
+    state = copy.deepcopy(state)
+    if changes:
+        state.setdefault('data', {}).update(changes)
+    if step is not None:
+        state['step'] = step
+    return state
+
+class MemoryConversationBackend:
+    """Sesiones en memoria del proceso: LRU acotado con expiración por inactividad (solo un worker)"""
+
+    def __init__(self, ttl, max_sessions):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()  # user_id -> (estado, expira)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.last_sweep = time.time()
+
+    def get(self, user_id):
+        now = time.time()
+        with self._lock:
+            item = self.sessions.get(user_id)
+            if item is None:
+                return None
+            if item[1] <= now:
+                del self.sessions[user_id]
+                return None
+            self.sessions.move_to_end(user_id)
+            return copy.deepcopy(item[0])
+
+    def set(self, user_id, state):
+        now = time.time()
+        with self._lock:
+            self.sessions[user_id] = (copy.deepcopy(state), now + self.ttl)
+            self.sessions.move_to_end(user_id)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.evictions += 1
+            if now - self.last_sweep > CONVERSATION_STATE_CONFIG['sweep_interval']:
+                self._sweep(now)
+
+    def update(self, user_id, changes=None, step=None, expected_step=None):
+        now = time.time()
+        with self._lock:
+            item = self.sessions.get(user_id)
+            if item is None or item[1] <= now:
+                self.sessions.pop(user_id, None)
+                return None
+            if expected_step is not None and item[0].get('step') != expected_step:
+                return None
+            state = _merge_state(item[0], changes, step)
+            self.sessions[user_id] = (state, now + self.ttl)
+            self.sessions.move_to_end(user_id)
+            return copy.deepcopy(state)
+
+    def delete(self, user_id):
+        with self._lock:
+            return self.sessions.pop(user_id, None) is not None
+
+    def _sweep(self, now):
+        expired = [user_id for user_id, (_, expires) in self.sessions.items() if expires <= now]
+        for user_id in expired:
+            del self.sessions[user_id]
+        self.last_sweep = now
+        return len(expired)
+
+    def sweep(self):
+        with self._lock:
+            return self._sweep(time.time())
+
+    def count(self):
+        now = time.time()
+        with self._lock:
+            return sum(1 for _, expires in self.sessions.values() if expires > now)
+
+    def reset(self):
+        with self._lock:
+            self.sessions.clear()
+
+class SQLiteConversationBackend:
+    """Sesiones en un archivo SQLite local compartido por todos los workers de gunicorn.
+
+    Cada actualización es leer-modificar-escribir dentro de BEGIN IMMEDIATE, así dos mensajes
+    del mismo usuario en workers distintos no se pisan los pasos del asistente.
+    """
+
+    def __init__(self, db_path, ttl, table='conversations'):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.table = table
+        self._local = threading.local()
+        self.last_sweep = time.time()
+        conn = self._connect()
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (user_id TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table} (expires)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._connect().execute(f"SELECT state FROM {self.table} WHERE user_id = ? AND expires > ?",
+                                      (user_id, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, user_id, state):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(f"INSERT OR REPLACE INTO {self.table} (user_id, state, expires) VALUES (?, ?, ?)",
+                     (user_id, json.dumps(state, ensure_ascii=False), now + self.ttl))
+        if now - self.last_sweep > CONVERSATION_STATE_CONFIG['sweep_interval']:
+            self._sweep(now)
+
+    def update(self, user_id, changes=None, step=None, expected_step=None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if expected_step is None:
+                row = conn.execute(f"SELECT state FROM {self.table} WHERE user_id = ? AND expires > ?",
+                                   (user_id, now)).fetchone()
+            else:
+                row = conn.execute(f"SELECT state FROM {self.table} WHERE user_id = ? AND expires > ? "
+                                   f"AND json_extract(state, '$.step') = ?", (user_id, now, expected_step)).fetchone()
+            state = None
+            if row:
+                state = _merge_state(json.loads(row[0]), changes, step)
+                conn.execute(f"UPDATE {self.table} SET state = ?, expires = ? WHERE user_id = ?",
+                             (json.dumps(state, ensure_ascii=False), now + self.ttl, user_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return state
+
+    def delete(self, user_id):
+        return self._connect().execute(f"DELETE FROM {self.table} WHERE user_id = ?", (user_id,)).rowcount > 0
+
+    def _sweep(self, now):
+        self.last_sweep = now
+        return self._connect().execute(f"DELETE FROM {self.table} WHERE expires <= ?", (now,)).rowcount
+
+    def sweep(self):
+        return self._sweep(time.time())
+
+    def count(self):
+        return self._connect().execute(f"SELECT COUNT(*) FROM {self.table} WHERE expires > ?", (time.time(),)).fetchone()[0]
+
+    def reset(self):
+        self._connect().execute(f"DELETE FROM {self.table}")
+
+def create_backend(name=None, table='conversations', ttl=None):
+    """Backend configurado; si SQLite no está disponible se usa memoria"""
+    name = name or CONVERSATION_STATE_CONFIG['backend']
+    ttl = ttl or CONVERSATION_STATE_CONFIG['ttl_seconds']
+    if name == 'sqlite':
+        try:
+            backend = SQLiteConversationBackend(CONVERSATION_STATE_CONFIG['db_path'], ttl, table)
+            logger.info(f"✅ {table} using shared store {CONVERSATION_STATE_CONFIG['db_path']}")
+            return backend
+        except Exception as e:
+            logger.warning(f"⚠️ SQLite conversation store unavailable ({e}) - using memory")
+    return MemoryConversationBackend(ttl, CONVERSATION_STATE_CONFIG['max_sessions'])
+
+class ConversationStore:
+    """Fachada del asistente: las claves son user_id de Telegram y los estados dicts JSON-serializables"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend()
+        return self._backend
+
+    def get(self, user_id):
+        """Estado actual (copia) o None si no hay flujo activo o expiró"""
+        return self.backend.get(str(user_id))
+
+    def start(self, user_id, state, step=1):
+        """Iniciar (o reiniciar) un flujo"""
+        state = {'state': state, 'step': step, 'data': {}}
+        self.backend.set(str(user_id), state)
+        return state
+
+    def update(self, user_id, changes=None, step=None, expected_step=None):
+        """Actualización atómica: combina changes en data y fija step.
+
+        Con expected_step es un compare-and-set: solo aplica si el flujo sigue en ese paso.
+        None si el flujo ya no existe, expiró o está en otro paso (otro mensaje ganó).
+        """
+        return self.backend.update(str(user_id), changes, step, expected_step)
+
+    def end(self, user_id):
+        return self.backend.delete(str(user_id))
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def sweep(self):
+        """Eliminar sesiones expiradas; devuelve cuántas"""
+        removed = self.backend.sweep()
+        if removed:
+            logger.info(f"🧹 Swept {removed} expired conversations")
+        return removed
+
+    def active_count(self):
+        try:
+            return self.backend.count()
+        except Exception as e:
+            logger.warning(f"⚠️ Conversation count failed: {e}")
+            return 0
+
+    def get_status(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "active_sessions": self.active_count(),
+            "ttl_seconds": CONVERSATION_STATE_CONFIG['ttl_seconds']
+        }
+
+conversation_states = ConversationStore()
@@ -3,9 +3,35 @@ import requests
 import logging
 import time
 from config import *
+from resilience import guarded_request, guarded_stream, CircuitOpenError
+from metrics import registry, CACHE_REQUESTS
+from tracing import span, profile_hotpath
+from record_schema import initiative_schema
+from json_stream import ArrayStream
 
 logger = logging.getLogger(__name__)
 
+registry.gauge('saludia_cache_size', 'Iniciativas en el cache',
+               callback=lambda: len(initiatives_cache["data"] or []))
+registry.gauge('saludia_cache_age_seconds', 'Antigüedad del snapshot cacheado',
+               callback=lambda: round(time.time() - initiatives_cache["timestamp"], 3) if initiatives_cache["timestamp"] else 0)
+
+# Callbacks notificados al reemplazar el snapshot: fn(anterior, nuevo, versión)
+_refresh_listeners = []
+
+def register_refresh_listener(callback):
+    """Registrar un callback para mantener estructuras derivadas al día (índices incrementales)"""
+    if callback not in _refresh_listeners:
+        _refresh_listeners.append(callback)
+    return callback
+
+def notify_refresh(previous, current, version):
+    for callback in list(_refresh_listeners):
+        try:
+            callback(previous, current, version)
+        except Exception as e:
+            logger.warning(f"⚠️ Refresh listener {getattr(callback, '__name__', callback)} failed: {e}")
+
 def safe_get_value(obj, key, default=None, value_type=str):
     """Safely get value from object with type conversion"""
     try:
@@ -31,6 +57,56 @@ def safe_get_value(obj, key, default=None, value_type=str):
         logger.warning(f"Error getting {key}: {e}")
         return default
 
+def process_initiative_records(initiatives):
+    """Normalizar registros crudos de NocoDB y calcular score RICE (una pasada por registro).
+
+    Acepta cualquier iterable: una lista o un ArrayStream que va parseando el body.
+    """
+    return initiative_schema.normalize_rows(initiatives)
+
+def fetch_records_page(url, headers, params):
+    """GET de una página de NocoDB -> (response, registros procesados, filas crudas, demás miembros del JSON).
+
+    Con NOCODB_STREAMING_CONFIG['enabled'] la lista se parsea del stream y cada registro se normaliza
+    al llegar: nunca están en memoria a la vez el body completo, la lista cruda y la procesada.
+    La descarga completa queda dentro del circuit breaker y el timeout (guarded_stream).
+    Registros None si el status no es 200.
+    """
+    if not NOCODB_STREAMING_CONFIG['enabled']:
+        response = guarded_request('nocodb', 'GET', url, headers=headers, params=params)
+        if response.status_code != 200:
+            return response, None, 0, {}
+        data = response.json()
+        page = data.pop('list', None) or []
+        return response, process_initiative_records(page), len(page), data
+
+    def consume(chunks):
+        stream = ArrayStream(chunks, 'list')
+        return process_initiative_records(stream), stream.count, stream.meta
+
+    response, result = guarded_stream('nocodb', 'GET', url, consume, headers=headers, params=params,
+                                      chunk_size=NOCODB_STREAMING_CONFIG['chunk_bytes'])
+    if result is None:
+        return response, None, 0, {}
+    return (response,) + result
+
+def fetch_remaining_pages(url, headers, params, offset, total_count):
+    """Leer y procesar las páginas restantes de NocoDB a partir de offset (carga completa del snapshot)"""
+    page_size = params['limit']
+    records = []
+    while offset < total_count:
+        page_params = dict(params, offset=offset)
+        with span('nocodb_fetch', offset=offset):
+            response, page, rows, _ = fetch_records_page(url, headers, page_params)
+        if page is None:
+            raise RuntimeError(f"NocoDB HTTP {response.status_code} at offset {offset}")
+        records.extend(page)
+        if rows < page_size:
+            break
+        offset += page_size
+    return records
+
+@profile_hotpath('get_cached_initiatives')
 def get_cached_initiatives(limit=None, offset=None, status_filter=None):
     """Obtener iniciativas con cache, paginación y filtros optimizado - FIXED VERSION"""
     current_time = time.time()
@@ -39,11 +115,17 @@ def get_cached_initiatives(limit=None, offset=None, status_filter=None):
     use_cache = (limit is None and offset is None and status_filter is None)
     
     # Verificar cache solo para requests completos
-    if (use_cache and initiatives_cache["data"] is not None and 
-        current_time - initiatives_cache["timestamp"] < initiatives_cache["ttl"]):
+    with span('cache_lookup'):
+        cache_fresh = (use_cache and initiatives_cache["data"] is not None and 
+                       current_time - initiatives_cache["timestamp"] < initiatives_cache["ttl"])
+    if cache_fresh:
         logger.info("✅ Using cached initiatives data")
+        CACHE_REQUESTS.inc('initiatives', 'hit')
         return {"success": True, "data": initiatives_cache["data"], "cached": True, "total": len(initiatives_cache["data"])}
     
+    # Cada lookup se cuenta una sola vez al final: miss, o stale si termina sirviendo el cache expirado
+    lookup = 'miss'
+    
     # Fetch fresh data with timeout protection
     try:
         if not NOCODB_BASE_URL or not NOCODB_TABLE_ID or not NOCODB_TOKEN:
@@ -60,70 +142,36 @@ def get_cached_initiatives(limit=None, offset=None, status_filter=None):
             params['offset'] = offset
             
         # FIX: Filtro por status usando sintaxis correcta de NocoDB con URL encoding
-        if status_filter:
-            if isinstance(status_filter, list):
-                if len(status_filter) == 1:
-                    # Un solo estado - URL encoded
-                    params['where'] = f"(status,eq,{status_filter[0]})"
-                else:
-                    # Múltiples estados - usar OR con paréntesis
-                    conditions = []
-                    for status in status_filter:
-                        conditions.append(f"(status,eq,{status})")
-                    params['where'] = "(" + ",or,".join(conditions) + ")"
-            else:
-                # Para un solo estado
-                params['where'] = f"(status,eq,{status_filter})"
+        where = build_status_where(status_filter)
+        if where:
+            params['where'] = where
         
         logger.info(f"🔍 NocoDB Query: {url} with params: {params}")
         
-        # REQUEST WITH SHORTER TIMEOUT TO AVOID HANGING
-        response = requests.get(url, headers=headers, params=params, timeout=NOCODB_TIMEOUT)
+        # Circuit breaker + timeout adaptativo (p95) para no colgar al usuario
+        # Parseo y normalización registro a registro mientras llega el body (ver fetch_records_page)
+        with span('nocodb_fetch'):
+            response, processed_initiatives, rows, data = fetch_records_page(url, headers, params)
         
         logger.info(f"📡 NocoDB Response: {response.status_code}")
         
         if response.status_code == 200:
-            data = response.json()
-            initiatives = data.get('list', [])
-            total_count = data.get('pageInfo', {}).get('totalRows', len(initiatives))
+            total_count = (data.get('pageInfo') or {}).get('totalRows', rows)
             
-            # Process initiatives safely to avoid None.strip() errors
-            processed_initiatives = []
-            for init in initiatives:
-                try:
-                    if not isinstance(init, dict):
-                        continue
-                        
-                    processed_init = {
-                        'id': safe_get_value(init, 'id', 0, int),
-                        'initiative_name': safe_get_value(init, 'initiative_name', 'Sin nombre', str),
-                        'description': safe_get_value(init, 'description', 'Sin descripción', str),
-                        'owner': safe_get_value(init, 'owner', 'Sin owner', str),
-                        'team': safe_get_value(init, 'team', 'Sin equipo', str),
-                        'portal': safe_get_value(init, 'portal', 'Sin portal', str),
-                        'main_kpi': safe_get_value(init, 'main_kpi', 'Sin KPI', str),
-                        'reach': safe_get_value(init, 'reach', 0.0, float),
-                        'impact': safe_get_value(init, 'impact', 1, int),
-                        'confidence': safe_get_value(init, 'confidence', 0.0, float),
-                        'effort': safe_get_value(init, 'effort', 1.0, float),
-                        'status': safe_get_value(init, 'status', 'Pending', str),
-                        'must_have': safe_get_value(init, 'must_have', False, bool)
-                    }
-                    
-                    # Calculate RICE score safely
-                    processed_init['score'] = calculate_score_fast(processed_init)
-                    processed_init['calculated_score'] = processed_init['score']
-                    
-                    processed_initiatives.append(processed_init)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing initiative {init}: {e}")
-                    continue
+            # El snapshot del cache debe contener la tabla completa (ranking global)
+            if use_cache and params['limit'] <= rows < total_count:
+                remaining = fetch_remaining_pages(url, headers, params, rows, total_count)
+                rows += len(remaining)
+                processed_initiatives = processed_initiatives + remaining
             
             # Actualizar cache solo para requests completos sin filtros
             if use_cache:
+                previous_snapshot = initiatives_cache["data"]
                 initiatives_cache["data"] = processed_initiatives
                 initiatives_cache["timestamp"] = current_time
+                initiatives_cache["complete"] = rows >= total_count
+                initiatives_cache["version"] += 1
+                notify_refresh(previous_snapshot, processed_initiatives, initiatives_cache["version"])
                 logger.info(f"✅ Retrieved {len(processed_initiatives)} initiatives from NocoDB (fresh, cached)")
             else:
                 logger.info(f"✅ Retrieved {len(processed_initiatives)} initiatives from NocoDB (fresh, filtered)")
@@ -143,14 +191,25 @@ def get_cached_initiatives(limit=None, offset=None, status_filter=None):
             # Fallback a cache solo para requests completos
             if use_cache and initiatives_cache["data"] is not None:
                 logger.info("⚠️ Using expired cache due to API error")
+                lookup = 'stale'
                 return {"success": True, "data": initiatives_cache["data"], "cached": True, "total": len(initiatives_cache["data"])}
             return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
             
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ {e}")
+        # Fail fast: servir cache (aunque esté expirado) sin esperar a NocoDB
+        if use_cache and initiatives_cache["data"] is not None:
+            logger.info("⚠️ Using expired cache due to open circuit")
+            lookup = 'stale'
+            return {"success": True, "data": initiatives_cache["data"], "cached": True, "total": len(initiatives_cache["data"])}
+        return {"success": False, "error": "NocoDB no disponible temporalmente", "circuit_open": True, "retry_after": round(e.retry_after, 1)}
+        
     except requests.exceptions.Timeout:
         logger.error("❌ NocoDB request timeout")
         # Fallback a cache expirado solo para requests completos
         if use_cache and initiatives_cache["data"] is not None:
             logger.info("⚠️ Using expired cache due to timeout")
+            lookup = 'stale'
             return {"success": True, "data": initiatives_cache["data"], "cached": True, "total": len(initiatives_cache["data"])}
         return {"success": False, "error": "Request timeout"}
         
@@ -159,8 +218,49 @@ def get_cached_initiatives(limit=None, offset=None, status_filter=None):
         # Fallback a cache expirado solo para requests completos
         if use_cache and initiatives_cache["data"] is not None:
             logger.info("⚠️ Using expired cache due to exception")
+            lookup = 'stale'
             return {"success": True, "data": initiatives_cache["data"], "cached": True, "total": len(initiatives_cache["data"])}
         return {"success": False, "error": str(e)}
+    
+    finally:
+        if use_cache:
+            CACHE_REQUESTS.inc('initiatives', lookup)
+
+def build_status_where(status_filter):
+    """Cláusula where de NocoDB para uno o varios estados"""
+    if not status_filter:
+        return None
+    if isinstance(status_filter, list):
+        if len(status_filter) == 1:
+            return f"(status,eq,{status_filter[0]})"
+        return "(" + ",or,".join(f"(status,eq,{status})" for status in status_filter) + ")"
+    return f"(status,eq,{status_filter})"
+
+def iter_nocodb_records(status_filter=None, page_size=None):
+    """Recorrer la tabla completa página a página: yield de registros ya procesados.
+
+    Solo una página vive en memoria a la vez; lanza la excepción si NocoDB falla a mitad.
+    """
+    page_size = page_size or EXPORT_CONFIG['nocodb_page_size']
+    url = f"{NOCODB_BASE_URL}/tables/{NOCODB_TABLE_ID}/records"
+    headers = {'accept': 'application/json', 'xc-token': NOCODB_TOKEN}
+    params = {'limit': page_size, 'offset': 0}
+    where = build_status_where(status_filter)
+    if where:
+        params['where'] = where
+    
+    while True:
+        with span('nocodb_fetch', offset=params['offset']):
+            response, page, rows, data = fetch_records_page(url, headers, params)
+        if page is None:
+            raise RuntimeError(f"NocoDB HTTP {response.status_code}")
+        
+        for record in page:
+            yield record
+        
+        if rows < page_size or (data.get('pageInfo') or {}).get('isLastPage', False):
+            break
+        params['offset'] += page_size
 
 # Alias para compatibilidad - ahora soporta parámetros con timeout
 def get_initiatives(limit=None, offset=None, status_filter=None):
@@ -177,7 +277,10 @@ def calculate_score_fast(initiative):
         if not initiative or not isinstance(initiative, dict):
             return 0.0
             
-        # Si ya tiene score, usarlo
+        # Si ya tiene score, usarlo (los registros normalizados lo traen como float)
+        existing_score = initiative.get('score')
+        if existing_score.__class__ is float and existing_score > 0:
+            return existing_score
         existing_score = safe_get_value(initiative, 'score', None, float)
         if existing_score is not None and existing_score > 0:
             return existing_score
@@ -322,6 +425,60 @@ def validate_initiative_data(data):
         logger.error(f"❌ Validation error: {e}")
         return {"valid": False, "errors": [f"Error de validación: {str(e)}"]}
 
+def get_nocodb_write_headers():
+    """Headers para escrituras en NocoDB"""
+    return {
+        'accept': 'application/json',
+        'xc-token': NOCODB_TOKEN,
+        'Content-Type': 'application/json'
+    }
+
+def build_nocodb_record(validated_data):
+    """Preparar datos validados para NocoDB de forma segura"""
+    nocodb_data = {
+        "initiative_name": safe_get_value(validated_data, "initiative_name", "", str),
+        "description": safe_get_value(validated_data, "description", "", str),
+        "portal": safe_get_value(validated_data, "portal", "", str),
+        "owner": safe_get_value(validated_data, "owner", "", str),
+        "team": safe_get_value(validated_data, "team", "", str),
+        "reach": safe_get_value(validated_data, "reach", 0.0, float),
+        "impact": safe_get_value(validated_data, "impact", 1, int),
+        "confidence": safe_get_value(validated_data, "confidence", 0.0, float),
+        "effort": safe_get_value(validated_data, "effort", 1.0, float),
+        "must_have": safe_get_value(validated_data, "must_have", False, bool)
+    }
+    
+    if validated_data.get("main_kpi"):
+        nocodb_data["main_kpi"] = safe_get_value(validated_data, "main_kpi", "", str)
+    
+    return nocodb_data
+
+def create_initiatives_bulk(records):
+    """Insertar un lote de registros ya validados en una sola llamada (bulk) a NocoDB.
+
+    No invalida el cache: el llamador lo hace una sola vez al terminar la importación.
+    """
+    try:
+        url = f"{NOCODB_BASE_URL}/tables/{NOCODB_TABLE_ID}/records"
+        response = guarded_request('nocodb', 'POST', url, headers=get_nocodb_write_headers(), json=records)
+        
+        if response.status_code in [200, 201]:
+            return {"success": True, "data": response.json()}
+        logger.error(f"❌ Bulk create failed HTTP {response.status_code}")
+        return {"success": False, "error": f"HTTP {response.status_code}"}
+        
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ Bulk create rejected: {e}")
+        return {"success": False, "error": "NocoDB no disponible temporalmente", "circuit_open": True, "retry_after": round(e.retry_after, 1)}
+        
+    except requests.exceptions.Timeout:
+        logger.error("❌ Bulk create timeout")
+        return {"success": False, "error": "Request timeout"}
+        
+    except Exception as e:
+        logger.error(f"❌ Error in bulk create: {e}")
+        return {"success": False, "error": str(e)}
+
 def create_initiative(data):
     """Crear iniciativa optimizada con timeout"""
     try:
@@ -335,33 +492,12 @@ def create_initiative(data):
             }
         
         validated_data = validation_result["data"]
-        
-        # Preparar datos para NocoDB de forma segura
-        nocodb_data = {
-            "initiative_name": safe_get_value(validated_data, "initiative_name", "", str),
-            "description": safe_get_value(validated_data, "description", "", str),
-            "portal": safe_get_value(validated_data, "portal", "", str),
-            "owner": safe_get_value(validated_data, "owner", "", str),
-            "team": safe_get_value(validated_data, "team", "", str),
-            "reach": safe_get_value(validated_data, "reach", 0.0, float),
-            "impact": safe_get_value(validated_data, "impact", 1, int),
-            "confidence": safe_get_value(validated_data, "confidence", 0.0, float),
-            "effort": safe_get_value(validated_data, "effort", 1.0, float),
-            "must_have": safe_get_value(validated_data, "must_have", False, bool)
-        }
-        
-        if validated_data.get("main_kpi"):
-            nocodb_data["main_kpi"] = safe_get_value(validated_data, "main_kpi", "", str)
+        nocodb_data = build_nocodb_record(validated_data)
         
         url = f"{NOCODB_BASE_URL}/tables/{NOCODB_TABLE_ID}/records"
-        headers = {
-            'accept': 'application/json',
-            'xc-token': NOCODB_TOKEN,
-            'Content-Type': 'application/json'
-        }
         
-        # Request with timeout
-        response = requests.post(url, headers=headers, json=nocodb_data, timeout=NOCODB_TIMEOUT)
+        # Request protegido por circuit breaker
+        response = guarded_request('nocodb', 'POST', url, headers=get_nocodb_write_headers(), json=nocodb_data)
         
         if response.status_code in [200, 201]:
             # Invalidar cache
@@ -372,6 +508,10 @@ def create_initiative(data):
             logger.error(f"❌ Create failed HTTP {response.status_code}")
             return {"success": False, "error": f"HTTP {response.status_code}"}
             
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ Create initiative rejected: {e}")
+        return {"success": False, "error": "NocoDB no disponible temporalmente", "circuit_open": True, "retry_after": round(e.retry_after, 1)}
+        
     except requests.exceptions.Timeout:
         logger.error("❌ Create initiative timeout")
         return {"success": False, "error": "Request timeout"}
@@ -481,8 +621,11 @@ def get_database_stats():
 def clear_cache():
     """Clear initiatives cache"""
     try:
+        previous_snapshot = initiatives_cache["data"]
         initiatives_cache["data"] = None
         initiatives_cache["timestamp"] = 0
+        initiatives_cache["version"] += 1
+        notify_refresh(previous_snapshot, None, initiatives_cache["version"])
         logger.info("✅ Cache cleared")
         return {"success": True}
     except Exception as e:
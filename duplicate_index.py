@@ -0,0 +1,307 @@
+# 🪞 duplicate_index.py - Índice de Duplicados (MinHash/LSH sobre nombre y descripción) v2.6
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter
+from config import *
+from database import register_refresh_listener
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('name', 'full')  # solo nombre (paso 1 del asistente) y nombre + descripción (paso 8)
+
+_DENSIFY_STEP = 1 << 40  # separa los valores prestados en la densificación de los propios del bin
+_PLACEHOLDERS = {'sin nombre', 'sin descripcion'}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def normalize_text(text):
+    """minúsculas, sin tildes, solo letras/dígitos separados por un espacio"""
+    text = unicodedata.normalize('NFKD', str(text or '').lower()).encode('ascii', 'ignore').decode('ascii')
+    text = _NON_ALNUM.sub(' ', text).strip()
+    return '' if text in _PLACEHOLDERS else text
+
+def shingles(text, size=None):
+    """Conjunto de k-gramas de caracteres del texto normalizado"""
+    size = size or DUPLICATES_CONFIG['shingle_size']
+    if not text:
+        return frozenset()
+    if len(text) <= size:
+        return frozenset((text,))
+    return frozenset(map(text.__getitem__, map(slice, range(len(text) - size + 1), range(size, len(text) + 1))))
+
+def minhash(shingle_set, num_perm=None):
+    """Firma MinHash de una sola permutación (un hash por shingle, repartido en num_perm bins).
+
+    Los bins vacíos se densifican tomando el siguiente bin no vacío (rotación), de modo que
+    dos conjuntos comparten el valor de un bin con probabilidad ≈ su similitud de Jaccard.
+    """
+    num_perm = num_perm or DUPLICATES_CONFIG['num_perm']
+    signature = [None] * num_perm
+    for h in map(hash, shingle_set):
+        slot, value = h % num_perm, h // num_perm
+        current = signature[slot]
+        if current is None or value < current:
+            signature[slot] = value
+    if None in signature and shingle_set:
+        for slot in range(num_perm):
+            if signature[slot] is None:
+                distance = 1
+                while signature[(slot + distance) % num_perm] is None:
+                    distance += 1
+                signature[slot] = signature[(slot + distance) % num_perm] + distance * _DENSIFY_STEP
+    return signature
+
+def band_keys(signature, bands=None):
+    """Claves LSH: una por banda (banda, hash de sus filas).
+
+    Las filas de una banda son bins separados (b, b+bands, ...), no consecutivos: la
+    densificación copia valores entre bins vecinos y una banda de vecinos colisionaría de más.
+    """
+    bands = bands or DUPLICATES_CONFIG['bands']
+    return list(enumerate(map(hash, zip(*(signature[row::bands] for row in range(len(signature) // bands))))))
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+def _documents(name, description=None):
+    """Textos indexados por campo; 'full' solo si hay descripción"""
+    name = normalize_text(name)
+    description = normalize_text(description) if description is not None else ''
+    return {'name': name, 'full': f"{name} {description}".strip() if description else name}
+
+class DuplicateIndex:
+    """Índice LSH de nombres y descripciones, mantenido con el diff entre snapshots.
+
+    Cada iniciativa guarda sus shingles (para verificar Jaccard exacto) y sus claves
+    de banda por campo; una consulta solo compara contra los candidatos de sus bandas.
+    """
+
+    def __init__(self):
+        self.entries = {}  # id -> {'source', 'record', 'shingles': {campo}, 'keys': {campo}}
+        self.buckets = {field: {} for field in FIELDS}  # campo -> clave de banda -> set(ids)
+        self.version = None
+        self.last_update = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _source(record):
+        return (record.get('initiative_name'), record.get('description'))
+
+    def _insert(self, initiative_id, record):
+        documents = _documents(*self._source(record))
+        entry = {'source': self._source(record), 'record': record, 'shingles': {}, 'keys': {}}
+        for field in FIELDS:
+            shingle_set = shingles(documents[field])
+            keys = band_keys(minhash(shingle_set)) if shingle_set else []
+            entry['shingles'][field] = shingle_set
+            entry['keys'][field] = keys
+            buckets = self.buckets[field]
+            for key in keys:
+                buckets.setdefault(key, set()).add(initiative_id)
+        self.entries[initiative_id] = entry
+
+    def _detach(self, initiative_id):
+        entry = self.entries.pop(initiative_id, None)
+        if entry is None:
+            return False
+        for field in FIELDS:
+            buckets = self.buckets[field]
+            for key in entry['keys'][field]:
+                members = buckets.get(key)
+                if members is not None:
+                    members.discard(initiative_id)
+                    if not members:
+                        del buckets[key]
+        return True
+
+    def rebuild(self, records, version=None):
+        with self._lock:
+            self.entries = {}
+            self.buckets = {field: {} for field in FIELDS}
+            for record in records or []:
+                if isinstance(record, dict) and record.get('id') is not None:
+                    self._insert(record['id'], record)
+            self.version = version
+            self.last_update = {"mode": "rebuild", "size": len(self.entries), "version": version}
+            return self.last_update
+
+    def upsert(self, record):
+        """Alta o actualización; solo re-indexa si cambió el nombre o la descripción"""
+        with self._lock:
+            initiative_id = record.get('id')
+            entry = self.entries.get(initiative_id)
+            if entry is not None and entry['source'] == self._source(record):
+                entry['record'] = record
+                return False
+            self._detach(initiative_id)
+            self._insert(initiative_id, record)
+            return True
+
+    def remove(self, initiative_id):
+        with self._lock:
+            return self._detach(initiative_id)
+
+    def apply_snapshot(self, records, version=None):
+        """Aplicar un snapshot nuevo como diff: solo se re-indexan textos nuevos o editados"""
+        with self._lock:
+            if records is None:
+                self.version = version
+                self.last_update = {"mode": "stale", "size": len(self.entries), "version": version}
+                return self.last_update
+            if not self.entries:
+                return self.rebuild(records, version)
+
+            seen, upserted = set(), 0
+            for record in records:
+                if not isinstance(record, dict) or record.get('id') is None:
+                    continue
+                seen.add(record['id'])
+                upserted += self.upsert(record)
+            removed = [initiative_id for initiative_id in self.entries if initiative_id not in seen]
+            for initiative_id in removed:
+                self._detach(initiative_id)
+            self.version = version
+            self.last_update = {"mode": "incremental", "upserted": upserted, "removed": len(removed),
+                                "size": len(self.entries), "version": version}
+            return self.last_update
+
+    # ===== CONSULTAS =====
+
+    def _match(self, initiative_id, similarity):
+        record = self.entries[initiative_id]['record']
+        return {
+            "id": initiative_id,
+            "initiative_name": record.get('initiative_name'),
+            "team": record.get('team'),
+            "owner": record.get('owner'),
+            "status": record.get('status'),
+            "similarity": round(similarity, 3)
+        }
+
+    def find_similar(self, name, description=None, limit=None, threshold=None, exclude_id=None):
+        """Iniciativas probablemente duplicadas de (name, description), de mayor a menor similitud.
+
+        Sin descripción se compara solo el nombre; con descripción, nombre + descripción.
+        """
+        field = 'full' if description and normalize_text(description) else 'name'
+        threshold = threshold if threshold is not None else DUPLICATES_CONFIG[f'{field}_threshold']
+        limit = limit or DUPLICATES_CONFIG['max_matches']
+        shingle_set = shingles(_documents(name, description)[field])
+        if not shingle_set:
+            return []
+
+        with self._lock:
+            # Candidatos por número de bandas compartidas: solo se verifican los max_candidates más probables
+            buckets = self.buckets[field]
+            collisions = Counter()
+            for key in band_keys(minhash(shingle_set)):
+                members = buckets.get(key)
+                if members:
+                    collisions.update(members)
+            collisions.pop(exclude_id, None)
+            matches = []
+            for initiative_id, _ in collisions.most_common(DUPLICATES_CONFIG['max_candidates']):
+                similarity = jaccard(shingle_set, self.entries[initiative_id]['shingles'][field])
+                if similarity >= threshold:
+                    matches.append((similarity, initiative_id))
+            matches.sort(key=lambda m: (-m[0], m[1]))
+            return [self._match(initiative_id, similarity) for similarity, initiative_id in matches[:limit]]
+
+    def clusters(self, field='name', threshold=None):
+        """Grupos de duplicados de todo el portfolio (union-find sobre los buckets LSH).
+
+        En cada bucket cada miembro se compara con los representantes ya vistos del bucket
+        (máximo max_candidates) hasta encontrar uno similar, en vez de comparar todos los pares;
+        un par que no se une en un bucket saturado suele coincidir en otra banda.
+        """
+        threshold = threshold if threshold is not None else DUPLICATES_CONFIG[f'{field}_threshold']
+        with self._lock:
+            parent = {}
+
+            def find(x):
+                root = x
+                while parent.get(root, root) != root:
+                    root = parent[root]
+                while parent.get(x, x) != root:
+                    parent[x], x = root, parent[x]
+                return root
+
+            entries = self.entries
+            max_anchors = DUPLICATES_CONFIG['max_candidates']
+            for members in self.buckets[field].values():
+                if len(members) < 2:
+                    continue
+                anchors = []
+                for initiative_id in sorted(members):
+                    root = find(initiative_id)
+                    shingle_set = entries[initiative_id]['shingles'][field]
+                    for anchor in anchors:
+                        if find(anchor) == root or jaccard(shingle_set, entries[anchor]['shingles'][field]) >= threshold:
+                            parent[find(anchor)] = root
+                            parent.setdefault(root, root)
+                            break
+                    else:
+                        if len(anchors) < max_anchors:
+                            anchors.append(initiative_id)
+
+            groups = {}
+            for initiative_id in parent:
+                groups.setdefault(find(initiative_id), []).append(initiative_id)
+
+            result = []
+            for members in groups.values():
+                if len(members) < 2:
+                    continue
+                members.sort()
+                representative = entries[members[0]]['shingles'][field]
+                result.append({
+                    "size": len(members),
+                    "representative": entries[members[0]]['record'].get('initiative_name'),
+                    "members": [self._match(initiative_id, jaccard(representative, entries[initiative_id]['shingles'][field]))
+                                for initiative_id in members]
+                })
+            result.sort(key=lambda c: (-c["size"], c["members"][0]["id"]))
+            return result
+
+    def get_status(self):
+        return {"size": len(self.entries), "buckets": {field: len(b) for field, b in self.buckets.items()},
+                "snapshot_version": self.version, "last_update": self.last_update}
+
+duplicate_index = DuplicateIndex()
+
+def _on_snapshot_refresh(previous, current, version):
+    duplicate_index.apply_snapshot(current, version)
+
+register_refresh_listener(_on_snapshot_refresh)
+
+def get_duplicate_index():
+    """Índice sincronizado con el snapshot cacheado (None si todavía no hay snapshot)"""
+    current = initiatives_cache["data"]
+    if current is None:
+        return None
+    if duplicate_index.version != initiatives_cache["version"]:
+        duplicate_index.apply_snapshot(current, initiatives_cache["version"])
+    return duplicate_index
+
+def get_duplicate_clusters(field='name', threshold=None):
+    """Clusters memoizados por versión del snapshot, campo y umbral"""
+    index = get_duplicate_index()
+    if index is None:
+        return []
+    return get_snapshot_view(f"duplicate_clusters:{field}:{threshold}",
+                             lambda: index.clusters(field, threshold), index.version)
+
+def find_duplicates(name, description=None, exclude_id=None):
+    """Posibles duplicados para el asistente; [] si el índice no está disponible"""
+    try:
+        index = get_duplicate_index()
+        return index.find_similar(name, description, exclude_id=exclude_id) if index is not None else []
+    except Exception as e:
+        logger.warning(f"⚠️ Duplicate check failed: {e}")
+        return []
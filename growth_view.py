@@ -0,0 +1,120 @@
+# 🚀 growth_view.py - Vista Materializada del Portfolio Growth por Snapshot v2.6
+import logging
+from config import *
+from database import calculate_score_fast, sort_initiatives_by_score
+from score_index import PRIORITY_THRESHOLDS, get_score_index
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+GROWTH_TEAM = 'Growth'
+
+def _clean(value):
+    return str(value).strip() if value is not None else ''
+
+class GrowthSegment:
+    """Iniciativas de un segmento (equipo, KPI o portal) en orden de ranking, con sus agregados"""
+
+    __slots__ = ('ranked', 'score_sum', 'buckets')
+
+    def __init__(self):
+        self.ranked = []  # (score, registro) de mayor a menor score
+        self.score_sum = 0.0
+        self.buckets = {'high': 0, 'medium': 0, 'low': 0}
+
+    def add(self, score, record):
+        self.ranked.append((score, record))
+        self.score_sum += score
+        if score >= PRIORITY_THRESHOLDS['high']:
+            self.buckets['high'] += 1
+        elif score >= PRIORITY_THRESHOLDS['medium']:
+            self.buckets['medium'] += 1
+        else:
+            self.buckets['low'] += 1
+
+    @property
+    def count(self):
+        return len(self.ranked)
+
+    @property
+    def average(self):
+        return self.score_sum / len(self.ranked) if self.ranked else 0.0
+
+    @property
+    def high_priority(self):
+        return self.buckets['high']
+
+    def top(self, k):
+        return self.ranked[:k]
+
+    def to_dict(self, total, top=3):
+        return {
+            "count": self.count,
+            "percentage": round(self.count / total * 100, 2) if total else 0,
+            "avg_score": round(self.average, 4),
+            "high_priority": self.high_priority,
+            "priority_buckets": dict(self.buckets),
+            "top": [{"id": record.get('id'), "initiative_name": record.get('initiative_name'), "score": score}
+                    for score, record in self.ranked[:top]]
+        }
+
+class GrowthView:
+    """Agregado Growth de un snapshot construido en una sola pasada sobre el ranking.
+
+    `growth` es el equipo Growth; `teams`, `kpis` y `portals` segmentan por
+    GROWTH_FOCUS_TEAMS, GROWTH_KPIS y MARKETPLACE_PORTALS (comparación sin mayúsculas).
+    """
+
+    def __init__(self, initiatives):
+        self.total = len(initiatives)
+        self.growth = GrowthSegment()
+        self.focus = GrowthSegment()  # unión de los equipos foco
+        self.teams = {team: GrowthSegment() for team in GROWTH_FOCUS_TEAMS}
+        self.kpis = {kpi: GrowthSegment() for kpi in GROWTH_KPIS}
+        self.portals = {portal: GrowthSegment() for portal in MARKETPLACE_PORTALS}
+
+        teams = {team.lower(): segment for team, segment in self.teams.items()}
+        kpis = {kpi.lower(): segment for kpi, segment in self.kpis.items()}
+        portals = {portal.lower(): segment for portal, segment in self.portals.items()}
+        growth_key = GROWTH_TEAM.lower()
+
+        for record in self._ranked(initiatives):
+            score = calculate_score_fast(record)
+            team = _clean(record.get('team')).lower()
+            segment = teams.get(team)
+            if segment is not None:
+                segment.add(score, record)
+                self.focus.add(score, record)
+            if team == growth_key:
+                self.growth.add(score, record)
+            segment = kpis.get(_clean(record.get('main_kpi')).lower())
+            if segment is not None:
+                segment.add(score, record)
+            segment = portals.get(_clean(record.get('portal')).lower())
+            if segment is not None:
+                segment.add(score, record)
+
+    @staticmethod
+    def _ranked(initiatives):
+        # Sobre el snapshot cacheado el orden sale del índice de orden estadístico (sin sort)
+        index = get_score_index(initiatives)
+        if index is not None and index.size() == len(initiatives):
+            return index.top_k(index.size())
+        return sort_initiatives_by_score(initiatives)
+
+    def to_dict(self, top=3):
+        total = self.total
+        return {
+            "total_initiatives": total,
+            "growth_team": self.growth.to_dict(total, top),
+            "focus_teams": self.focus.to_dict(total, top),
+            "by_team": {team: segment.to_dict(total, top) for team, segment in self.teams.items()},
+            "by_kpi": {kpi: segment.to_dict(total, 0) for kpi, segment in self.kpis.items()},
+            "by_portal": {portal: segment.to_dict(total, 0) for portal, segment in self.portals.items()}
+        }
+
+def get_growth_view(initiatives):
+    """Vista Growth memoizada por versión si initiatives es el snapshot cacheado; si no, se construye"""
+    if initiatives is not None and initiatives is initiatives_cache.get("data"):
+        return get_snapshot_view('growth_view', lambda: GrowthView(initiatives), initiatives_cache["version"])
+    return GrowthView(initiatives or [])
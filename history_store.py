@@ -0,0 +1,277 @@
+# 🕰️ history_store.py - Historial del Portfolio: agregados por refresh, transiciones y snapshots diarios v2.6
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from config import *
+from database import register_refresh_listener, calculate_score_fast
+from analytics import calculate_statistics_fast
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+TREND_BUCKETS = ['raw', 'day', 'week', 'month']
+
+# Campos guardados por iniciativa en el snapshot diario comprimido
+SNAPSHOT_FIELDS = ['id', 'initiative_name', 'status', 'team', 'reach', 'impact', 'confidence', 'effort']
+
+SCHEMA = [
+    # Log de refrescos (append-only): una fila por refresh registrado
+    "CREATE TABLE IF NOT EXISTS refreshes (ts REAL NOT NULL, version INTEGER, total INTEGER, metrics_changed INTEGER, transitions INTEGER)",
+    # Delta log de métricas: solo se escribe un punto cuando el valor cambia
+    "CREATE TABLE IF NOT EXISTS metric_points (metric TEXT NOT NULL, ts REAL NOT NULL, value REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS metric_points_metric_ts ON metric_points (metric, ts)",
+    # Rollup diario por métrica: las consultas de un año leen ~365 filas por serie
+    "CREATE TABLE IF NOT EXISTS daily_metrics (metric TEXT NOT NULL, day TEXT NOT NULL, first REAL, last REAL, "
+    "min REAL, max REAL, samples INTEGER, PRIMARY KEY (metric, day)) WITHOUT ROWID",
+    # Transiciones de estado por iniciativa (NULL = alta / baja)
+    "CREATE TABLE IF NOT EXISTS status_transitions (ts REAL NOT NULL, initiative_id INTEGER NOT NULL, from_status TEXT, to_status TEXT)",
+    "CREATE INDEX IF NOT EXISTS status_transitions_ts ON status_transitions (ts)",
+    "CREATE INDEX IF NOT EXISTS status_transitions_initiative ON status_transitions (initiative_id, ts)",
+    # Último estado conocido (compartido entre workers: evita transiciones duplicadas)
+    "CREATE TABLE IF NOT EXISTS initiative_status (initiative_id INTEGER PRIMARY KEY, status TEXT, ts REAL)",
+    # Último valor de cada métrica (para el delta log)
+    "CREATE TABLE IF NOT EXISTS metric_last (metric TEXT PRIMARY KEY, value REAL, ts REAL)",
+    # Primer snapshot de cada día, JSON comprimido con zlib
+    "CREATE TABLE IF NOT EXISTS daily_snapshots (day TEXT PRIMARY KEY, ts REAL, version INTEGER, rows INTEGER, data BLOB)"
+]
+
+def _day(ts):
+    return time.strftime('%Y-%m-%d', time.gmtime(ts))
+
+def parse_time(value, default):
+    """Epoch o fecha ISO ('2026-07-01', '2026-07-01T12:00:00') -> epoch; ValueError si no es válida"""
+    if value in (None, ''):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def aggregate_metrics(stats, records):
+    """Métricas escalares de un refresh a partir de calculate_statistics_fast"""
+    total = stats.get('total_initiatives', len(records))
+    metrics = {
+        'total': total,
+        'avg_score': round(stats.get('average_metrics', {}).get('score', 0), 6),
+        'growth_count': stats.get('growth_stats', {}).get('total_growth_initiatives', 0),
+        'high_priority': stats.get('priority_buckets', {}).get('high', 0)
+    }
+    status_counts = dict(stats.get('top_statuses', []))
+    for status in VALID_STATUSES:
+        metrics[f"status:{status}"] = status_counts.get(status, 0)
+    for team in GROWTH_FOCUS_TEAMS:
+        metrics[f"team:{team}"] = 0
+    for team, count in stats.get('team_counts', {}).items():
+        metrics[f"team:{team}"] = count
+    return metrics
+
+class HistoryStore:
+    """Historial append-only en SQLite (WAL) compartido por todos los workers.
+
+    Cada refresh del cache agrega: un punto por métrica que cambió, el rollup diario,
+    las transiciones de estado y, una vez al día, un snapshot comprimido.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connect()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def connection(self):
+        """Conexión SQLite del hilo actual (para módulos que agregan tablas sobre el historial)"""
+        return self._connect()
+
+    def record_refresh(self, records, stats, version=None, ts=None):
+        """Registrar un refresh; devuelve cuántas métricas cambiaron y cuántas transiciones hubo"""
+        ts = time.time() if ts is None else ts
+        day = _day(ts)
+        metrics = aggregate_metrics(stats, records)
+        statuses = {}
+        for record in records:
+            if record.get('id') is not None:
+                statuses[record['id']] = record.get('status') or ''  # NULL queda reservado para alta/baja
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = dict(conn.execute("SELECT metric, value FROM metric_last").fetchall())
+            # Métricas que ya no aparecen (equipo o estado sin iniciativas) bajan a 0 en vez de
+            # quedar congeladas en su último valor; las que ya están en 0 no se vuelven a escribir
+            for metric, value in last.items():
+                if metric not in metrics and value:
+                    metrics[metric] = 0
+            changed = [(metric, ts, value) for metric, value in metrics.items() if last.get(metric) != value]
+            conn.executemany("INSERT INTO metric_points (metric, ts, value) VALUES (?, ?, ?)", changed)
+            conn.executemany("INSERT OR REPLACE INTO metric_last (metric, ts, value) VALUES (?, ?, ?)", changed)
+            conn.executemany(
+                "INSERT INTO daily_metrics (metric, day, first, last, min, max, samples) VALUES (?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (metric, day) DO UPDATE SET last = excluded.last, min = MIN(min, excluded.min), "
+                "max = MAX(max, excluded.max), samples = samples + 1",
+                [(metric, day, value, value, value, value) for metric, value in metrics.items()])
+
+            known = dict(conn.execute("SELECT initiative_id, status FROM initiative_status").fetchall())
+            transitions = []
+            if known:
+                transitions = [(ts, initiative_id, known.get(initiative_id), status)
+                               for initiative_id, status in statuses.items()
+                               if initiative_id not in known or known[initiative_id] != status]
+                transitions.extend((ts, initiative_id, status, None)
+                                   for initiative_id, status in known.items() if initiative_id not in statuses)
+                conn.executemany("INSERT INTO status_transitions (ts, initiative_id, from_status, to_status) "
+                                 "VALUES (?, ?, ?, ?)", transitions)
+                conn.executemany("DELETE FROM initiative_status WHERE initiative_id = ?",
+                                 [(row[1],) for row in transitions if row[3] is None])
+                updates = [(row[1], row[3], ts) for row in transitions if row[3] is not None]
+            else:
+                updates = [(initiative_id, status, ts) for initiative_id, status in statuses.items()]
+            conn.executemany("INSERT OR REPLACE INTO initiative_status (initiative_id, status, ts) VALUES (?, ?, ?)", updates)
+
+            if conn.execute("SELECT 1 FROM daily_snapshots WHERE day = ?", (day,)).fetchone() is None:
+                compact = [dict({field: record.get(field) for field in SNAPSHOT_FIELDS},
+                                score=calculate_score_fast(record)) for record in records]
+                payload = zlib.compress(json.dumps(compact, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                conn.execute("INSERT INTO daily_snapshots (day, ts, version, rows, data) VALUES (?, ?, ?, ?, ?)",
+                             (day, ts, version, len(compact), payload))
+
+            conn.execute("INSERT INTO refreshes (ts, version, total, metrics_changed, transitions) VALUES (?, ?, ?, ?, ?)",
+                         (ts, version, len(records), len(changed), len(transitions)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {"metrics_changed": len(changed), "transitions": len(transitions)}
+
+    def metric_names(self):
+        return [row[0] for row in self._connect().execute("SELECT metric FROM metric_last ORDER BY metric")]
+
+    def trends(self, metrics, start, end, bucket='day'):
+        """Series {métrica: [puntos]} entre start y end (epoch). bucket: raw | day | week | month"""
+        conn = self._connect()
+        series = {}
+        if bucket == 'raw':
+            for metric in metrics:
+                # El valor vigente al inicio del rango es el último punto anterior
+                previous = conn.execute("SELECT ts, value FROM metric_points WHERE metric = ? AND ts < ? "
+                                        "ORDER BY ts DESC LIMIT 1", (metric, start)).fetchone()
+                rows = conn.execute("SELECT ts, value FROM metric_points WHERE metric = ? AND ts BETWEEN ? AND ? "
+                                    "ORDER BY ts", (metric, start, end)).fetchall()
+                points = [{"t": start, "value": previous[1]}] if previous else []
+                points.extend({"t": ts, "value": value} for ts, value in rows)
+                series[metric] = points
+            return series
+
+        keys = {}  # día -> clave del bucket, compartido entre series
+        for metric in metrics:
+            rows = conn.execute("SELECT day, first, last, min, max, samples FROM daily_metrics "
+                                "WHERE metric = ? AND day BETWEEN ? AND ? ORDER BY day",
+                                (metric, _day(start), _day(end))).fetchall()
+            if bucket == 'day':
+                series[metric] = [{"t": day, "first": first, "last": last, "min": low, "max": high, "samples": samples}
+                                  for day, first, last, low, high, samples in rows]
+                continue
+            points = []
+            for day, first, last, low, high, samples in rows:
+                key = keys.get(day)
+                if key is None:
+                    key = keys[day] = _bucket_key(day, bucket)
+                if points and points[-1]["t"] == key:
+                    point = points[-1]
+                    point["last"] = last
+                    point["min"] = min(point["min"], low)
+                    point["max"] = max(point["max"], high)
+                    point["samples"] += samples
+                else:
+                    points.append({"t": key, "first": first, "last": last, "min": low, "max": high, "samples": samples})
+            series[metric] = points
+        return series
+
+    def transitions(self, start, end, initiative_id=None, to_status=None, limit=1000):
+        query = "SELECT ts, initiative_id, from_status, to_status FROM status_transitions WHERE ts BETWEEN ? AND ?"
+        params = [start, end]
+        if initiative_id is not None:
+            query += " AND initiative_id = ?"
+            params.append(initiative_id)
+        if to_status is not None:
+            query += " AND to_status = ?"
+            params.append(to_status)
+        query += " ORDER BY ts LIMIT ?"
+        params.append(limit)
+        return [{"ts": ts, "initiative_id": initiative_id, "from": from_status, "to": to_status}
+                for ts, initiative_id, from_status, to_status in self._connect().execute(query, params)]
+
+    def snapshot_at(self, day):
+        """Snapshot comprimido del día (o el último anterior); (día, registros) o (None, None)"""
+        row = self._connect().execute("SELECT day, data FROM daily_snapshots WHERE day <= ? ORDER BY day DESC LIMIT 1",
+                                      (day,)).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(zlib.decompress(row[1]).decode('utf-8'))
+
+    def get_status(self):
+        conn = self._connect()
+        refreshes, first_ts, last_ts = conn.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM refreshes").fetchone()
+        return {
+            "db_path": self.db_path,
+            "refreshes": refreshes,
+            "first_refresh": first_ts,
+            "last_refresh": last_ts,
+            "metric_points": conn.execute("SELECT COUNT(*) FROM metric_points").fetchone()[0],
+            "transitions": conn.execute("SELECT COUNT(*) FROM status_transitions").fetchone()[0],
+            "daily_snapshots": conn.execute("SELECT COUNT(*) FROM daily_snapshots").fetchone()[0]
+        }
+
+def _bucket_key(day, bucket):
+    if bucket == 'month':
+        return day[:7]
+    date = datetime.fromisoformat(day)
+    return (date - timedelta(days=date.weekday())).date().isoformat()  # lunes de la semana
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_history_store():
+    """Store configurado (None si el historial está deshabilitado o SQLite no está disponible)"""
+    global _store
+    if _store is None and HISTORY_CONFIG['enabled']:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = HistoryStore(HISTORY_CONFIG['db_path'])
+                    logger.info(f"✅ History store at {HISTORY_CONFIG['db_path']}")
+                except Exception as e:
+                    logger.warning(f"⚠️ History store unavailable: {e}")
+                    return None
+    return _store
+
+def _on_snapshot_refresh(previous, current, version):
+    if current is None:
+        return
+    store = get_history_store()
+    if store is None:
+        return
+    # Misma vista 'statistics' que usa el bot: el cálculo se reutiliza en esta versión
+    stats = get_snapshot_view('statistics', lambda: calculate_statistics_fast(current), version)
+    result = store.record_refresh(current, stats, version)
+    if result["transitions"]:
+        logger.info(f"🕰️ History: {result['transitions']} status transitions, {result['metrics_changed']} metrics changed")
+
+register_refresh_listener(_on_snapshot_refresh)
@@ -0,0 +1,106 @@
+# 🌊 json_stream.py - Parser JSON Incremental de Listas (páginas NocoDB elemento a elemento) v2.6
+import codecs
+import json
+from json.decoder import WHITESPACE
+
+_NUMBER_TAIL = frozenset('0123456789.eE+-')
+
+class ArrayStream:
+    """Itera los elementos de obj[key] de un objeto JSON a medida que llegan los chunks.
+
+    Cada elemento se decodifica con el scanner de JSONDecoder (en C) apenas está completo en el
+    buffer; el buffer solo guarda el chunk actual y el resto del elemento a medio llegar.
+    Los demás miembros del objeto (p.ej. pageInfo) quedan en .meta al terminar la iteración
+    y .count cuenta los elementos leídos. JSON inválido o truncado -> ValueError.
+    """
+
+    def __init__(self, chunks, key='list'):
+        self.chunks = iter(chunks)
+        self.key = key
+        self.meta = {}
+        self.count = 0
+        self._scan = json.JSONDecoder().scan_once  # raw_decode sin el wrapper: StopIteration si no hay valor
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Agregar el siguiente chunk al buffer (descartando lo ya consumido); False al final del stream"""
+        if self._eof:
+            return False
+        text = ''
+        for chunk in self.chunks:
+            text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                break
+        else:
+            text = self._utf8.decode(b'', final=True)
+            self._eof = True
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return bool(text) or not self._eof
+
+    def _peek(self):
+        """Siguiente carácter significativo sin consumirlo ('' al final del stream)"""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _take(self, expected):
+        char = self._peek()
+        if char not in expected:
+            raise ValueError(f"JSON inválido: se esperaba {' o '.join(map(repr, expected))} y llegó {char or 'fin del stream'!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decodificar el valor que empieza en la posición actual, pidiendo chunks hasta que esté completo"""
+        while True:
+            self._peek()
+            try:
+                value, end = self._scan(self._buffer, self._pos)
+            except StopIteration:
+                if self._eof:
+                    raise json.JSONDecodeError("Expecting value", self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # Un número cortado por el chunk (12|34, 1.5|e3) parece completo: se acepta solo
+                # si después viene algo que no puede continuarlo
+                if self._eof or (end < len(self._buffer) and self._buffer[end] not in _NUMBER_TAIL):
+                    self._pos = end
+                    return value
+            self._fill()
+
+    def __iter__(self):
+        self._take('{')
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                if not isinstance(key, str):
+                    raise ValueError(f"JSON inválido: clave {key!r} no es string")
+                self._take(':')
+                if key == self.key and self._peek() == '[':
+                    self._pos += 1
+                    if self._peek() == ']':
+                        self._pos += 1
+                    else:
+                        while True:
+                            item = self._value()
+                            self.count += 1
+                            yield item
+                            if self._take(',]') == ']':
+                                break
+                else:
+                    self.meta[key] = self._value()
+                if self._take(',}') == '}':
+                    break
+        if self._peek():
+            raise ValueError("JSON inválido: datos después del objeto")
@@ -0,0 +1,193 @@
+# 📈 metrics.py - Instrumentación y Exportación Prometheus v2.6
+import threading
+from bisect import bisect_left
+from config import *
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Contador monotónico con labels"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        return self.values.get(label_values, 0)
+
+    def render(self):
+        with self._lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items]
+
+class Gauge:
+    """Gauge con labels; opcionalmente calculado al exportar mediante callback"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, label_names=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self.values[label_values] = value
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self):
+        if self.callback:
+            result = self.callback()
+            items = list(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items]
+
+class Histogram:
+    """Histograma de buckets fijos: observe() es O(log buckets) con un bisect"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets or METRICS_CONFIG['latency_buckets']))
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q, *label_values):
+        """Cuantil aproximado (límite superior del bucket) para comparar con umbrales"""
+        series = self.series.get(label_values)
+        if not series or not series[2]:
+            return None
+        target = q * series[2]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series[0]):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def render(self):
+        with self._lock:
+            items = [(labels, list(s[0]), s[1], s[2]) for labels, s in self.series.items()]
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, ('le', _format_value(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Registro de métricas exportadas en /metrics"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=(), callback=None):
+        return self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(self, name, documentation, label_names=(), buckets=None):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        """Formato de exposición de texto de Prometheus (v0.0.4)"""
+        lines = []
+        for metric in self.metrics.values():
+            try:
+                samples = metric.render()
+            except Exception:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# ===== MÉTRICAS DEL SISTEMA =====
+HTTP_REQUEST_DURATION = registry.histogram(
+    'saludia_http_request_duration_seconds', 'Latencia de requests HTTP por ruta', ['route', 'method', 'status'])
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    'saludia_http_requests_in_flight', 'Requests HTTP en proceso')
+BOT_COMMAND_DURATION = registry.histogram(
+    'saludia_bot_command_duration_seconds', 'Latencia de comandos del bot', ['command'])
+DEPENDENCY_DURATION = registry.histogram(
+    'saludia_dependency_duration_seconds', 'Latencia de llamadas a dependencias externas', ['dependency', 'outcome'])
+CACHE_REQUESTS = registry.counter(
+    'saludia_cache_requests_total', 'Accesos al cache por resultado (hit, miss, stale; uno por lookup)', ['cache', 'result'])
+IMPORT_BATCHES_PENDING = registry.gauge(
+    'saludia_import_batches_pending', 'Lotes de importación enviados a NocoDB sin respuesta todavía')
+STATS_TASKS_PENDING = registry.gauge(
+    'saludia_stats_pool_tasks_pending', 'Shards de estadísticas en el pool de procesos sin terminar')
+RATE_LIMITED = registry.counter(
+    'saludia_rate_limited_total', 'Requests rechazados por rate limiting', ['endpoint_class'])
+
+def get_cache_hit_rate(cache='initiatives'):
+    """Hit rate del cache para comparar con PERFORMANCE_THRESHOLDS['cache_hit_rate_min'].
+
+    Cada lookup cuenta una sola vez: stale (cache expirado servido por un fallo) reemplaza al miss.
+    """
+    hits = CACHE_REQUESTS.get(cache, 'hit') + CACHE_REQUESTS.get(cache, 'stale')
+    total = hits + CACHE_REQUESTS.get(cache, 'miss')
+    return hits / total if total else None
+
+def render_metrics():
+    return registry.render()
@@ -0,0 +1,164 @@
+# 🧮 parallel_stats.py - Agregación de Estadísticas por Shards en un Pool de Procesos v2.6
+import atexit
+import logging
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import *
+from database import calculate_score_fast
+from metrics import STATS_TASKS_PENDING
+from score_index import PRIORITY_THRESHOLDS
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = (('teams', 'team', 'Sin equipo'), ('owners', 'owner', 'Sin owner'), ('kpis', 'main_kpi', 'Sin KPI'),
+                  ('portals', 'portal', 'Sin portal'), ('statuses', 'status', 'Sin estado'))
+METRIC_FIELDS = ('reach', 'impact', 'confidence', 'effort', 'score')
+
+def _clean(value, default):
+    # Misma regla que analytics.safe_get_string: None o vacío -> default
+    if value is None:
+        return default
+    value = str(value).strip()
+    return value or default
+
+def aggregate_rows(rows, offset=0, top_k=10, buckets=True):
+    """Agregado parcial de un shard contiguo del ranking.
+
+    Devuelve Counters por campo, sumas de métricas, buckets de prioridad (si buckets) y las
+    posiciones globales (offset + i) de las primeras top_k iniciativas con score > 0.
+    Como cada shard es un tramo del ranking, esas posiciones ya son su top-K.
+    """
+    counters = {name: Counter() for name, _, _ in COUNTER_FIELDS}
+    counter_specs = [(counters[name], field, default) for name, field, default in COUNTER_FIELDS]
+    sums = dict.fromkeys(METRIC_FIELDS, 0.0)
+    metric_rows = skipped = high = medium = 0
+    top = []
+    high_threshold, medium_threshold = PRIORITY_THRESHOLDS['high'], PRIORITY_THRESHOLDS['medium']
+
+    for i, init in enumerate(rows):
+        if not isinstance(init, dict):
+            continue
+        try:
+            for counter, field, default in counter_specs:
+                counter[_clean(init.get(field), default)] += 1
+        except Exception:
+            skipped += 1
+            continue
+        try:
+            reach = float(init.get('reach', 0)) or 0
+            impact = float(init.get('impact', 0)) or 0
+            confidence = float(init.get('confidence', 0)) or 0
+            effort = float(init.get('effort', 1)) or 1
+            score = float(init.get('score', 0)) or init.get('calculated_score', 0)
+            if reach or impact or confidence or effort:
+                sums['reach'] += reach
+                sums['impact'] += impact
+                sums['confidence'] += confidence
+                sums['effort'] += effort
+                sums['score'] += score
+                metric_rows += 1
+            if score > 0 and len(top) < top_k:
+                top.append(offset + i)
+        except Exception:
+            skipped += 1
+        if buckets:
+            ranking_score = calculate_score_fast(init)
+            if ranking_score >= high_threshold:
+                high += 1
+            elif ranking_score >= medium_threshold:
+                medium += 1
+
+    return {"rows": len(rows), "counters": counters, "sums": sums, "metric_rows": metric_rows,
+            "high": high, "medium": medium, "top": top, "skipped": skipped}
+
+def merge_partials(partials, top_k=10):
+    """Combinar agregados parciales en orden de shard (conserva el orden de aparición de los Counters)"""
+    merged = {"rows": 0, "counters": {name: Counter() for name, _, _ in COUNTER_FIELDS},
+              "sums": dict.fromkeys(METRIC_FIELDS, 0.0), "metric_rows": 0, "high": 0, "medium": 0,
+              "top": [], "skipped": 0}
+    for partial in partials:
+        merged["rows"] += partial["rows"]
+        for name, counter in partial["counters"].items():
+            merged["counters"][name].update(counter)
+        for field, value in partial["sums"].items():
+            merged["sums"][field] += value
+        for key in ("metric_rows", "high", "medium", "skipped"):
+            merged[key] += partial[key]
+        if len(merged["top"]) < top_k:
+            merged["top"].extend(partial["top"][:top_k - len(merged["top"])])
+    return merged
+
+# ===== POOL DE PROCESOS (se crea una vez y se reutiliza) =====
+_pool = None
+_pool_lock = threading.Lock()
+_status = {"parallel_runs": 0, "serial_runs": 0, "fallbacks": 0}
+
+def get_pool():
+    """Pool persistente; el costo de arranque se paga en la primera llamada (o en warm_up)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(PARALLEL_STATS_CONFIG['start_method'])
+            _pool = ProcessPoolExecutor(max_workers=PARALLEL_STATS_CONFIG['workers'], mp_context=context)
+            logger.info(f"🧮 Stats pool started: {PARALLEL_STATS_CONFIG['workers']} workers "
+                        f"({PARALLEL_STATS_CONFIG['start_method']})")
+        return _pool
+
+def warm_up():
+    """Arrancar todos los workers e importar este módulo en ellos antes del primer refresh grande"""
+    pool = get_pool()
+    list(pool.map(_noop_shard, range(PARALLEL_STATS_CONFIG['workers'])))
+    return pool
+
+def _noop_shard(_):
+    return aggregate_rows([])["rows"]
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+atexit.register(shutdown)
+
+def _shards(rows):
+    workers = PARALLEL_STATS_CONFIG['workers']
+    size = max(PARALLEL_STATS_CONFIG['min_shard_rows'], -(-len(rows) // workers))
+    return [(rows[start:start + size], start) for start in range(0, len(rows), size)]
+
+def aggregate(rows, parallel=None, top_k=10, buckets=True):
+    """Agregado de todo el ranking: en shards sobre el pool si hay filas suficientes, si no en serie.
+
+    parallel=None decide por PARALLEL_STATS_CONFIG (enabled y min_rows); si el pool falla
+    se recalcula en serie.
+    """
+    if parallel is None:
+        parallel = PARALLEL_STATS_CONFIG['enabled'] and len(rows) >= PARALLEL_STATS_CONFIG['min_rows']
+    shards = _shards(rows) if parallel else []
+    if len(shards) > 1:
+        try:
+            pool = get_pool()
+            futures = [pool.submit(aggregate_rows, shard, offset, top_k, buckets) for shard, offset in shards]
+            for future in futures:
+                STATS_TASKS_PENDING.inc()
+                future.add_done_callback(lambda _: STATS_TASKS_PENDING.dec())
+            merged = merge_partials([future.result() for future in futures], top_k)
+            _status["parallel_runs"] += 1
+            merged["shards"] = len(shards)
+            return merged
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.warning(f"⚠️ Parallel stats failed, falling back to serial: {e}")
+            _status["fallbacks"] += 1
+            shutdown()
+    _status["serial_runs"] += 1
+    merged = merge_partials([aggregate_rows(rows, 0, top_k, buckets)], top_k)
+    merged["shards"] = 1
+    return merged
+
+def get_status():
+    return {"enabled": PARALLEL_STATS_CONFIG['enabled'], "workers": PARALLEL_STATS_CONFIG['workers'],
+            "min_rows": PARALLEL_STATS_CONFIG['min_rows'], "pool_started": _pool is not None, **_status}
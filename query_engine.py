@@ -0,0 +1,193 @@
+# 🧭 query_engine.py - Consultas Estructuradas con Índices sobre el Snapshot v2.6
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from config import *
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+# Índices de igualdad (valor -> posiciones) y ordenados (valores numéricos)
+CATEGORICAL_FIELDS = ['team', 'portal', 'status', 'owner', 'main_kpi']
+NUMERIC_FIELDS = ['score', 'reach', 'impact', 'confidence', 'effort']
+
+FIELD_ALIASES = {
+    'equipo': 'team',
+    'estado': 'status',
+    'kpi': 'main_kpi',
+    'responsable': 'owner',
+    'prioridad': 'score'
+}
+
+_CLAUSE_SPLIT = re.compile(r'\s+(?:and|y|&&)\s+', re.IGNORECASE)
+_CLAUSE = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|==|=|>|<|:|\s+in\s+|\s+en\s+)\s*(.+?)\s*$', re.IGNORECASE)
+
+class QueryError(ValueError):
+    """Consulta con sintaxis o campos inválidos"""
+
+class Predicate:
+    __slots__ = ('field', 'op', 'values', 'text')
+
+    def __init__(self, field, op, values, text):
+        self.field = field
+        self.op = op
+        self.values = values
+        self.text = text
+
+    def matches(self, record):
+        """Filtro residual sobre un registro (para candidatos ya reducidos)"""
+        value = record.get(self.field)
+        if self.field in NUMERIC_FIELDS:
+            target = self.values[0]
+            value = value or 0
+            return {'>=': value >= target, '<=': value <= target, '>': value > target,
+                    '<': value < target, '=': value == target, '!=': value != target}[self.op]
+        value = str(value or '').lower()
+        if self.op == '!=':
+            return value not in self.values
+        return value in self.values
+
+def _parse_number(raw, clause):
+    try:
+        return float(raw)
+    except ValueError:
+        raise QueryError(f"Valor numérico inválido en '{clause}'")
+
+def parse_query(query):
+    """'team=Growth AND portal=Seller AND score>=2 AND status in active' -> [Predicate]"""
+    if not query or not query.strip():
+        raise QueryError("La consulta está vacía")
+
+    predicates = []
+    for clause in _CLAUSE_SPLIT.split(query.strip()):
+        match = _CLAUSE.match(clause)
+        if not match:
+            raise QueryError(f"Condición inválida: '{clause}'")
+        field, op, raw = match.group(1).lower(), match.group(2).strip().lower(), match.group(3).strip().strip('"\'')
+        field = FIELD_ALIASES.get(field, field)
+        op = {'==': '=', ':': '=', 'en': 'in'}.get(op, op)
+
+        if field in NUMERIC_FIELDS:
+            if op == 'in':
+                raise QueryError(f"'in' no aplica a campos numéricos: '{clause}'")
+            predicates.append(Predicate(field, op, [_parse_number(raw, clause)], clause))
+        elif field in CATEGORICAL_FIELDS:
+            if op not in ('=', '!=', 'in'):
+                raise QueryError(f"Operador '{op}' no aplica a '{field}'")
+            values = [v.strip().strip('"\'').lower() for v in re.split(r'[,|]', raw) if v.strip()]
+            # Filtros predefinidos de estado: "status in active", "status=sprint"
+            if field == 'status' and len(values) == 1 and values[0] in STATUS_FILTERS:
+                values = [s.lower() for s in STATUS_FILTERS[values[0]]]
+                op = 'in' if op == '=' else op
+            predicates.append(Predicate(field, op, set(values), clause))
+        else:
+            raise QueryError(f"Campo desconocido: '{field}'. Válidos: {', '.join(CATEGORICAL_FIELDS + NUMERIC_FIELDS)}")
+    return predicates
+
+class SnapshotIndexes:
+    """Índices de un snapshot: posiciones por valor (sets) y columnas numéricas ordenadas"""
+
+    def __init__(self, records):
+        self.records = records
+        self.size = len(records)
+        self.postings = {field: {} for field in CATEGORICAL_FIELDS}
+        for position, record in enumerate(records):
+            for field in CATEGORICAL_FIELDS:
+                key = str(record.get(field) or '').lower()
+                self.postings[field].setdefault(key, []).append(position)
+        self.postings = {field: {value: frozenset(positions) for value, positions in values.items()}
+                         for field, values in self.postings.items()}
+
+        self.sorted = {}
+        for field in NUMERIC_FIELDS:
+            order = sorted(range(self.size), key=lambda p: records[p].get(field) or 0)
+            self.sorted[field] = ([records[p].get(field) or 0 for p in order], order)
+
+    def _range_bounds(self, predicate):
+        values, _ = self.sorted[predicate.field]
+        target = predicate.values[0]
+        if predicate.op == '>=':
+            return bisect_left(values, target), len(values)
+        if predicate.op == '>':
+            return bisect_right(values, target), len(values)
+        if predicate.op == '<=':
+            return 0, bisect_right(values, target)
+        if predicate.op == '<':
+            return 0, bisect_left(values, target)
+        return bisect_left(values, target), bisect_right(values, target)  # '='
+
+    def estimate(self, predicate):
+        """Cardinalidad exacta del predicado usando solo el índice (sin tocar registros)"""
+        if predicate.field in NUMERIC_FIELDS:
+            if predicate.op == '!=':
+                low, high = self._range_bounds(Predicate(predicate.field, '=', predicate.values, ''))
+                return self.size - (high - low)
+            low, high = self._range_bounds(predicate)
+            return high - low
+        postings = self.postings[predicate.field]
+        matched = sum(len(postings.get(v, ())) for v in predicate.values)
+        return self.size - matched if predicate.op == '!=' else matched
+
+    def positions(self, predicate):
+        """Conjunto de posiciones que cumplen el predicado"""
+        if predicate.field in NUMERIC_FIELDS:
+            if predicate.op == '!=':
+                return frozenset(range(self.size)) - self.positions(Predicate(predicate.field, '=', predicate.values, ''))
+            low, high = self._range_bounds(predicate)
+            return frozenset(self.sorted[predicate.field][1][low:high])
+        postings = self.postings[predicate.field]
+        if predicate.op == '!=':
+            excluded = frozenset().union(*(postings.get(v, frozenset()) for v in predicate.values))
+            return frozenset(range(self.size)) - excluded
+        sets = [postings[v] for v in predicate.values if v in postings]
+        if len(sets) == 1:
+            return sets[0]
+        return frozenset().union(*sets)
+
+def get_snapshot_indexes(records, version=None):
+    """Índices memoizados por versión del snapshot"""
+    return get_snapshot_view('query_indexes', lambda: SnapshotIndexes(records), version)
+
+def match_positions(indexes, predicates):
+    """Planificador: empieza por el predicado más selectivo; devuelve (posiciones, plan).
+
+    Los siguientes se aplican por intersección de conjuntos si su índice es pequeño, o
+    como filtro residual sobre los candidatos si ya quedan menos candidatos que posiciones.
+    """
+    planned = sorted(((indexes.estimate(p), p) for p in predicates), key=lambda item: item[0])
+    plan = []
+    candidates = None
+
+    for estimated, predicate in planned:
+        if candidates is None:
+            candidates = indexes.positions(predicate)
+            plan.append({"clause": predicate.text, "strategy": "index_scan", "estimated": estimated, "remaining": len(candidates)})
+        elif len(candidates) <= estimated:
+            records = indexes.records
+            candidates = [p for p in candidates if predicate.matches(records[p])]
+            plan.append({"clause": predicate.text, "strategy": "residual_filter", "estimated": estimated, "remaining": len(candidates)})
+        else:
+            candidates = indexes.positions(predicate).intersection(candidates)
+            plan.append({"clause": predicate.text, "strategy": "intersection", "estimated": estimated, "remaining": len(candidates)})
+        if not candidates:
+            break
+    return candidates or frozenset(), plan
+
+def execute_query(indexes, predicates, limit=None):
+    """Ejecutar predicados con el planificador y ordenar los resultados por score"""
+    candidates, plan = match_positions(indexes, predicates)
+    records = indexes.records
+    matched = sorted((records[p] for p in candidates),
+                     key=lambda r: (-(r.get('score') or 0), r.get('id') or 0))
+    total = len(matched)
+    if limit is not None:
+        matched = matched[:limit]
+    return {"success": True, "data": matched, "total": total, "plan": plan}
+
+def run_query(query, records, version=None, limit=None):
+    """Parsear y ejecutar una consulta estructurada sobre el snapshot"""
+    try:
+        predicates = parse_query(query)
+    except QueryError as e:
+        return {"success": False, "error": str(e), "data": [], "total": 0}
+    return execute_query(get_snapshot_indexes(records, version), predicates, limit)
@@ -0,0 +1,186 @@
+# 🚦 rate_limiter.py - Rate Limiting (Token Bucket) v2.6
+import logging
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+from config import *
+from metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+def get_class_limits(endpoint_class):
+    """(capacidad, ventana en segundos) para una clase de endpoint"""
+    limit_key, period = RATE_LIMIT_CLASSES.get(endpoint_class, RATE_LIMIT_CLASSES['api'])
+    return RATE_LIMITS[limit_key], period
+
+def _refill(tokens, updated, now, capacity, period):
+    """Recargar tokens de forma continua: capacity tokens cada period segundos"""
+    elapsed = max(0.0, now - updated)
+    return min(capacity, tokens + elapsed * capacity / period)
+
+class MemoryRateLimitBackend:
+    """Token buckets en memoria del proceso (solo un worker)"""
+
+    def __init__(self):
+        self.buckets = {}
+        self._lock = threading.Lock()
+        self.last_cleanup = time.time()
+
+    def acquire(self, key, capacity, period, cost=1):
+        now = time.time()
+        with self._lock:
+            tokens, updated = self.buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, period)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[key] = (tokens, now)
+
+            if now - self.last_cleanup > RATE_LIMIT_CONFIG['cleanup_interval']:
+                self._cleanup(now)
+        return allowed, tokens
+
+    def _cleanup(self, now):
+        max_period = max(period for _, period in RATE_LIMIT_CLASSES.values())
+        stale = [k for k, (_, updated) in self.buckets.items() if now - updated > max_period]
+        for k in stale:
+            del self.buckets[k]
+        self.last_cleanup = now
+
+    def reset(self):
+        with self._lock:
+            self.buckets.clear()
+
+class SQLiteRateLimitBackend:
+    """Token buckets en un archivo SQLite local compartido por todos los workers de gunicorn"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.last_cleanup = time.time()
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key, capacity, period, cost=1):
+        now = time.time()
+        conn = self._connect()
+        # BEGIN IMMEDIATE toma el lock de escritura: leer-modificar-escribir atómico entre procesos
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(row[0], row[1], now, capacity, period) if row else float(capacity)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+
+            if now - self.last_cleanup > RATE_LIMIT_CONFIG['cleanup_interval']:
+                max_period = max(period for _, period in RATE_LIMIT_CLASSES.values())
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - max_period,))
+                self.last_cleanup = now
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+    def reset(self):
+        self._connect().execute("DELETE FROM buckets")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Backend configurado; si SQLite no está disponible se usa memoria"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if RATE_LIMIT_CONFIG['backend'] == 'sqlite':
+                    try:
+                        _backend = SQLiteRateLimitBackend(RATE_LIMIT_CONFIG['db_path'])
+                        logger.info(f"✅ Rate limiter using shared store {RATE_LIMIT_CONFIG['db_path']}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ SQLite rate limit store unavailable ({e}) - using memory")
+                        _backend = MemoryRateLimitBackend()
+                else:
+                    _backend = MemoryRateLimitBackend()
+    return _backend
+
+def check_rate_limit(identity, endpoint_class='api', cost=1):
+    """Consumir un token del bucket (identity, endpoint_class).
+
+    identity: 'ip:1.2.3.4' o 'tg:12345'. Devuelve dict con allowed, limit, remaining y retry_after.
+    Si el store falla se permite la petición (fail open) para no tumbar el servicio.
+    """
+    capacity, period = get_class_limits(endpoint_class)
+
+    if not RATE_LIMIT_CONFIG['enabled']:
+        return {"allowed": True, "limit": capacity, "remaining": capacity, "retry_after": 0}
+
+    try:
+        allowed, tokens = get_backend().acquire(f"{endpoint_class}:{identity}", capacity, period, cost)
+    except Exception as e:
+        logger.error(f"❌ Rate limiter error: {e}")
+        return {"allowed": True, "limit": capacity, "remaining": capacity, "retry_after": 0}
+
+    retry_after = 0
+    if not allowed:
+        retry_after = max(1, math.ceil((cost - tokens) * period / capacity))
+        RATE_LIMITED.inc(endpoint_class)
+        logger.warning(f"🚦 Rate limit {endpoint_class} exceeded for {identity} - retry in {retry_after}s")
+
+    return {"allowed": allowed, "limit": capacity, "remaining": int(tokens), "retry_after": retry_after}
+
+def get_client_ip(flask_request):
+    """IP real del cliente según X-Forwarded-For.
+
+    Solo las entradas que agregan nuestros proxies son confiables: el cliente puede mandar el
+    header con cualquier valor y el proxy agrega la IP que ve a la derecha. Se toma la entrada
+    número trusted_proxies desde la derecha (como ProxyFix(x_for=N)); 0 = usar remote_addr.
+    """
+    trusted = RATE_LIMIT_CONFIG['trusted_proxies']
+    forwarded = [ip.strip() for ip in flask_request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+    if trusted > 0 and len(forwarded) >= trusted:
+        return forwarded[-trusted]
+    return flask_request.remote_addr or 'unknown'
+
+def rate_limit(endpoint_class='api'):
+    """Decorador Flask: aplica el límite por IP y responde 429 con Retry-After"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import request, jsonify, make_response
+
+            result = check_rate_limit(f"ip:{get_client_ip(request)}", endpoint_class)
+
+            if not result["allowed"]:
+                response = jsonify({
+                    "success": False,
+                    "error": "Demasiadas solicitudes. Intenta más tarde.",
+                    "rate_limit_class": endpoint_class,
+                    "retry_after": result["retry_after"]
+                })
+                response.status_code = 429
+            else:
+                response = make_response(view(*args, **kwargs))
+
+            response.headers['X-RateLimit-Limit'] = str(result["limit"])
+            response.headers['X-RateLimit-Remaining'] = str(result["remaining"])
+            if not result["allowed"]:
+                response.headers['Retry-After'] = str(result["retry_after"])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+# 🧬 record_schema.py - Normalización de Registros NocoDB con Esquema Compilado v2.6
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# (campo, tipo, default): mismas reglas que database.safe_get_value campo por campo
+INITIATIVE_SCHEMA = (
+    ('id', int, 0),
+    ('initiative_name', str, 'Sin nombre'),
+    ('description', str, 'Sin descripción'),
+    ('owner', str, 'Sin owner'),
+    ('team', str, 'Sin equipo'),
+    ('portal', str, 'Sin portal'),
+    ('main_kpi', str, 'Sin KPI'),
+    ('reach', float, 0.0),
+    ('impact', int, 1),
+    ('confidence', float, 0.0),
+    ('effort', float, 1.0),
+    ('status', str, 'Pending'),
+    ('must_have', bool, False),
+)
+
+# ===== CONVERTIDORES POR TIPO =====
+# Expresión por tipo sobre el valor crudo v: None -> default; el caso común (ya del tipo) sin llamadas;
+# el resto pasa por _cast, que cuenta los valores inválidos en errors[campo] en vez de loguear por fila
+_EXPRESSIONS = {
+    str: "{d} if v is None else ((v if v.__class__ is str else str(v)).strip() or {d})",
+    int: "{d} if v is None else (v if v.__class__ is int else _cast(v, int, {d}, {key!r}))",
+    float: "{d} if v is None else (v if v.__class__ is float else _cast(v, float, {d}, {key!r}))",
+    bool: "{d} if v is None else (v if v.__class__ is bool else str(v).lower() in ('true', '1', 'yes'))",
+}
+
+def rice_score(reach, impact, confidence, effort):
+    """Misma fórmula y guardas que database.calculate_score_fast"""
+    if effort <= 0:
+        effort = 1.0
+    if reach > 0 and impact > 0 and confidence > 0:
+        return round((reach * impact * confidence) / effort, 4)
+    return 0.0
+
+class RecordSchema:
+    """Esquema compilado una sola vez a una función que normaliza cada registro crudo en una pasada.
+
+    Los valores inválidos no se loguean por fila: se cuentan por campo y se
+    reporta un resumen por lote (get_status los expone en /health).
+    """
+
+    def __init__(self, fields, name='initiative'):
+        self.name = name
+        self.fields = tuple(fields)
+        self.errors = Counter()
+        self.stats = {"rows": 0, "skipped": 0, "batches": 0}
+        self.last_batch = {}
+        self._lock = threading.Lock()
+        self.normalize = self._compile()
+
+    def _cast(self, value, cast, default, key):
+        try:
+            return cast(value) if value != '' else default
+        except Exception:
+            self.errors[key] += 1
+            return default
+
+    def _compile(self):
+        """Registro crudo -> registro normalizado con calculated_score y score"""
+        namespace = {'_cast': self._cast, 'rice_score': rice_score}
+        lines = ["def normalize(raw):", "    get = raw.get"]
+        for i, (key, value_type, default) in enumerate(self.fields):
+            if value_type not in _EXPRESSIONS:
+                raise ValueError(f"Tipo no soportado en el esquema {self.name}: {key}={value_type}")
+            namespace[f'd{i}'] = default
+            lines.append(f"    v = get({key!r})")
+            lines.append(f"    f{i} = " + _EXPRESSIONS[value_type].format(d=f'd{i}', key=key))
+        fields = {key: f'f{i}' for i, (key, _, _) in enumerate(self.fields)}
+        lines.append(f"    score = rice_score({fields['reach']}, {fields['impact']}, {fields['confidence']}, {fields['effort']})")
+        # mismo orden de claves que el flujo anterior (JSON, ETags)
+        items = [f"{key!r}: {variable}" for key, variable in fields.items()]
+        lines.append("    return {" + ", ".join(items + ["'calculated_score': score", "'score': score"]) + "}")
+        exec(compile("\n".join(lines), f"<record schema {self.name}>", 'exec'), namespace)
+        return namespace['normalize']
+
+    def normalize_rows(self, rows):
+        """Normalizar un lote; ignora lo que no sea dict y registra errores por campo"""
+        errors_before = self.errors.copy()
+        normalize = self.normalize
+        records, skipped = [], 0
+        for raw in rows:
+            if raw.__class__ is not dict and not isinstance(raw, dict):
+                skipped += 1
+                continue
+            try:
+                records.append(normalize(raw))
+            except Exception as e:
+                skipped += 1
+                logger.warning(f"Error processing initiative {raw}: {e}")
+
+        batch_errors = self.errors - errors_before
+        with self._lock:
+            self.stats["rows"] += len(records)
+            self.stats["skipped"] += skipped
+            self.stats["batches"] += 1
+            self.last_batch = {"rows": len(records), "skipped": skipped, "invalid_values": dict(batch_errors)}
+        if batch_errors:
+            logger.warning(f"⚠️ Normalización: {sum(batch_errors.values())} valores inválidos reemplazados "
+                           f"por default en {len(records)} registros ({dict(batch_errors)})")
+        return records
+
+    def get_status(self):
+        return {**self.stats, "invalid_values": dict(self.errors), "last_batch": self.last_batch}
+
+initiative_schema = RecordSchema(INITIATIVE_SCHEMA)
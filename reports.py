@@ -0,0 +1,433 @@
+# 🧾 reports.py - Reportes de Texto con Plantillas Precompiladas y Cache por Snapshot v2.6
+import logging
+import string
+from config import *
+from score_index import PRIORITY_THRESHOLDS
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+# ===== TABLAS DE EMOJIS =====
+STATUS_EMOJIS = {
+    'Pending': '⏳',
+    'Reviewed': '👁️',
+    'Prioritized': '⭐',
+    'Backlog': '📝',
+    'Sprint': '🔧',
+    'Production': '🚀',
+    'Monitoring': '📊',
+    'Discarded': '❌',
+    'Cancelled': '❌',
+    'On Hold': '⏸️'
+}
+DEFAULT_EMOJI = '📋'
+
+# (umbral, emoji) de mayor a menor; por debajo del último umbral -> DEFAULT_EMOJI
+PRIORITY_EMOJIS = ((PRIORITY_THRESHOLDS['high'], '🔥'), (PRIORITY_THRESHOLDS['medium'], '⭐'))
+PRIORITY_LABELS = {
+    '🔥': "🔥 **ALTA PRIORIDAD** - Ejecutar inmediatamente",
+    '⭐': "⭐ **MEDIA PRIORIDAD** - Próximos sprints",
+    DEFAULT_EMOJI: "📋 **BAJA PRIORIDAD** - Re-evaluar necesidad"
+}
+IMPACT_LABELS = {1: "Bajo", 2: "Medio", 3: "Alto"}
+
+def priority_emoji(score):
+    """Emoji de prioridad por score (🔥 ≥ alto, ⭐ ≥ medio, 📋 resto)"""
+    try:
+        score = float(score) if score else 0.0
+    except (TypeError, ValueError):
+        return DEFAULT_EMOJI
+    for threshold, emoji in PRIORITY_EMOJIS:
+        if score >= threshold:
+            return emoji
+    return DEFAULT_EMOJI
+
+def status_emoji(status):
+    return STATUS_EMOJIS.get(str(status).strip(), DEFAULT_EMOJI) if status else DEFAULT_EMOJI
+
+def team_emoji(team):
+    return "🚀" if str(team).strip().lower() == "growth" else "👥"
+
+# ===== PLANTILLAS =====
+class Template:
+    """Plantilla con sintaxis str.format compilada una sola vez a una f-string.
+
+    Render es una llamada a función con un dict: sin re-parsear el formato ni concatenar con +=.
+    Solo admite campos simples ({nombre}, {nombre:.2f}, {nombre!s}).
+    """
+
+    __slots__ = ('name', 'source', 'render')
+
+    def __init__(self, source, name='template'):
+        self.name = name
+        self.source = source
+        parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if literal:
+                escaped = literal.encode('unicode_escape').decode('ascii')
+                parts.append(escaped.replace('"', '\\"').replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Template {name}: unsupported field '{field}'")
+            if spec and '{' in spec:
+                raise ValueError(f"Template {name}: nested format spec in '{field}'")
+            expression = f"v['{field}']"
+            if conversion:
+                expression += f"!{conversion}"
+            if spec:
+                expression += f":{spec}"
+            parts.append("{" + expression + "}")
+        code = compile(f'lambda v: f"{"".join(parts)}"', f"<template {name}>", 'eval')
+        self.render = eval(code, {})
+
+    def __call__(self, **values):
+        return self.render(values)
+
+    def __repr__(self):
+        return f"Template({self.name!r})"
+
+# Línea de iniciativa en listas (también usada por las páginas de resultados)
+INITIATIVE_SUMMARY = Template("{prefix}{priority} **{name}** (Score: {score:.2f})\n{team_emoji} {team} | 👤 {owner}", 'initiative_summary')
+
+# Reporte de estadísticas
+STATS_HEADER = Template("🎯 **ESTADÍSTICAS SALUDIA - ENFOQUE GROWTH** ({total} iniciativas)\n", 'stats_header')
+STATS_GROWTH = Template("🚀 **ANÁLISIS DE GROWTH:**\n"
+                        "• Iniciativas Growth: {count} ({percentage:.1f}%)\n"
+                        "• Score promedio Growth: {avg:.2f}\n", 'stats_growth')
+STATS_GROWTH_ITEM = Template("{position}. {priority} **{name}** - Score: {score:.2f}\n"
+                             "   📊 {kpi} | 🖥️ {portal}", 'stats_growth_item')
+STATS_TOP_ITEM = Template("{position}. {priority} **{name}** - Score: {score:.2f}\n"
+                          "   👥 {team} | 👤 {owner} | {status_emoji} {status}\n"
+                          "   📝 {description}\n", 'stats_top_item')
+STATS_STATUS_ITEM = Template("• {emoji} {status}: {count} iniciativas ({percentage:.1f}%)", 'stats_status_item')
+STATS_TEAM_ITEM = Template("• {emoji} {emphasis}{team}{emphasis}: {count} iniciativas ({percentage:.1f}%)", 'stats_team_item')
+STATS_OWNER_ITEM = Template("• {owner}: {count} iniciativas ({percentage:.1f}%)", 'stats_owner_item')
+STATS_METRICS = Template("\n📈 **MÉTRICAS PROMEDIO:**\n"
+                         "• Alcance: {reach:.1f}%\n"
+                         "• Impacto: {impact:.1f}/3\n"
+                         "• Confianza: {confidence:.1f}%\n"
+                         "• Esfuerzo: {effort:.1f} sprints\n"
+                         "• **Score Promedio: {score:.2f}**", 'stats_metrics')
+
+# Análisis Growth del bot
+GROWTH_HEADER = Template("""🚀 **ANÁLISIS ESPECÍFICO GROWTH - SALUDIA**
+
+📊 **MÉTRICAS GROWTH:**
+• Iniciativas Growth: {count} de {total} ({percentage:.1f}%)
+• Score promedio Growth: {avg:.2f}
+• Alta prioridad (≥2.0): {high} iniciativas
+
+🏆 **TOP INICIATIVAS GROWTH:**
+""", 'growth_header')
+GROWTH_ITEM = Template("""
+{position}. {priority} **{name}** (Score: {score:.2f})
+   👤 {owner} | 🖥️ {portal}
+   📊 KPI: {kpi}
+   📝 {description}...
+""", 'growth_item')
+GROWTH_EMPTY = Template("""🚀 **ANÁLISIS ESPECÍFICO GROWTH - SALUDIA**
+
+⚠️ **NO HAY INICIATIVAS DE GROWTH IDENTIFICADAS**
+
+📊 **Estado actual:**
+• Total iniciativas: {total}
+• Iniciativas Growth: 0 (0%)
+
+💡 **RECOMENDACIONES CRÍTICAS:**
+• 🚨 URGENTE: Crear iniciativas específicas para el equipo Growth
+• 🎯 Enfocar en: Adquisición de usuarios, Retention, Conversion Rate
+• 📈 KPIs sugeridos: GMV, Take Rate, User Acquisition Cost
+• 🚀 Considerar iniciativas de marketing, onboarding, referral programs
+
+🎯 **Próximos pasos:**
+1. Usar comando `crear` para agregar iniciativas Growth
+2. Balancear portfolio con iniciativas de crecimiento
+3. Establecer KPIs claros de Growth para Saludia marketplace""", 'growth_empty')
+
+# Asistente de creación
+WIZARD_SUMMARY = Template("""✅ **Métricas RICE calculadas:**
+
+📊 **Score RICE: {score:.3f}** - {priority}
+
+**📋 RESUMEN COMPLETO:**
+• **Nombre:** {initiative_name}
+• **Responsable:** {owner}
+• **Equipo:** {team}
+• **Portal:** {portal}
+• **KPI:** {main_kpi}
+
+**📏 Métricas:**
+• **Alcance:** {reach_pct}% de usuarios
+• **Impacto:** {impact}/3 ({impact_label})
+• **Confianza:** {confidence_pct}%
+• **Esfuerzo:** {effort} sprints
+
+**📊 Score = ({reach_pct}% × {impact} × {confidence_pct}%) ÷ {effort} = {score:.3f}**
+
+**➡️ PASO 8/8: Confirmación**
+¿Todo está correcto? Escribe:
+• **"confirmar"** - Crear la iniciativa
+• **"cancelar"** - Cancelar proceso
+• **"editar"** - Corregir datos""", 'wizard_summary')
+WIZARD_CREATED = Template("""✅ **¡INICIATIVA CREADA EXITOSAMENTE!** 🎉
+
+{priority} **{initiative_name}**
+📊 **Score RICE:** {score:.3f}
+
+**Datos guardados:**
+👤 **Responsable:** {owner}
+👥 **Equipo:** {team}
+🖥️ **Portal:** {portal}
+📈 **KPI:** {main_kpi}
+
+**Métricas RICE:**
+• Alcance: {reach_pct:.0f}%
+• Impacto: {impact}/3
+• Confianza: {confidence_pct:.0f}%
+• Esfuerzo: {effort} sprints
+
+**🚀 Próximos pasos:**
+• Aparecerá en lista principal: `iniciativas`
+• Incluida en análisis AI: `analizar`
+• Buscar por equipo: `buscar {team}`""", 'wizard_created')
+
+WHATIF_HEADER = Template("""🧪 **SIMULACIÓN WHAT-IF**
+🎯 Filtro: `{filter}` ({affected} de {total} iniciativas)
+⚙️ Ajustes: {adjustments}
+
+📊 **Buckets de prioridad (antes → después):**
+• 🔥 Alta: {high_before} → {high_after}
+• ⭐ Media: {medium_before} → {medium_after}
+• 📋 Baja: {low_before} → {low_after}
+""", 'whatif_header')
+WHATIF_ITEM = Template("{arrow} **{name}** #{rank_before} → #{rank_after} (Score: {score_before:.2f} → {score_after:.2f})", 'whatif_item')
+
+PLAN_HEADER = Template("""🗓️ **PLAN DE SPRINT** (candidatas: {statuses})
+📊 Score total: {total_score:.2f} | {selected} iniciativas""", 'plan_header')
+PLAN_TEAM = Template("\n{emoji} **{team}** — {used:g}/{capacity:g} sprints | Score {score:.2f}{warning}", 'plan_team')
+PLAN_ITEM = Template("   {pin}{priority} {name} ({effort:g} sp, score {score:.2f})", 'plan_item')
+
+DUPLICATE_ITEM = Template("• {emoji} **{name}** ({status}, {team}) — {similarity:.0f}% similar", 'duplicate_item')
+
+# ===== RENDERERS =====
+def render_initiative_summary(name, owner, team, score, index=None):
+    return INITIATIVE_SUMMARY.render({
+        'prefix': f"**{index}.** " if index else "",
+        'priority': priority_emoji(score),
+        'name': name, 'score': score,
+        'team_emoji': team_emoji(team), 'team': team, 'owner': owner
+    })
+
+def render_statistics(stats):
+    """Reporte de estadísticas (mismo texto que format_statistics_text_fast) en una pasada"""
+    if not stats:
+        return "No hay datos para mostrar estadísticas."
+
+    total = stats['total_initiatives']
+    lines = [STATS_HEADER.render({'total': total})]
+
+    growth_stats = stats.get('growth_stats', {})
+    if growth_stats:
+        lines.append(STATS_GROWTH.render({
+            'count': growth_stats.get('total_growth_initiatives', 0),
+            'percentage': growth_stats.get('growth_percentage', 0),
+            'avg': growth_stats.get('growth_avg_score', 0)
+        }))
+        top_growth = growth_stats.get('top_growth_initiatives', [])
+        if top_growth:
+            lines.append("🌟 **TOP INICIATIVAS GROWTH:**")
+            for position, init in enumerate(top_growth[:3], 1):
+                score = init.get('score', 0)
+                lines.append(STATS_GROWTH_ITEM.render({
+                    'position': position, 'priority': priority_emoji(score),
+                    'name': init.get('name', 'Sin nombre'), 'score': score,
+                    'kpi': init.get('kpi', 'Sin KPI'), 'portal': init.get('portal', 'Sin portal')
+                }))
+            lines.append("")
+
+    if stats.get('top_initiatives_by_score'):
+        lines.append("🏆 **TOP 5 INICIATIVAS POR SCORE:**")
+        for position, init in enumerate(stats['top_initiatives_by_score'][:5], 1):
+            score = init.get('score', 0)
+            status = init.get('status', 'Sin estado')
+            lines.append(STATS_TOP_ITEM.render({
+                'position': position, 'priority': priority_emoji(score),
+                'name': init.get('name', 'Sin nombre'), 'score': score,
+                'team': init.get('team', 'Sin equipo'), 'owner': init.get('owner', 'Sin owner'),
+                'status_emoji': status_emoji(init.get('status', '')), 'status': status,
+                'description': init.get('description', 'Sin descripción')
+            }))
+
+    if stats.get('top_statuses'):
+        lines.append("📊 **DISTRIBUCIÓN POR ESTADOS:**")
+        statuses = stats['statuses']
+        for status, count in stats['top_statuses']:
+            lines.append(STATS_STATUS_ITEM.render({
+                'emoji': status_emoji(status), 'status': status,
+                'count': count, 'percentage': statuses.get(status, 0)
+            }))
+        lines.append("")
+
+    # Conteos exactos de calculate_statistics_fast; el porcentaje sale del mismo dict de stats
+    lines.append("👥 **DISTRIBUCIÓN POR EQUIPOS:**")
+    teams = stats['teams']
+    for team, count in list(stats['team_counts'].items())[:6]:
+        is_growth = team == "Growth"
+        lines.append(STATS_TEAM_ITEM.render({
+            'emoji': "🚀" if is_growth else "👥", 'emphasis': "**" if is_growth else "",
+            'team': team, 'count': count, 'percentage': teams[team]
+        }))
+
+    lines.append("\n👤 **TOP RESPONSABLES:**")
+    owners = stats['owners']
+    for owner, count in list(stats['owner_counts'].items())[:5]:
+        lines.append(STATS_OWNER_ITEM.render({
+            'owner': owner, 'count': count, 'percentage': owners[owner]
+        }))
+
+    metrics = stats.get('average_metrics')
+    if metrics:
+        lines.append(STATS_METRICS.render({field: metrics.get(field, 0)
+                                           for field in ('reach', 'impact', 'confidence', 'effort', 'score')}))
+
+    lines.append("\n💡 **RECOMENDACIONES GROWTH:**")
+    if growth_stats.get('total_growth_initiatives', 0) < 3:
+        lines.append("• ⚠️ Pocas iniciativas de Growth - Considerar más proyectos de crecimiento")
+    else:
+        lines.append("• ✅ Buen balance de iniciativas de Growth")
+
+    high_score_count = stats.get('priority_buckets', {}).get('high')
+    if high_score_count is None:
+        high_score_count = sum(1 for init in stats.get('top_initiatives_by_score', [])
+                               if init.get('score', 0) >= PRIORITY_THRESHOLDS['high'])
+    if high_score_count < 3:
+        lines.append("• ⚠️ Pocas iniciativas de alto impacto (Score ≥ 2.0)")
+    else:
+        lines.append("• ✅ Suficientes iniciativas de alto impacto")
+
+    return "\n".join(lines)
+
+def render_growth_analysis(total, growth_count, avg_score, high_count, top_growth):
+    """Análisis Growth del bot; top_growth son pares (score, registro) en orden de ranking"""
+    if not growth_count:
+        return GROWTH_EMPTY.render({'total': total})
+
+    parts = [GROWTH_HEADER.render({
+        'count': growth_count, 'total': total, 'percentage': growth_count / total * 100,
+        'avg': avg_score, 'high': high_count
+    })]
+    for position, (score, init) in enumerate(top_growth[:5], 1):
+        parts.append(GROWTH_ITEM.render({
+            'position': position, 'priority': priority_emoji(score), 'score': score,
+            'name': init.get('initiative_name', 'Sin nombre'),
+            'owner': init.get('owner', 'Sin owner'), 'portal': init.get('portal', 'Sin portal'),
+            'kpi': init.get('main_kpi', 'Sin KPI'),
+            'description': init.get('description', 'Sin descripción')[:100]
+        }))
+
+    parts.append("\n\n💡 **RECOMENDACIONES GROWTH:**\n")
+    if high_count == 0:
+        parts.append("• ⚠️ No hay iniciativas Growth de alta prioridad (Score ≥ 2.0)")
+    else:
+        parts.append(f"• ✅ {high_count} iniciativas Growth de alta prioridad - Ejecutar inmediatamente")
+    if avg_score < PRIORITY_THRESHOLDS['medium']:
+        parts.append("\n• ⚠️ Score promedio Growth bajo - Revisar estimaciones RICE")
+    else:
+        parts.append(f"\n• ✅ Score promedio Growth saludable: {avg_score:.2f}")
+    if growth_count < 3:
+        parts.append("\n• ⚠️ Pocas iniciativas Growth - Considerar más proyectos de crecimiento")
+    return "".join(parts)
+
+def render_wizard_summary(data, score, reach_pct, impact, confidence_pct, effort):
+    """Resumen del paso 7 del asistente antes de confirmar"""
+    return WIZARD_SUMMARY.render({
+        'score': score, 'priority': PRIORITY_LABELS[priority_emoji(score)],
+        'initiative_name': data['initiative_name'], 'owner': data['owner'], 'team': data['team'],
+        'portal': data['portal'], 'main_kpi': data.get('main_kpi', 'Ninguno'),
+        'reach_pct': reach_pct, 'impact': impact, 'impact_label': IMPACT_LABELS.get(impact, "Alto"),
+        'confidence_pct': confidence_pct, 'effort': effort
+    })
+
+def render_creation_success(data, score):
+    return WIZARD_CREATED.render({
+        'priority': priority_emoji(score), 'score': score,
+        'initiative_name': data['initiative_name'], 'owner': data['owner'], 'team': data['team'],
+        'portal': data['portal'], 'main_kpi': data.get('main_kpi', 'Ninguno'),
+        'reach_pct': data['reach'] * 100, 'impact': data['impact'],
+        'confidence_pct': data['confidence'] * 100, 'effort': data['effort']
+    })
+
+def render_whatif(result, movers=5):
+    """Resumen del simulador what-if para el bot"""
+    before, after = result['buckets']['before'], result['buckets']['after']
+    parts = [WHATIF_HEADER.render({
+        'filter': result['filter'], 'affected': result['affected'], 'total': result['total'],
+        'adjustments': ", ".join(f"{field} ×{factor:g}" for field, factor in result['adjustments'].items()),
+        'high_before': before['high'], 'high_after': after['high'],
+        'medium_before': before['medium'], 'medium_after': after['medium'],
+        'low_before': before['low'], 'low_after': after['low']
+    })]
+    if result['movers']:
+        parts.append("🔀 **Mayores cambios de posición:**")
+        for item in result['movers'][:movers]:
+            parts.append(WHATIF_ITEM.render({
+                'arrow': "⬆️" if item['rank_delta'] > 0 else "⬇️", 'name': item['initiative_name'] or 'Sin nombre',
+                'rank_before': item['rank_before'], 'rank_after': item['rank_after'],
+                'score_before': item['score_before'], 'score_after': item['score_after']
+            }))
+    if result['bucket_changes_count']:
+        parts.append(f"\n🏷️ **{result['bucket_changes_count']} iniciativas cambian de bucket**")
+    parts.append("\n🏆 **Nuevo top:**")
+    for position, item in enumerate(result['top'][:movers], 1):
+        parts.append(render_initiative_summary(item['initiative_name'] or 'Sin nombre', item['owner'] or 'Sin owner',
+                                               item['team'] or 'Sin equipo', item['score_after'], position))
+    parts.append(f"\n⚡ Simulado en {result['elapsed_ms']:.1f}ms sin tocar NocoDB")
+    return "\n".join(parts)
+
+def render_sprint_plan(result, per_team=8):
+    """Plan de sprint del planificador para el bot"""
+    parts = [PLAN_HEADER.render({
+        'statuses': ", ".join(result['candidate_statuses']), 'total_score': result['total_score'],
+        'selected': result['selected_count']
+    })]
+    for team, plan in result['teams'].items():
+        warning = " ⚠️ must-have excede capacidad" if plan['over_capacity'] else ""
+        if not plan['optimal']:
+            warning += " (mejor solución encontrada)"
+        parts.append(PLAN_TEAM.render({
+            'emoji': team_emoji(team), 'team': team, 'used': plan['used'], 'capacity': plan['capacity'],
+            'score': plan['total_score'], 'warning': warning
+        }))
+        if not plan['selected']:
+            parts.append("   Sin candidatas que quepan")
+        for item in plan['selected'][:per_team]:
+            parts.append(PLAN_ITEM.render({
+                'pin': "📌" if item['must_have'] else "", 'priority': priority_emoji(item['score']),
+                'name': item['initiative_name'] or 'Sin nombre', 'effort': item['effort'], 'score': item['score']
+            }))
+        if len(plan['selected']) > per_team:
+            parts.append(f"   … {len(plan['selected']) - per_team} más")
+    if result['unplanned_teams']:
+        parts.append(f"\nℹ️ Sin capacidad indicada: {', '.join(result['unplanned_teams'])}")
+    parts.append(f"\n⚡ Plan calculado en {result['elapsed_ms']:.1f}ms")
+    return "\n".join(parts)
+
+def render_duplicate_warning(matches):
+    """Aviso de posibles duplicados para el asistente de creación ('' si no hay)"""
+    if not matches:
+        return ""
+    lines = ["⚠️ **Posibles duplicados ya registrados:**"]
+    for match in matches:
+        lines.append(DUPLICATE_ITEM.render({
+            'emoji': status_emoji(match['status']), 'name': match['initiative_name'] or 'Sin nombre',
+            'status': match['status'] or 'Sin estado', 'team': match['team'] or 'Sin equipo',
+            'similarity': match['similarity'] * 100
+        }))
+    lines.append("💡 Revisa si ya existe antes de continuar (o escribe `cancelar`).")
+    return "\n".join(lines)
+
+# ===== CACHE POR SNAPSHOT =====
+def render_cached(report_type, version, build):
+    """Texto del reporte memoizado por (tipo, versión del snapshot); build() solo corre una vez por versión"""
+    return get_snapshot_view(f"report:{report_type}", build, version)
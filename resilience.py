@@ -0,0 +1,298 @@
+# 🛡️ resilience.py - Circuit Breakers, Retry y Timeouts Adaptativos v2.6
+import logging
+import random
+import threading
+import time
+from collections import deque
+import requests
+from config import *
+from metrics import registry, DEPENDENCY_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Timeout configurado (máximo) por dependencia externa
+DEPENDENCY_TIMEOUTS = {
+    'nocodb': NOCODB_TIMEOUT,
+    'groq': LLM_TIMEOUT,
+    'telegram': TELEGRAM_TIMEOUT
+}
+
+class CircuitOpenError(Exception):
+    """Se lanza cuando el circuito de una dependencia está abierto (fail fast)"""
+
+    def __init__(self, dependency, retry_after=0.0):
+        self.dependency = dependency
+        self.retry_after = retry_after
+        super().__init__(f"{dependency} circuit open - retry in {retry_after:.0f}s")
+
+class CircuitBreaker:
+    """Circuit breaker por dependencia: closed → open → half_open → closed"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None, half_open_max_calls=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or CIRCUIT_BREAKER_CONFIG['failure_threshold']
+        self.recovery_timeout = recovery_timeout or CIRCUIT_BREAKER_CONFIG['recovery_timeout']
+        self.half_open_max_calls = half_open_max_calls or CIRCUIT_BREAKER_CONFIG['half_open_max_calls']
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """True si la llamada puede salir hacia la dependencia"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.half_open_calls = 0
+                logger.info(f"🟡 Circuit {self.name} half-open - probing")
+            if self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+            return False
+
+    def retry_after(self):
+        """Segundos restantes antes de permitir una llamada de prueba"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.time() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"🟢 Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.half_open_calls = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"🔴 Circuit {self.name} open after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self.half_open_calls = 0
+
+    def is_open(self):
+        return self.state == self.OPEN and self.retry_after() > 0
+
+    def get_status(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1)
+        }
+
+class LatencyTracker:
+    """Ventana de latencias recientes para calcular timeouts adaptativos"""
+
+    def __init__(self, window_size=None):
+        self.samples = deque(maxlen=window_size or ADAPTIVE_TIMEOUT_CONFIG['window_size'])
+        self._lock = threading.Lock()
+
+    def record(self, duration):
+        with self._lock:
+            self.samples.append(duration)
+
+    def percentile(self, pct):
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def count(self):
+        return len(self.samples)
+
+circuit_breakers = {name: CircuitBreaker(name) for name in DEPENDENCY_TIMEOUTS}
+latency_trackers = {name: LatencyTracker() for name in DEPENDENCY_TIMEOUTS}
+
+_CIRCUIT_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+registry.gauge(
+    'saludia_circuit_state', 'Estado del circuito por dependencia (0=closed, 1=half_open, 2=open)', ['dependency'],
+    callback=lambda: {(name,): _CIRCUIT_STATE_VALUES[b.state] for name, b in circuit_breakers.items()})
+
+def get_circuit_breaker(dependency):
+    """Obtener (o crear) el circuit breaker de una dependencia"""
+    if dependency not in circuit_breakers:
+        circuit_breakers[dependency] = CircuitBreaker(dependency)
+        latency_trackers[dependency] = LatencyTracker()
+    return circuit_breakers[dependency]
+
+def get_adaptive_timeout(dependency):
+    """Timeout basado en el p95 observado, acotado por el timeout configurado"""
+    max_timeout = DEPENDENCY_TIMEOUTS.get(dependency, NOCODB_TIMEOUT)
+    tracker = latency_trackers.get(dependency)
+
+    if not ADAPTIVE_TIMEOUT_CONFIG['enabled'] or tracker is None:
+        return max_timeout
+    if tracker.count() < ADAPTIVE_TIMEOUT_CONFIG['min_samples']:
+        return max_timeout
+
+    p95 = tracker.percentile(95)
+    adaptive = p95 * ADAPTIVE_TIMEOUT_CONFIG['p95_multiplier']
+    return round(min(max_timeout, max(ADAPTIVE_TIMEOUT_CONFIG['min_timeout'], adaptive)), 2)
+
+def guarded_request(dependency, method, url, **kwargs):
+    """HTTP request protegido por circuit breaker y timeout adaptativo.
+
+    Lanza CircuitOpenError sin tocar la red si el circuito está abierto.
+    Errores de red, timeouts y HTTP 5xx cuentan como fallos.
+    """
+    breaker = get_circuit_breaker(dependency)
+    if not breaker.allow_request():
+        raise CircuitOpenError(dependency, breaker.retry_after())
+
+    timeout = kwargs.pop('timeout', None) or get_adaptive_timeout(dependency)
+    start_time = time.time()
+
+    try:
+        response = requests.request(method, url, timeout=timeout, **kwargs)
+    except requests.exceptions.Timeout:
+        latency_trackers[dependency].record(timeout)
+        DEPENDENCY_DURATION.observe(time.time() - start_time, dependency, 'timeout')
+        breaker.record_failure()
+        raise
+    except requests.exceptions.RequestException:
+        DEPENDENCY_DURATION.observe(time.time() - start_time, dependency, 'error')
+        breaker.record_failure()
+        raise
+
+    duration = time.time() - start_time
+    latency_trackers[dependency].record(duration)
+    if response.status_code >= 500:
+        DEPENDENCY_DURATION.observe(duration, dependency, 'error')
+        breaker.record_failure()
+    else:
+        DEPENDENCY_DURATION.observe(duration, dependency, 'ok')
+        breaker.record_success()
+    return response
+
+def guarded_stream(dependency, method, url, consume, chunk_size=64 * 1024, **kwargs):
+    """Como guarded_request, pero el body se descarga y procesa dentro de la protección.
+
+    consume(chunks) recibe el iterador de chunks del body (solo con status 200). El timeout
+    adaptativo limita el fetch completo y no solo cada lectura; los errores a mitad del body
+    (ChunkedEncodingError, ConnectionError, JSON truncado) cuentan como fallos del circuito;
+    la latencia registrada es la del fetch completo. La respuesta se cierra siempre.
+    Devuelve (response, resultado de consume o None si el status no es 200).
+    """
+    breaker = get_circuit_breaker(dependency)
+    if not breaker.allow_request():
+        raise CircuitOpenError(dependency, breaker.retry_after())
+
+    timeout = kwargs.pop('timeout', None) or get_adaptive_timeout(dependency)
+    start_time = time.time()
+    deadline = start_time + timeout
+
+    def chunks(response):
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if time.time() > deadline:
+                raise requests.exceptions.Timeout(f"{dependency} body not received within {timeout:.1f}s")
+            yield chunk
+
+    response = None
+    try:
+        response = requests.request(method, url, timeout=timeout, stream=True, **kwargs)
+        if response.status_code == 200:
+            result = consume(chunks(response))
+        else:
+            result = None
+            response.content  # cuerpo del error leído antes de cerrar (response.text sigue disponible)
+    except requests.exceptions.Timeout:
+        latency_trackers[dependency].record(timeout)
+        DEPENDENCY_DURATION.observe(time.time() - start_time, dependency, 'timeout')
+        breaker.record_failure()
+        raise
+    except Exception:
+        DEPENDENCY_DURATION.observe(time.time() - start_time, dependency, 'error')
+        breaker.record_failure()
+        raise
+    finally:
+        if response is not None:
+            response.close()
+
+    duration = time.time() - start_time
+    latency_trackers[dependency].record(duration)
+    if response.status_code >= 500:
+        DEPENDENCY_DURATION.observe(duration, dependency, 'error')
+        breaker.record_failure()
+    else:
+        DEPENDENCY_DURATION.observe(duration, dependency, 'ok')
+        breaker.record_success()
+    return response, result
+
+def compute_backoff_delay(attempt):
+    """Backoff exponencial con full jitter según RETRY_CONFIG (attempt empieza en 0)"""
+    delay = RETRY_CONFIG['base_delay'] * (RETRY_CONFIG['backoff_factor'] ** attempt)
+    return random.uniform(0, min(RETRY_CONFIG['max_delay'], delay))
+
+def retry_call(func, dependency=None, should_retry=None, max_attempts=None, deadline=None):
+    """Ejecutar func con reintentos y backoff exponencial con jitter.
+
+    should_retry(result) decide si un resultado (dict success/error) merece reintento.
+    Si el circuito de la dependencia está abierto se deja de reintentar (fail fast).
+    deadline limita el tiempo total en segundos.
+    Si se corta antes (circuito abierto, deadline) sin que ningún intento haya devuelto
+    resultado, se relanza la última excepción en vez de devolver None.
+    """
+    max_attempts = max_attempts or RETRY_CONFIG['max_attempts']
+    start_time = time.time()
+    result = None
+    has_result = False
+    last_error = None
+
+    for attempt in range(max_attempts):
+        try:
+            result = func()
+            has_result = True
+            if not should_retry or not should_retry(result):
+                return result
+            logger.warning(f"⚠️ Attempt {attempt + 1}/{max_attempts} failed: {result.get('error') if isinstance(result, dict) else result}")
+        except Exception as e:
+            logger.error(f"❌ Attempt {attempt + 1}/{max_attempts} exception: {e}")
+            if attempt == max_attempts - 1:
+                raise
+            last_error = e
+
+        if attempt == max_attempts - 1:
+            break
+        if dependency and get_circuit_breaker(dependency).is_open():
+            logger.warning(f"⚡ {dependency} circuit open - skipping retries")
+            break
+
+        delay = compute_backoff_delay(attempt)
+        if deadline is not None and time.time() - start_time + delay > deadline:
+            logger.warning(f"⏱️ Retry deadline of {deadline}s reached")
+            break
+        time.sleep(delay)
+
+    if not has_result and last_error is not None:
+        raise last_error
+    return result
+
+def get_resilience_status():
+    """Estado de circuitos y timeouts efectivos para /health"""
+    status = {}
+    for name, breaker in circuit_breakers.items():
+        tracker = latency_trackers[name]
+        p95 = tracker.percentile(95)
+        status[name] = {
+            **breaker.get_status(),
+            "timeout_seconds": get_adaptive_timeout(name),
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "samples": tracker.count()
+        }
+    return status
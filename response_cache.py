@@ -0,0 +1,95 @@
+# 🗃️ response_cache.py - Cache de Respuestas Pre-serializadas (JSON + gzip) v2.6
+import gzip
+import logging
+import threading
+from collections import OrderedDict
+from config import *
+from metrics import registry, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse:
+    """Cuerpo JSON ya codificado y, si vale la pena, su versión gzip"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'size')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.gzip_body = None
+        if len(body) >= RESPONSE_CACHE_CONFIG['gzip_min_bytes']:
+            compressed = gzip.compress(body, compresslevel=RESPONSE_CACHE_CONFIG['gzip_level'])
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+        self.size = len(body) + (len(self.gzip_body) if self.gzip_body else 0)
+
+class ResponseCache:
+    """LRU con presupuesto de bytes; las entradas pertenecen a una versión del snapshot.
+
+    Al cambiar la versión todas las entradas quedan obsoletas y se descartan de una vez.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.version = None
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.version = version
+
+    def get(self, version, key):
+        with self._lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        CACHE_REQUESTS.inc('responses', 'hit' if entry is not None else 'miss')
+        return entry
+
+    def put(self, version, key, body, etag):
+        entry = CachedResponse(body, etag)
+        if entry.size > self.max_bytes:
+            return entry  # Demasiado grande: se sirve pero no se guarda
+        with self._lock:
+            self._check_version(version)
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def get_status(self):
+        hits = CACHE_REQUESTS.get('responses', 'hit')
+        total = hits + CACHE_REQUESTS.get('responses', 'miss')
+        return {
+            "enabled": RESPONSE_CACHE_CONFIG['enabled'],
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "snapshot_version": self.version,
+            "hit_rate": round(hits / total, 3) if total else None
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_CONFIG['max_bytes'])
+
+registry.gauge('saludia_response_cache_bytes', 'Bytes ocupados por el cache de respuestas',
+               callback=lambda: response_cache.total_bytes)
+registry.gauge('saludia_response_cache_entries', 'Respuestas pre-serializadas en cache',
+               callback=lambda: len(response_cache.entries))
@@ -0,0 +1,123 @@
+# 📑 result_pages.py - Resultados Paginados del Bot (handles en servidor + teclado inline) v2.6
+import logging
+import math
+import secrets
+import threading
+from config import *
+from conversation_state import create_backend
+from serialization import snapshot_fingerprint
+from snapshot import get_records_by_id
+
+logger = logging.getLogger(__name__)
+
+class ResultPages:
+    """Handles de resultados: ids ordenados + versión del snapshot, compartidos entre workers.
+
+    Un comando guarda el orden de sus resultados una vez; los botones ⬅️/➡️ envían
+    "pg:<handle>:<página>" y la página se renderiza desde el snapshot en memoria, sin
+    volver a consultar NocoDB ni recalcular el ranking. Si el snapshot ya no es el del
+    listado (refresh o cache vacío) el handle expira: las páginas nunca mezclan versiones.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend(table='result_pages', ttl=RESULT_PAGES_CONFIG['ttl_seconds'])
+        return self._backend
+
+    def create(self, title, records, version, footer=None):
+        """Guardar un resultado y devolver (handle, resultado); el handle cabe en callback_data"""
+        handle = secrets.token_urlsafe(6)
+        result = {'title': title, 'ids': [r.get('id') for r in records], 'version': version,
+                  'fingerprint': snapshot_fingerprint(version), 'footer': footer}
+        self.backend.set(handle, result)
+        return handle, result
+
+    def get(self, handle):
+        return self.backend.get(handle)
+
+    def expire(self, handle):
+        return self.backend.delete(handle)
+
+    def snapshot_records(self, result):
+        """id -> registro del snapshot en memoria si sigue siendo el del listado; None si cambió.
+
+        No llama a get_initiatives: un cache vencido no dispara una consulta a NocoDB. La huella
+        del contenido permite servir la página desde otro worker (la versión es por proceso).
+        """
+        records, version = initiatives_cache["data"], initiatives_cache["version"]
+        if records is None:
+            return None
+        if result.get('fingerprint'):
+            if snapshot_fingerprint(version) != result['fingerprint']:
+                return None
+        elif version != result['version']:
+            return None
+        return get_records_by_id(records, version)
+
+    def page_count(self, result):
+        return max(1, math.ceil(len(result['ids']) / RESULT_PAGES_CONFIG['page_size']))
+
+    def keyboard(self, handle, page, pages):
+        """Teclado inline ⬅️ n/N ➡️ (el indicador central no cambia de página)"""
+        if pages <= 1:
+            return None
+        prefix = RESULT_PAGES_CONFIG['callback_prefix']
+        row = []
+        if page > 0:
+            row.append({"text": "⬅️ Anterior", "callback_data": f"{prefix}:{handle}:{page - 1}"})
+        row.append({"text": f"{page + 1}/{pages}", "callback_data": f"{prefix}:{handle}:-"})
+        if page < pages - 1:
+            row.append({"text": "Siguiente ➡️", "callback_data": f"{prefix}:{handle}:{page + 1}"})
+        return {"inline_keyboard": [row]}
+
+    def render(self, handle, result, page, records_by_id, format_item):
+        """(texto, teclado) de una página; los ids que ya no existen en el snapshot se omiten"""
+        pages = self.page_count(result)
+        page = min(max(page, 0), pages - 1)
+        size = RESULT_PAGES_CONFIG['page_size']
+        start = page * size
+
+        lines = [f"{result['title']} ({len(result['ids'])} encontradas)\n"]
+        for position, initiative_id in enumerate(result['ids'][start:start + size], start + 1):
+            record = records_by_id.get(initiative_id)
+            if record is None:
+                lines.append(f"{position}. 🗑️ _Iniciativa {initiative_id} ya no está disponible_\n")
+                continue
+            try:
+                lines.append(f"{format_item(record, position)}\n")
+            except Exception as e:
+                logger.warning(f"Error formatting initiative {position}: {e}")
+                lines.append(f"{position}. ❌ **Error formateando iniciativa**\n")
+
+        lines.append(f"📄 Página {page + 1}/{pages}")
+        if result.get('footer'):
+            lines.append(result['footer'])
+        text = "\n".join(lines)
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[:MAX_MESSAGE_LENGTH - 3] + "..."
+        return text, self.keyboard(handle, page, pages)
+
+    def publish(self, title, records, version, format_item, footer=None):
+        """Guardar el resultado y renderizar su primera página: (texto, teclado)"""
+        handle, result = self.create(title, records, version, footer)
+        first_page = {r.get('id'): r for r in records[:RESULT_PAGES_CONFIG['page_size']]}
+        return self.render(handle, result, 0, first_page, format_item)
+
+result_pages = ResultPages()
+
+def parse_page_callback(args):
+    """'<handle>:<página>' -> (handle, página o None para el indicador)"""
+    handle, _, page = args.partition(':')
+    if not handle:
+        return None, None
+    try:
+        return handle, int(page)
+    except ValueError:
+        return handle, None
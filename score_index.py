@@ -0,0 +1,391 @@
+# 🏆 score_index.py - Índice de Orden Estadístico por Score RICE (Top-K, Rangos, Percentiles) v2.6
+import logging
+import math
+import random
+import threading
+from config import *
+from database import calculate_score_fast, register_refresh_listener
+
+logger = logging.getLogger(__name__)
+
+# Partición global; el resto de particiones son por equipo (en minúsculas)
+ALL_TEAMS = '*'
+
+# Umbrales de prioridad usados por el bot (🔥 alta, ⭐ media)
+PRIORITY_THRESHOLDS = {'high': 2.0, 'medium': 1.0}
+
+# Si cambia más de esta fracción del snapshot se reconstruye en vez de aplicar el diff
+REBUILD_RATIO = 0.25
+
+_INF = float('inf')
+
+class _Node:
+    __slots__ = ('key', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, key, priority):
+        self.key = key
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.size = 1
+
+def _size(node):
+    return node.size if node is not None else 0
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+def _split(node, key):
+    """Separar en (claves < key, claves >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+def _merge(left, right):
+    """Unir dos treaps donde todas las claves de left < claves de right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+def _remove(node, key):
+    if node is None:
+        return None, False
+    if key == node.key:
+        return _merge(node.left, node.right), True
+    if key < node.key:
+        node.left, removed = _remove(node.left, key)
+    else:
+        node.right, removed = _remove(node.right, key)
+    if removed:
+        _update(node)
+    return node, removed
+
+class OrderStatisticTree:
+    """Treap con tamaños de subárbol: insert/remove/rank/kth en O(log N) esperado.
+
+    Las claves son (-score, id): el orden ascendente es el ranking por score descendente
+    con desempate estable por id.
+    """
+
+    def __init__(self, keys=None):
+        self.root = None
+        self.total = 0.0  # suma de scores (promedios en O(1))
+        if keys:
+            self._build(sorted(keys))
+
+    def __len__(self):
+        return _size(self.root)
+
+    def _build(self, keys):
+        # Árbol cartesiano en O(N) sobre claves ordenadas con prioridades aleatorias
+        stack = []
+        for key in keys:
+            node = _Node(key, random.random())
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self.root = stack[0] if stack else None
+        self.total = sum(-key[0] for key in keys)
+        self._fix_sizes()
+
+    def _fix_sizes(self):
+        # Post-orden iterativo: el árbol construido puede ser profundo en el peor caso
+        pending = [(self.root, False)] if self.root is not None else []
+        while pending:
+            node, children_done = pending.pop()
+            if children_done:
+                _update(node)
+                continue
+            pending.append((node, True))
+            for child in (node.left, node.right):
+                if child is not None:
+                    pending.append((child, False))
+
+    def insert(self, key):
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key, random.random())), right)
+        self.total += -key[0]
+
+    def remove(self, key):
+        self.root, removed = _remove(self.root, key)
+        if removed:
+            self.total -= -key[0]
+        return removed
+
+    def count_less(self, key):
+        """Cantidad de claves estrictamente menores que key"""
+        node, count = self.root, 0
+        while node is not None:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def kth(self, k):
+        """Clave en la posición k (0 = mayor score)"""
+        node = self.root
+        while node is not None:
+            left = _size(node.left)
+            if k < left:
+                node = node.left
+            elif k == left:
+                return node.key
+            else:
+                k -= left + 1
+                node = node.right
+        raise IndexError(k)
+
+    def iter_keys(self, limit=None):
+        """Recorrido en orden de las primeras `limit` claves: O(log N + limit)"""
+        stack, node, emitted = [], self.root, 0
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if limit is not None and emitted >= limit:
+                return
+            yield node.key
+            emitted += 1
+            node = node.right
+
+class ScoreIndex:
+    """Índice de orden estadístico sobre calculate_score_fast, global y por equipo.
+
+    Se mantiene al día con el diff entre snapshots (altas, bajas y cambios de score o
+    equipo) en vez de reordenar todo; los registros sin id no se indexan.
+    """
+
+    def __init__(self):
+        self.trees = {ALL_TEAMS: OrderStatisticTree()}
+        self.entries = {}  # id -> (clave, equipo, registro)
+        self.version = None
+        self.last_update = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _entry_for(record):
+        score = calculate_score_fast(record)
+        team = str(record.get('team') or '').strip().lower()
+        return (-score, record.get('id')), team
+
+    def _tree(self, team):
+        tree = self.trees.get(team)
+        if tree is None:
+            tree = self.trees[team] = OrderStatisticTree()
+        return tree
+
+    def rebuild(self, records, version=None):
+        """Construcción completa O(N log N) (un solo sort por partición)"""
+        with self._lock:
+            entries, by_team = {}, {ALL_TEAMS: []}
+            for record in records or []:
+                if not isinstance(record, dict) or record.get('id') is None:
+                    continue
+                key, team = self._entry_for(record)
+                previous = entries.get(key[1])
+                if previous is not None:
+                    by_team[ALL_TEAMS].remove(previous[0])
+                    by_team[previous[1]].remove(previous[0])
+                entries[key[1]] = (key, team, record)
+                by_team[ALL_TEAMS].append(key)
+                by_team.setdefault(team, []).append(key)
+            self.trees = {team: OrderStatisticTree(keys) for team, keys in by_team.items()}
+            self.entries = entries
+            self.version = version
+            self.last_update = {"mode": "rebuild", "size": len(entries), "version": version}
+            return self.last_update
+
+    def upsert(self, record):
+        """Alta o actualización de un registro en O(log N)"""
+        with self._lock:
+            key, team = self._entry_for(record)
+            previous = self.entries.get(key[1])
+            if previous is not None:
+                if previous[0] == key and previous[1] == team:
+                    self.entries[key[1]] = (key, team, record)
+                    return False
+                self._detach(previous)
+            self.trees[ALL_TEAMS].insert(key)
+            self._tree(team).insert(key)
+            self.entries[key[1]] = (key, team, record)
+            return True
+
+    def remove(self, initiative_id):
+        with self._lock:
+            previous = self.entries.pop(initiative_id, None)
+            if previous is None:
+                return False
+            self._detach(previous)
+            return True
+
+    def _detach(self, entry):
+        key, team, _ = entry
+        self.trees[ALL_TEAMS].remove(key)
+        tree = self.trees.get(team)
+        if tree is not None:
+            tree.remove(key)
+            if not len(tree):
+                del self.trees[team]
+
+    def apply_snapshot(self, records, version=None):
+        """Aplicar un snapshot nuevo como diff: O(N) de comparación + O(cambios · log N)"""
+        with self._lock:
+            if records is None:
+                # Cache vaciado: se conservan las entradas para aplicar el próximo snapshot como diff
+                self.version = version
+                self.last_update = {"mode": "stale", "size": len(self.entries), "version": version}
+                return self.last_update
+
+            if not self.entries:
+                return self.rebuild(records, version)
+
+            seen, changed = set(), []
+            for record in records:
+                if not isinstance(record, dict) or record.get('id') is None:
+                    continue
+                key, team = self._entry_for(record)
+                seen.add(key[1])
+                previous = self.entries.get(key[1])
+                if previous is not None and previous[0] == key and previous[1] == team:
+                    self.entries[key[1]] = (key, team, record)  # mismo orden: solo refrescar datos
+                else:
+                    changed.append(record)
+            removed = [initiative_id for initiative_id in self.entries if initiative_id not in seen]
+
+            if len(changed) + len(removed) > REBUILD_RATIO * max(len(seen), 1):
+                return self.rebuild(records, version)
+
+            for initiative_id in removed:
+                self.remove(initiative_id)
+            for record in changed:
+                self.upsert(record)
+            self.version = version
+            self.last_update = {"mode": "incremental", "upserted": len(changed), "removed": len(removed),
+                                "size": len(self.entries), "version": version}
+            return self.last_update
+
+    # ===== CONSULTAS =====
+
+    def size(self, team=None):
+        tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+        return len(tree) if tree is not None else 0
+
+    def score_sum(self, team=None):
+        tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+        return tree.total if tree is not None else 0.0
+
+    def average(self, team=None):
+        size = self.size(team)
+        return self.score_sum(team) / size if size else 0.0
+
+    def top_k(self, k, team=None):
+        """Los k registros de mayor score (desempate por id)"""
+        with self._lock:
+            tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+            if tree is None or k <= 0:
+                return []
+            return [self.entries[key[1]][2] for key in tree.iter_keys(k)]
+
+    def count_at_least(self, threshold, team=None):
+        """Cantidad de iniciativas con score >= threshold"""
+        with self._lock:
+            tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+            return tree.count_less((-threshold, _INF)) if tree is not None else 0
+
+    def count_above(self, threshold, team=None):
+        """Cantidad de iniciativas con score > threshold"""
+        with self._lock:
+            tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+            return tree.count_less((-threshold, -_INF)) if tree is not None else 0
+
+    def count_between(self, low, high, team=None):
+        """Cantidad con low <= score <= high"""
+        if high < low:
+            return 0
+        return self.count_at_least(low, team) - self.count_above(high, team)
+
+    def priority_buckets(self, team=None):
+        """Conteo por prioridad (🔥 >= 2.0, ⭐ >= 1.0, 📋 resto) sin recorrer registros"""
+        high = self.count_at_least(PRIORITY_THRESHOLDS['high'], team)
+        medium = self.count_at_least(PRIORITY_THRESHOLDS['medium'], team) - high
+        return {"high": high, "medium": medium, "low": self.size(team) - high - medium}
+
+    def rank(self, initiative_id, team=None):
+        """Posición 1-based de la iniciativa en el ranking (None si no está indexada)"""
+        with self._lock:
+            entry = self.entries.get(initiative_id)
+            if entry is None:
+                return None
+            key, entry_team, _ = entry
+            if team and team.lower() != entry_team:
+                return None
+            return self.trees[team.lower() if team else ALL_TEAMS].count_less(key) + 1
+
+    def percentile(self, p, team=None):
+        """Score del percentil p (0-100, método nearest-rank)"""
+        with self._lock:
+            tree = self.trees.get(team.lower() if team else ALL_TEAMS)
+            if tree is None or not len(tree):
+                return None
+            n = len(tree)
+            ascending_position = max(math.ceil(min(max(p, 0), 100) / 100 * n), 1) - 1
+            return -tree.kth(n - 1 - ascending_position)[0]
+
+    def percentile_of(self, initiative_id, team=None):
+        """Porcentaje de iniciativas con score estrictamente menor"""
+        with self._lock:
+            entry = self.entries.get(initiative_id)
+            size = self.size(team)
+            if entry is None or not size:
+                return None
+            if team and team.lower() != entry[1]:
+                return None
+            below = size - self.count_at_least(-entry[0][0], team)
+            return round(below / size * 100, 2)
+
+    def get_status(self):
+        return {"size": len(self.entries), "teams": len(self.trees) - 1,
+                "snapshot_version": self.version, "last_update": self.last_update}
+
+score_index = ScoreIndex()
+
+def _on_snapshot_refresh(previous, current, version):
+    score_index.apply_snapshot(current, version)
+
+register_refresh_listener(_on_snapshot_refresh)
+
+def get_score_index(records=None):
+    """Índice sincronizado con el snapshot actual.
+
+    Si se pasa una lista que no es el snapshot cacheado devuelve None (el llamador
+    debe usar su propio cálculo sobre esa lista).
+    """
+    current = initiatives_cache["data"]
+    if records is not None and records is not current:
+        return None
+    if current is None:
+        return None
+    if score_index.version != initiatives_cache["version"]:
+        score_index.apply_snapshot(current, initiatives_cache["version"])
+    return score_index
@@ -0,0 +1,169 @@
+# 🧬 serialization.py - Proyección de Campos, Encoding Compacto, JSON Rápido y Respuestas Cacheadas v2.6
+import hashlib
+import json
+import logging
+import threading
+from config import *
+from response_cache import response_cache
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Campos proyectables en las respuestas /api/initiatives*
+API_FIELDS = ['id', 'initiative_name', 'description', 'owner', 'team', 'portal', 'main_kpi',
+              'reach', 'impact', 'confidence', 'effort', 'status', 'must_have', 'score', 'calculated_score']
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+JSON_BACKENDS = {'stdlib': _stdlib_dumps}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = _orjson_dumps
+
+def register_json_backend(name, dumps):
+    """Registrar un serializador: dumps(obj) -> bytes"""
+    JSON_BACKENDS[name] = dumps
+
+def get_json_backend():
+    """Nombre del backend activo según SERIALIZATION_CONFIG['json_backend'] (auto = el más rápido disponible)"""
+    configured = SERIALIZATION_CONFIG['json_backend']
+    if configured in JSON_BACKENDS:
+        return configured
+    if configured != 'auto':
+        logger.warning(f"⚠️ JSON backend '{configured}' not available - using auto")
+    return 'orjson' if 'orjson' in JSON_BACKENDS else 'stdlib'
+
+def dumps(obj):
+    """Serializar a bytes JSON con el backend activo"""
+    return JSON_BACKENDS[get_json_backend()](obj)
+
+def parse_fields_param(raw_fields, allowed=API_FIELDS):
+    """?fields=a,b,c -> (campos válidos en el orden pedido, campos inválidos)"""
+    if not raw_fields:
+        return None, []
+    requested = [f.strip() for f in raw_fields.split(',') if f.strip()]
+    return [f for f in requested if f in allowed], [f for f in requested if f not in allowed]
+
+def project_records(records, fields=None, compact=False):
+    """Aplicar proyección y, opcionalmente, encoding compacto (encabezado + filas como arrays)"""
+    if compact:
+        fields = fields or API_FIELDS
+        return {"fields": fields, "rows": [[r.get(f) for f in fields] for r in records]}
+    if fields:
+        return [{f: r.get(f) for f in fields} for r in records]
+    return records
+
+_fingerprint = {"version": None, "token": None}
+_fingerprint_lock = threading.Lock()
+
+def snapshot_fingerprint(version):
+    """Huella del contenido del snapshot, calculada una vez por versión.
+
+    La versión es un contador por proceso (vuelve a 0 al reiniciar y difiere entre workers de
+    gunicorn); la huella solo depende de los datos. None si version ya no es la cacheada.
+    """
+    with _fingerprint_lock:
+        if _fingerprint["version"] == version:
+            return _fingerprint["token"]
+    records = initiatives_cache["data"]
+    if records is None or initiatives_cache["version"] != version:
+        return None
+    token = hashlib.sha1(dumps(records)).hexdigest()[:16]
+    with _fingerprint_lock:
+        _fingerprint["version"], _fingerprint["token"] = version, token
+    return token
+
+def make_etag(fingerprint, key):
+    """ETag débil derivado del contenido del snapshot y la URL (ruta + query)"""
+    digest = hashlib.sha1(f"{fingerprint}:{key}".encode('utf-8')).hexdigest()[:16]
+    return f'W/"{fingerprint}-{digest}"'
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    bare = etag[2:] if etag.startswith('W/') else etag
+    return any(c == etag or c == bare or (c.startswith('W/') and c[2:] == bare) for c in candidates)
+
+def json_response(payload, status=200, etag=None):
+    """Response Flask con el cuerpo ya serializado por el backend rápido"""
+    from flask import Response
+
+    response = Response(dumps(payload), status=status, mimetype='application/json')
+    if etag:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified_response(etag):
+    from flask import Response
+
+    response = Response(status=304)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def cached_json_response(entry, cache_status):
+    """Servir una respuesta pre-serializada, comprimida si el cliente acepta gzip"""
+    from flask import Response, request
+
+    use_gzip = entry.gzip_body is not None and 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    response = Response(entry.gzip_body if use_gzip else entry.body, mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['ETag'] = entry.etag
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def snapshot_json_response(version, build_payload, records_key='data'):
+    """Respuesta condicional y cacheada para datos derivados del snapshot.
+
+    Si If-None-Match coincide con el ETag de (contenido del snapshot, URL) responde 304 sin
+    llamar a build_payload ni serializar. Si la misma URL ya se sirvió en esta versión se
+    devuelven los bytes guardados. Si no, aplica ?fields= y ?compact=1 sobre payload[records_key].
+    """
+    from flask import request
+
+    fields, invalid = parse_fields_param(request.args.get('fields'))
+    if invalid:
+        return json_response({"error": f"Campos inválidos: {', '.join(invalid)}", "valid_fields": API_FIELDS}, 400)
+
+    key = request.full_path
+    fingerprint = snapshot_fingerprint(version)
+    etag = make_etag(fingerprint, key) if fingerprint else None
+    if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+        return not_modified_response(etag)
+
+    # Sin huella (el snapshot cambió durante el request) se responde sin ETag ni cache
+    use_cache = RESPONSE_CACHE_CONFIG['enabled'] and etag is not None
+    if use_cache:
+        entry = response_cache.get(version, key)
+        if entry is not None:
+            return cached_json_response(entry, 'HIT')
+
+    payload = build_payload()
+    if isinstance(payload, tuple):
+        # Errores de la vista (payload, status): sin ETag ni cache
+        return json_response(payload[0], payload[1])
+    if not payload.get("success", True):
+        return json_response(payload)
+
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+    if (fields or compact) and isinstance(payload.get(records_key), list):
+        payload = dict(payload)
+        payload[records_key] = project_records(payload[records_key], fields, compact)
+
+    if not use_cache:
+        return json_response(payload, etag=etag)
+    return cached_json_response(response_cache.put(version, key, dumps(payload), etag), 'MISS')
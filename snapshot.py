@@ -0,0 +1,123 @@
+# 📸 snapshot.py - Vistas Derivadas del Snapshot y Paginación por Cursor v2.6
+import base64
+import json
+import logging
+import threading
+from bisect import bisect_right
+from config import *
+from database import get_initiatives
+
+logger = logging.getLogger(__name__)
+
+# Campos numéricos por los que se puede ordenar la paginación
+SORTABLE_FIELDS = ['score', 'reach', 'impact', 'confidence', 'effort', 'id']
+
+_views = {}
+_views_version = None
+_views_lock = threading.Lock()
+
+class InvalidCursorError(ValueError):
+    """Cursor malformado o que no corresponde a los parámetros del request"""
+
+def get_snapshot():
+    """Snapshot completo cacheado: (resultado de get_initiatives, versión)"""
+    data = get_initiatives()
+    return data, initiatives_cache["version"]
+
+def get_snapshot_view(name, builder, version=None):
+    """Vista derivada (ranking, índice, agregado) memoizada por versión del snapshot.
+
+    builder() solo se ejecuta una vez por versión; al cambiar la versión se descartan todas.
+    """
+    global _views_version
+    version = initiatives_cache["version"] if version is None else version
+    with _views_lock:
+        if _views_version != version:
+            _views.clear()
+            _views_version = version
+        view = _views.get(name)
+    if view is not None:
+        return view
+
+    view = builder()
+    with _views_lock:
+        if _views_version == version:
+            _views[name] = view
+    return view
+
+def status_filter_key(status_filter):
+    """Clave estable de un filtro de estados (para nombres de vistas y cursores)"""
+    return ",".join(sorted(status_filter)) if status_filter else "all"
+
+def get_ranked_view(initiatives, sort_field='score', descending=True, status_filter=None, version=None):
+    """Ranking global (filtrado por estado) ordenado por sort_field con desempate por id.
+
+    Devuelve (registros ordenados, claves de orden) para slicing O(page_size) y bisect.
+    """
+    name = f"ranked:{sort_field}:{'desc' if descending else 'asc'}:{status_filter_key(status_filter)}"
+
+    def build():
+        wanted = set(status_filter) if status_filter else None
+        rows = [r for r in initiatives if wanted is None or r.get('status') in wanted]
+        sign = -1 if descending else 1
+        rows.sort(key=lambda r: (sign * (r.get(sort_field) or 0), r.get('id') or 0))
+        keys = [(sign * (r.get(sort_field) or 0), r.get('id') or 0) for r in rows]
+        return rows, keys
+
+    return get_snapshot_view(name, build, version)
+
+def get_records_by_id(initiatives, version=None):
+    """Índice id -> registro del snapshot (para renderizar resultados guardados como ids)"""
+    return get_snapshot_view('records_by_id', lambda: {r.get('id'): r for r in initiatives}, version)
+
+def encode_cursor(version, sort_field, descending, status_filter, record, position):
+    """Cursor opaco: versión del snapshot + último (valor, id) + posición"""
+    payload = [version, sort_field, 1 if descending else 0, status_filter_key(status_filter),
+               record.get(sort_field) or 0, record.get('id') or 0, position]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, sort_field, descending, status_key, value, last_id, position = json.loads(raw)
+        return {
+            "version": int(version), "sort": sort_field, "descending": bool(descending),
+            "status_key": status_key, "value": value, "id": last_id, "position": int(position)
+        }
+    except Exception:
+        raise InvalidCursorError("Cursor inválido")
+
+def paginate_ranked(rows, keys, page_size, cursor=None, version=None, sort_field='score',
+                    descending=True, status_filter=None):
+    """Página siguiente al cursor en O(page_size).
+
+    Si el snapshot no cambió la posición del cursor se usa directamente; si cambió,
+    se relocaliza con bisect sobre (valor, id) para no repetir ni saltar elementos.
+    """
+    start = 0
+    if cursor:
+        position = cursor["position"]
+        if (cursor["version"] == version and 0 < position <= len(rows)
+                and rows[position - 1].get('id') == cursor["id"]):
+            start = position
+        else:
+            sign = -1 if descending else 1
+            start = bisect_right(keys, (sign * (cursor["value"] or 0), cursor["id"] or 0))
+
+    page = rows[start:start + page_size]
+    end = start + len(page)
+    has_next = end < len(rows)
+    next_cursor = None
+    if has_next and page:
+        next_cursor = encode_cursor(version, sort_field, descending, status_filter, page[-1], end)
+
+    return page, {
+        "page_size": page_size,
+        "start": start,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
+        "sort": sort_field,
+        "order": "desc" if descending else "asc",
+        "snapshot_version": version
+    }
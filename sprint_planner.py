@@ -0,0 +1,227 @@
+# 🗓️ sprint_planner.py - Planificador de Sprints por Capacidad (knapsack sobre score RICE) v2.6
+import logging
+import math
+import time
+from bisect import bisect_right
+from operator import lt
+from config import *
+from database import calculate_score_fast, safe_get_value
+
+logger = logging.getLogger(__name__)
+
+def _units(effort):
+    """Esfuerzo en sprints -> unidades enteras (redondeo hacia arriba para no exceder la capacidad)"""
+    resolution = SPRINT_PLANNER_CONFIG['effort_resolution']
+    if effort is None or effort <= 0:
+        effort = 1.0  # misma guarda que calculate_score_fast
+    return max(1, math.ceil(effort / resolution - 1e-9))
+
+# ===== MOTORES KNAPSACK 0/1 =====
+def knapsack_dp(values, weights, capacity):
+    """Programación dinámica O(n·C) con operaciones por item en C (map/slices).
+
+    Devuelve (valor, índices elegidos, True). Por cada item se guarda un bytes con
+    las capacidades en que conviene tomarlo, para reconstruir la solución al final.
+    """
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for value, weight in zip(values, weights):
+        if weight > capacity:
+            taken.append(None)
+            continue
+        keep = best[weight:]
+        with_item = list(map(value.__add__, best[:capacity + 1 - weight]))
+        taken.append(bytes(map(lt, keep, with_item)))
+        best[weight:] = map(max, keep, with_item)
+
+    chosen, remaining = [], capacity
+    for i in range(len(values) - 1, -1, -1):
+        flags = taken[i]
+        if flags is not None and remaining >= weights[i] and flags[remaining - weights[i]]:
+            chosen.append(i)
+            remaining -= weights[i]
+    chosen.reverse()
+    return best[capacity], chosen, True
+
+def knapsack_branch_and_bound(values, weights, capacity, node_limit):
+    """Branch-and-bound en profundidad con cota de relajación fraccional (Dantzig).
+
+    Items por densidad descendente; la cota usa sumas prefijas + bisect (O(log n) por nodo).
+    Si se agota node_limit devuelve la mejor solución encontrada con optimal=False.
+    """
+    order = sorted((i for i in range(len(values)) if weights[i] <= capacity and values[i] > 0),
+                   key=lambda i: values[i] / weights[i], reverse=True)
+    v = [values[i] for i in order]
+    w = [weights[i] for i in order]
+    n = len(order)
+    prefix_v, prefix_w = [0.0], [0]
+    for value, weight in zip(v, w):
+        prefix_v.append(prefix_v[-1] + value)
+        prefix_w.append(prefix_w[-1] + weight)
+
+    def bound(i, cap):
+        # Items i..j-1 caben completos; el item j entra fraccionado
+        j = bisect_right(prefix_w, prefix_w[i] + cap, i) - 1
+        total = prefix_v[j] - prefix_v[i]
+        if j < n:
+            total += v[j] * (cap - (prefix_w[j] - prefix_w[i])) / w[j]
+        return total
+
+    # Solución inicial greedy por densidad
+    best_value, best_set, cap = 0.0, [], capacity
+    for i in range(n):
+        if w[i] <= cap:
+            cap -= w[i]
+            best_value += v[i]
+            best_set.append(i)
+
+    nodes, optimal = 0, True
+    stack = [(0, capacity, 0.0, ())]  # (siguiente item, capacidad restante, valor, elegidos)
+    while stack:
+        i, cap, value, chosen = stack.pop()
+        nodes += 1
+        if nodes > node_limit:
+            optimal = False
+            break
+        while i < n and w[i] > cap:
+            i += 1
+        if i == n:
+            if value > best_value:
+                best_value, best_set = value, list(chosen)
+            continue
+        if value + bound(i, cap) <= best_value + 1e-9:
+            continue
+        stack.append((i + 1, cap, value, chosen))  # sin el item
+        stack.append((i + 1, cap - w[i], value + v[i], chosen + (i,)))  # con el item (se explora primero)
+
+    return best_value, sorted(order[i] for i in best_set), optimal
+
+def solve_knapsack(values, weights, capacity):
+    """Branch-and-bound; si agota sus nodos y n·C cabe en dp_cell_limit, DP exacta.
+
+    -> (valor, elegidos, motor, óptimo)
+    """
+    if capacity <= 0 or not values:
+        return 0.0, [], 'none', True
+    value, chosen, optimal = knapsack_branch_and_bound(values, weights, capacity,
+                                                       SPRINT_PLANNER_CONFIG['bnb_node_limit'])
+    if optimal:
+        return value, chosen, 'branch_and_bound', True
+    if len(values) * capacity <= SPRINT_PLANNER_CONFIG['dp_cell_limit']:
+        value, chosen, optimal = knapsack_dp(values, weights, capacity)
+        return value, chosen, 'dp', optimal
+    return value, chosen, 'branch_and_bound', False
+
+# ===== PLANIFICADOR =====
+def _summary(record, score):
+    return {
+        "id": record.get('id'),
+        "initiative_name": record.get('initiative_name'),
+        "owner": record.get('owner'),
+        "status": record.get('status'),
+        "effort": safe_get_value(record, 'effort', 1.0, float),
+        "score": score,
+        "must_have": bool(record.get('must_have'))
+    }
+
+def parse_capacity(spec, teams):
+    """{'Growth': 3} o número (igual para todos los equipos) -> {equipo real: capacidad en sprints}"""
+    by_lower = {team.lower(): team for team in teams}
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        spec = {team: spec for team in teams}
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("capacity debe ser un número o un objeto {equipo: sprints}")
+    capacity = {}
+    for team, value in spec.items():
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Capacidad inválida para {team}: {value}")
+        if value < 0:
+            raise ValueError(f"Capacidad negativa para {team}")
+        capacity[by_lower.get(str(team).strip().lower(), str(team).strip())] = value
+    return capacity
+
+def plan_sprints(records, capacity, must_have=None, version=None):
+    """Elegir, por equipo, las iniciativas candidatas que maximizan el score total sin exceder la capacidad.
+
+    Candidatas: estados SPRINT_PLANNER_CONFIG['candidate_statuses']. Las must_have (campo del
+    registro o ids en must_have) entran siempre y consumen capacidad antes de optimizar.
+    """
+    started = time.perf_counter()
+    candidate_statuses = set(SPRINT_PLANNER_CONFIG['candidate_statuses'])
+    forced_ids = set(must_have or ())
+
+    by_team = {}
+    for record in records:
+        if record.get('status') in candidate_statuses:
+            by_team.setdefault(str(record.get('team') or 'Sin equipo'), []).append(record)
+
+    try:
+        capacity = parse_capacity(capacity, by_team) if capacity is not None else \
+            {team: SPRINT_PLANNER_CONFIG['default_team_capacity'] for team in by_team}
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    resolution = SPRINT_PLANNER_CONFIG['effort_resolution']
+    teams, total_score, selected_count = {}, 0.0, 0
+    for team, team_capacity in capacity.items():
+        candidates = by_team.get(team, [])
+        units = int(math.floor(team_capacity / resolution + 1e-9))
+
+        forced, optional = [], []
+        for record in candidates:
+            score = calculate_score_fast(record)
+            if record.get('must_have') or record.get('id') in forced_ids:
+                forced.append((record, score))
+            elif score > 0:
+                optional.append((record, score))
+
+        used = sum(_units(safe_get_value(r, 'effort', 1.0, float)) for r, _ in forced)
+        values = [score for _, score in optional]
+        weights = [_units(safe_get_value(r, 'effort', 1.0, float)) for r, _ in optional]
+        value, chosen, engine, optimal = solve_knapsack(values, weights, max(units - used, 0))
+
+        selected = [_summary(r, score) for r, score in forced] + [_summary(*optional[i]) for i in chosen]
+        selected.sort(key=lambda item: (-item['score'], item['id'] or 0))
+        used += sum(weights[i] for i in chosen)
+        team_score = round(sum(score for _, score in forced) + value, 4)
+        teams[team] = {
+            "capacity": team_capacity,
+            "used": round(used * resolution, 4),
+            "over_capacity": used > units,
+            "candidates": len(candidates),
+            "must_have": len(forced),
+            "total_score": team_score,
+            "engine": engine,
+            "optimal": optimal,
+            "selected": selected
+        }
+        total_score += team_score
+        selected_count += len(selected)
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(f"🗓️ Sprint plan: {selected_count} iniciativas, {len(teams)} equipos en {elapsed_ms:.1f}ms")
+    return {
+        "success": True,
+        "candidate_statuses": SPRINT_PLANNER_CONFIG['candidate_statuses'],
+        "teams": teams,
+        "total_score": round(total_score, 4),
+        "selected_count": selected_count,
+        "unplanned_teams": sorted(set(by_team) - set(capacity)),
+        "snapshot_version": version,
+        "elapsed_ms": elapsed_ms
+    }
+
+def parse_plan_command(args):
+    """'growth=3 product=2.5' -> {equipo: capacidad}; '3' -> 3.0 para todos; vacío -> None (default)"""
+    args = (args or '').strip()
+    if not args:
+        return None
+    if '=' not in args:
+        return float(args.replace(',', '.'))
+    capacity = {}
+    for part in args.split():
+        team, _, value = part.partition('=')
+        capacity[team] = float(value.replace(',', '.'))
+    return capacity
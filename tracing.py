@@ -0,0 +1,224 @@
+# 🔬 tracing.py - Span Tracing por Request y Profiler de Muestreo v2.6
+import contextvars
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import wraps
+from config import *
+
+logger = logging.getLogger(__name__)
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_trace_ids = itertools.count(1)
+_traces = deque(maxlen=TRACE_CONFIG['buffer_size'])
+_traces_lock = threading.Lock()
+
+class Trace:
+    """Trace de un request/update: lista plana de spans con profundidad"""
+
+    __slots__ = ('trace_id', 'name', 'attrs', 'started_at', 'start', 'duration_ms', 'spans', 'depth')
+
+    def __init__(self, name, **attrs):
+        self.trace_id = next(_trace_ids)
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.depth = 0
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": [
+                {"name": name, "offset_ms": offset, "duration_ms": duration, "depth": depth, "attrs": attrs}
+                for name, offset, duration, depth, attrs in self.spans
+            ]
+        }
+
+    def summary(self):
+        """Resumen de una línea para logs: span=ms ordenados por duración"""
+        top = sorted(self.spans, key=lambda s: s[2] or 0, reverse=True)[:6]
+        return ", ".join(f"{name}={duration:.0f}ms" for name, _, duration, _, _ in top)
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attrs', 'start', 'index')
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        trace = self.trace
+        self.start = time.perf_counter()
+        self.index = len(trace.spans)
+        trace.spans.append([self.name, round((self.start - trace.start) * 1000, 3), None, trace.depth, self.attrs])
+        trace.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        trace.depth -= 1
+        record = trace.spans[self.index]
+        record[2] = round((time.perf_counter() - self.start) * 1000, 3)
+        if exc_type is not None:
+            record[4] = dict(record[4] or {}, error=exc_type.__name__)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def start_trace(name, **attrs):
+    """Iniciar un trace para el contexto actual (un request Flask)"""
+    if not TRACE_CONFIG['enabled']:
+        return None
+    trace = Trace(name, **attrs)
+    _current_trace.set(trace)
+    return trace
+
+def finish_trace(**attrs):
+    """Cerrar el trace actual y guardarlo en el ring buffer"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    _current_trace.set(None)
+    trace.duration_ms = round((time.perf_counter() - trace.start) * 1000, 3)
+    if attrs:
+        trace.attrs.update(attrs)
+    with _traces_lock:
+        _traces.append(trace)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+def span(name, **attrs):
+    """Context manager de span; no-op (sin costo) si no hay trace activo"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs or None)
+
+def get_slowest_traces(limit=10, name=None):
+    """Los N traces más lentos del ring buffer"""
+    with _traces_lock:
+        traces = [t for t in _traces if name is None or t.name == name]
+    traces.sort(key=lambda t: t.duration_ms or 0, reverse=True)
+    return [t.to_dict() for t in traces[:limit]]
+
+def clear_traces():
+    with _traces_lock:
+        _traces.clear()
+
+# ===== PROFILER DE MUESTREO (opt-in) =====
+
+class SamplingProfiler:
+    """Muestrea los stacks de los hilos que ejecutan funciones marcadas.
+
+    Un solo hilo daemon lee sys._current_frames() cada `interval` segundos y agrega
+    stacks en formato "folded" (label;frame;frame N), compatible con flamegraph.pl
+    y speedscope.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}  # thread_id -> label
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def enter(self, label):
+        thread_id = threading.get_ident()
+        with self._lock:
+            if thread_id in self.active:
+                return False  # Ya se muestrea (llamada anidada)
+            self.active[thread_id] = label
+            self._ensure_started()
+        return True
+
+    def exit(self):
+        with self._lock:
+            self.active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = dict(self.active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, label in active.items():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(label)
+                folded = ";".join(reversed(stack))
+                with self._lock:
+                    self.stacks[folded] += 1
+                    self.samples += 1
+
+    def folded(self):
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return "\n".join(f"{stack} {count}" for stack, count in items) + ("\n" if items else "")
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+profiler = SamplingProfiler(TRACE_CONFIG['profiler_interval'])
+
+def profile_hotpath(label):
+    """Decorador: muestrea la función marcada cuando PROFILER_ENABLED está activo"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACE_CONFIG['profiler_enabled']:
+                return func(*args, **kwargs)
+            owner = profiler.enter(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if owner:
+                    profiler.exit()
+        return wrapper
+    return decorator
+
+def is_admin_request(flask_request):
+    """Endpoints de administración: requieren ADMIN_TOKEN configurado y enviado en X-Admin-Token"""
+    token = TRACE_CONFIG['admin_token']
+    # Comparación en tiempo constante (bytes: compare_digest no acepta str con caracteres no ASCII)
+    sent = flask_request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(sent.encode('utf-8'), token.encode('utf-8'))
@@ -2,23 +2,67 @@
 import requests
 import logging
 from config import *
+from resilience import guarded_request, CircuitOpenError
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
-def send_telegram_message(chat_id, text, parse_mode=None):
-    """Enviar mensaje optimizado"""
+def send_telegram_message(chat_id, text, parse_mode=None, reply_markup=None):
+    """Enviar mensaje optimizado (reply_markup: teclado inline opcional)"""
     try:
         url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
         data = {"chat_id": chat_id, "text": text}
         if parse_mode:
             data["parse_mode"] = parse_mode
+        if reply_markup:
+            data["reply_markup"] = reply_markup
         
-        response = requests.post(url, json=data, timeout=TELEGRAM_TIMEOUT)
+        with span('telegram_send', chars=len(text)):
+            response = guarded_request('telegram', 'POST', url, json=data)
         return response.status_code == 200
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ Telegram message dropped: {e}")
+        return False
     except Exception as e:
         logger.error(f"❌ Telegram error: {e}")
         return False
 
+def edit_telegram_message(chat_id, message_id, text, parse_mode=None, reply_markup=None):
+    """Reemplazar el texto (y el teclado) de un mensaje ya enviado"""
+    try:
+        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/editMessageText"
+        data = {"chat_id": chat_id, "message_id": message_id, "text": text}
+        if parse_mode:
+            data["parse_mode"] = parse_mode
+        if reply_markup:
+            data["reply_markup"] = reply_markup
+        
+        with span('telegram_edit', chars=len(text)):
+            response = guarded_request('telegram', 'POST', url, json=data)
+        return response.status_code == 200
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ Telegram edit dropped: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"❌ Telegram edit error: {e}")
+        return False
+
+def answer_callback_query(callback_query_id, text=None):
+    """Confirmar un callback_query (quita el spinner del botón en el cliente)"""
+    try:
+        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/answerCallbackQuery"
+        data = {"callback_query_id": callback_query_id}
+        if text:
+            data["text"] = text
+        response = guarded_request('telegram', 'POST', url, json=data)
+        return response.status_code == 200
+    except CircuitOpenError as e:
+        logger.warning(f"⚡ Callback answer dropped: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"❌ Callback answer error: {e}")
+        return False
+
 def setup_webhook():
     """Configurar webhook optimizado"""
     try:
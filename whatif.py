@@ -0,0 +1,192 @@
+# 🧪 whatif.py - Simulador What-If del Portfolio (ajustes RICE sobre un subconjunto + re-ranking) v2.6
+import heapq
+import logging
+import re
+import time
+from bisect import bisect_left
+from operator import itemgetter, neg, sub
+from config import *
+from database import calculate_score_fast, safe_get_value
+from query_engine import parse_query, match_positions, get_snapshot_indexes, QueryError
+from score_index import PRIORITY_THRESHOLDS
+from snapshot import get_snapshot_view
+
+logger = logging.getLogger(__name__)
+
+RICE_FIELDS = ['reach', 'impact', 'confidence', 'effort']
+FIELD_ALIASES = {'alcance': 'reach', 'impacto': 'impact', 'confianza': 'confidence', 'esfuerzo': 'effort'}
+
+_ADJUSTMENT = re.compile(r'^\s*(\w+)\s*(?:([*x×])\s*([\d.]+)|([+-]\s*[\d.]+)\s*%)\s*$', re.IGNORECASE)
+
+def _bucket(score):
+    if score >= PRIORITY_THRESHOLDS['high']:
+        return 'high'
+    if score >= PRIORITY_THRESHOLDS['medium']:
+        return 'medium'
+    return 'low'
+
+def parse_adjustments(spec):
+    """{'confidence': 0.8} o 'confianza -20%, effort*2' -> {campo: factor}; QueryError si no es válido"""
+    if isinstance(spec, dict):
+        items = list(spec.items())
+    else:
+        items = []
+        for part in re.split(r'[,;]|\s+(?:and|y)\s+', spec or ''):
+            if not part.strip():
+                continue
+            match = _ADJUSTMENT.match(part)
+            if not match:
+                raise QueryError(f"Ajuste inválido: '{part.strip()}' (usa campo*factor o campo±N%)")
+            field, _, factor, percent = match.groups()
+            items.append((field, float(factor) if factor else 1 + float(percent.replace(' ', '')) / 100))
+
+    factors = {}
+    for field, factor in items:
+        field = FIELD_ALIASES.get(str(field).lower(), str(field).lower())
+        if field not in RICE_FIELDS:
+            raise QueryError(f"Campo no ajustable: {field}. Válidos: {RICE_FIELDS}")
+        try:
+            factor = float(factor)
+        except (TypeError, ValueError):
+            raise QueryError(f"Factor inválido para {field}: {factor}")
+        if factor < 0:
+            raise QueryError(f"Factor negativo para {field}")
+        factors[field] = factors.get(field, 1.0) * factor
+    if not factors:
+        raise QueryError("Indica al menos un ajuste (reach, impact, confidence, effort)")
+    return factors
+
+class WhatIfBase:
+    """Componentes RICE y ranking base de un snapshot (se construye una vez por versión)"""
+
+    def __init__(self, records):
+        self.records = records
+        self.components = [(safe_get_value(r, 'reach', 0.0, float) or 0.0,
+                            safe_get_value(r, 'impact', 1.0, float) or 0.0,
+                            safe_get_value(r, 'confidence', 0.0, float) or 0.0,
+                            safe_get_value(r, 'effort', 1.0, float) or 0.0) for r in records]
+        self.scores = [calculate_score_fast(r) for r in records]
+        self.ids = [r.get('id') or 0 for r in records]
+        # (−score, id, posición) en orden de ranking: mismas claves que las afectadas re-calculadas
+        self.entries = sorted(zip([-score for score in self.scores], self.ids, range(len(records))))
+        self.order = [p for _, _, p in self.entries]
+        self.rank = [0] * len(records)
+        for rank, position in enumerate(self.order, 1):
+            self.rank[position] = rank
+        self.bucket = [_bucket(score) for score in self.scores]
+        self.buckets = {'high': 0, 'medium': 0, 'low': 0}
+        for bucket in self.bucket:
+            self.buckets[bucket] += 1
+
+def get_whatif_base(records, version=None):
+    return get_snapshot_view('whatif_base', lambda: WhatIfBase(records), version)
+
+def _summary(base, position, score_after, rank_after):
+    record = base.records[position]
+    return {
+        "id": record.get('id'),
+        "initiative_name": record.get('initiative_name'),
+        "team": record.get('team'),
+        "owner": record.get('owner'),
+        "score_before": base.scores[position],
+        "score_after": score_after,
+        "rank_before": base.rank[position],
+        "rank_after": rank_after,
+        "rank_delta": base.rank[position] - rank_after  # positivo = sube
+    }
+
+def simulate(records, filter_query, adjustments, version=None, top=None, limit=None):
+    """Aplicar factores a las iniciativas que cumplen filter_query y re-rankear sin tocar NocoDB.
+
+    Solo se recalculan las m iniciativas afectadas; el ranking nuevo sale de mezclar el
+    ranking base (sin ellas) con las afectadas re-ordenadas. Costo O(N + m log m) por escenario,
+    casi todo en C (sort, comprehensions); los dicts de salida solo para top, movers y cambios.
+    """
+    started = time.perf_counter()
+    top = min(top or WHATIF_CONFIG['default_top'], WHATIF_CONFIG['max_top'])
+    limit = limit or WHATIF_CONFIG['movers_limit']
+    try:
+        factors = parse_adjustments(adjustments)
+        predicates = parse_query(filter_query) if filter_query and filter_query.strip() not in ('*', 'todas', 'all') else None
+    except QueryError as e:
+        return {"success": False, "error": str(e)}
+
+    base = get_whatif_base(records, version)
+    if predicates:
+        affected, _ = match_positions(get_snapshot_indexes(records, version), predicates)
+    else:
+        affected = None  # todo el portfolio
+
+    reach_f = factors.get('reach', 1.0)
+    impact_f = factors.get('impact', 1.0)
+    confidence_f = factors.get('confidence', 1.0)
+    effort_f = factors.get('effort', 1.0)
+    components, ids, rank = base.components, base.ids, base.rank
+    high, medium = PRIORITY_THRESHOLDS['high'], PRIORITY_THRESHOLDS['medium']
+
+    # Re-score de las afectadas con la fórmula y guardas de calculate_score_fast (sin topes), sobre
+    # los componentes precalculados y sin dicts por fila. Con factores >= 0, reach*f > 0 equivale a
+    # reach > 0 salvo que algún factor sea 0 (todas quedan en 0.0).
+    positions = base.order if affected is None else sorted(affected, key=rank.__getitem__)
+    if reach_f > 0 and impact_f > 0 and confidence_f > 0:
+        scores = [round((r * reach_f) * (i * impact_f) * (c * confidence_f)
+                        / (e * effort_f if e * effort_f > 0 else 1.0), 4) if r > 0 and i > 0 and c > 0 else 0.0
+                  for r, i, c, e in map(components.__getitem__, positions)]
+    else:
+        scores = [0.0] * len(positions)
+    new_scores = dict(zip(positions, scores))
+    # En orden de ranking base la entrada queda casi ordenada: timsort es prácticamente lineal
+    new_entries = sorted(zip([-score for score in scores], map(ids.__getitem__, positions), positions))
+
+    # Ranking nuevo = merge del ranking base sin las afectadas con las afectadas re-ordenadas:
+    # dos corridas ordenadas que timsort combina en O(N) (todo el portfolio: ya es el ranking)
+    if affected is None:
+        merged = new_entries
+    else:
+        merged = [entry for entry in base.entries if entry[2] not in new_scores]
+        merged += new_entries
+        merged.sort()
+    if 4 * len(new_entries) >= len(merged):
+        new_rank = dict(zip(map(itemgetter(2), merged), range(1, len(merged) + 1)))
+    else:
+        # Subconjunto chico: una sola pasada de bisect sobre el ranking mezclado (entradas únicas y en orden)
+        new_rank, lo = {}, 0
+        for entry in new_entries:
+            lo = bisect_left(merged, entry, lo)
+            new_rank[entry[2]] = lo + 1
+
+    buckets_after = dict(base.buckets)
+    bucket_changes = [(p, before, after) for p, before, after in zip(
+        positions, map(base.bucket.__getitem__, positions),
+        ['high' if score >= high else 'medium' if score >= medium else 'low' for score in scores]) if before != after]
+    for _, before, after in bucket_changes:
+        buckets_after[before] -= 1
+        buckets_after[after] += 1
+
+    ranks_after = list(map(new_rank.__getitem__, positions))
+    movers = heapq.nlargest(limit, zip(map(abs, map(sub, map(rank.__getitem__, positions), ranks_after)),
+                                       map(neg, ranks_after), positions))
+    top_list = [_summary(base, p, -neg_score, position) for position, (neg_score, _, p) in enumerate(merged[:top], 1)]
+
+    return {
+        "success": True,
+        "filter": filter_query or "*",
+        "adjustments": factors,
+        "affected": len(new_scores),
+        "total": len(records),
+        "buckets": {"before": base.buckets, "after": buckets_after},
+        "bucket_changes_count": len(bucket_changes),
+        "bucket_changes": [dict(_summary(base, p, new_scores[p], new_rank[p]), bucket_before=before, bucket_after=after)
+                           for p, before, after in sorted(bucket_changes, key=lambda c: new_rank[c[0]])[:limit]],
+        "movers": [_summary(base, p, new_scores[p], new_rank[p]) for _, _, p in movers if base.rank[p] != new_rank[p]],
+        "top": top_list,
+        "snapshot_version": version,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+def parse_whatif_command(args):
+    """'team=Growth : confianza -20%' -> (filtro, ajustes); sin ':' el filtro es todo el portfolio"""
+    if ':' in args:
+        filter_query, _, adjustments = args.rpartition(':')
+        return filter_query.strip(), adjustments.strip()
+    return '', args.strip()
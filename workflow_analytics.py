@@ -0,0 +1,250 @@
+# 🔄 workflow_analytics.py - Analítica del Flujo de Estados (cycle time, permanencia, throughput, CFD) v2.6
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from config import *
+from database import register_refresh_listener
+from utils import get_workflow_next_status, normalize_status
+from history_store import get_history_store
+
+logger = logging.getLogger(__name__)
+
+def _workflow_order():
+    """Etapas del flujo típico en orden, siguiendo get_workflow_next_status desde Pending"""
+    order, stage = [], 'Pending'
+    while stage and stage not in order:
+        order.append(stage)
+        stage = get_workflow_next_status(stage)
+    return order
+
+WORKFLOW_ORDER = _workflow_order()
+STAGE_POSITION = {stage: position for position, stage in enumerate(WORKFLOW_ORDER)}
+DWELL_PERCENTILES = (50, 75, 90, 95)
+ALL_TEAMS = '*'  # Equipo agregado del flujo acumulado
+
+SCHEMA = [
+    # Etapa actual de cada iniciativa (entered_ts NULL = ya estaba ahí cuando empezó el historial)
+    "CREATE TABLE IF NOT EXISTS workflow_current (initiative_id INTEGER PRIMARY KEY, team TEXT, stage TEXT, "
+    "entered_ts REAL, first_seen_ts REAL, cycle_started_ts REAL)",
+    # Visitas completas a una etapa
+    "CREATE TABLE IF NOT EXISTS workflow_dwell (initiative_id INTEGER, team TEXT, stage TEXT, entered_ts REAL, "
+    "exited_ts REAL, seconds REAL)",
+    "CREATE INDEX IF NOT EXISTS workflow_dwell_stage ON workflow_dwell (stage, seconds)",
+    "CREATE INDEX IF NOT EXISTS workflow_dwell_team ON workflow_dwell (team, stage, seconds)",
+    # Iniciativas que llegaron al final del ciclo (cycle = inicio de ciclo -> fin; lead = alta -> fin)
+    "CREATE TABLE IF NOT EXISTS workflow_cycles (initiative_id INTEGER, team TEXT, started_ts REAL, "
+    "finished_ts REAL NOT NULL, cycle_seconds REAL, lead_seconds REAL)",
+    "CREATE INDEX IF NOT EXISTS workflow_cycles_finished ON workflow_cycles (finished_ts)",
+    # Flujo acumulado: conteo por equipo y etapa al final de cada día
+    "CREATE TABLE IF NOT EXISTS workflow_cfd (team TEXT NOT NULL, day TEXT NOT NULL, stage TEXT NOT NULL, "
+    "count INTEGER, PRIMARY KEY (team, day, stage)) WITHOUT ROWID",
+    # Marca de agua: último rowid de status_transitions ya procesado
+    "CREATE TABLE IF NOT EXISTS workflow_watermark (id INTEGER PRIMARY KEY CHECK (id = 0), last_rowid INTEGER)"
+]
+
+def _day(ts):
+    return time.strftime('%Y-%m-%d', time.gmtime(ts))
+
+def _stage(status):
+    return normalize_status(status) if status else None
+
+def _percentile_offset(count, percentile):
+    """Offset 0-based del percentil nearest-rank"""
+    return max(int(-(-percentile * count // 100)) - 1, 0)
+
+class WorkflowAnalytics:
+    """Métricas de flujo mantenidas incrementalmente sobre el historial.
+
+    Cada refresh solo procesa las transiciones nuevas de history_store (rowid > marca de
+    agua) y actualiza el conteo del día por equipo y etapa; nunca se re-escanea el historial.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        conn = store.connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def process_refresh(self, records, ts=None):
+        """Aplicar las transiciones pendientes y el conteo del día; devuelve cuántas se procesaron"""
+        ts = time.time() if ts is None else ts
+        teams = {}
+        wip = Counter()
+        for record in records:
+            team = str(record.get('team') or 'Sin equipo').strip() or 'Sin equipo'
+            if record.get('id') is not None:
+                teams[record['id']] = team
+            stage = _stage(record.get('status'))
+            if stage:
+                wip[(team, stage)] += 1
+                wip[(ALL_TEAMS, stage)] += 1
+
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT last_rowid FROM workflow_watermark WHERE id = 0").fetchone()
+            last_rowid = row[0] if row else 0
+            pending = conn.execute("SELECT rowid, ts, initiative_id, from_status, to_status FROM status_transitions "
+                                   "WHERE rowid > ? ORDER BY rowid", (last_rowid,)).fetchall()
+            if not pending and last_rowid == 0 and not conn.execute("SELECT 1 FROM workflow_current LIMIT 1").fetchone():
+                # Primer refresh: las iniciativas existentes entran sin fecha de entrada conocida
+                conn.executemany("INSERT OR IGNORE INTO workflow_current (initiative_id, team, stage) VALUES (?, ?, ?)",
+                                 [(record['id'], teams[record['id']], _stage(record.get('status')))
+                                  for record in records if record.get('id') is not None])
+            for transition in pending:
+                self._apply(conn, transition, teams)
+            if pending:
+                conn.execute("INSERT OR REPLACE INTO workflow_watermark (id, last_rowid) VALUES (0, ?)", (pending[-1][0],))
+
+            day = _day(ts)
+            conn.execute("DELETE FROM workflow_cfd WHERE day = ?", (day,))
+            conn.executemany("INSERT INTO workflow_cfd (team, day, stage, count) VALUES (?, ?, ?, ?)",
+                             [(team, day, stage, count) for (team, stage), count in wip.items()])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(pending)
+
+    def _apply(self, conn, transition, teams):
+        _, ts, initiative_id, from_status, to_status = transition
+        current = conn.execute("SELECT team, stage, entered_ts, first_seen_ts, cycle_started_ts FROM workflow_current "
+                               "WHERE initiative_id = ?", (initiative_id,)).fetchone()
+        team, _, entered_ts, first_seen_ts, cycle_started_ts = current or (None, None, None, None, None)
+        team = teams.get(initiative_id) or team or 'Sin equipo'
+        from_stage, to_stage = _stage(from_status), _stage(to_status)
+
+        if from_stage and entered_ts is not None:
+            conn.execute("INSERT INTO workflow_dwell (initiative_id, team, stage, entered_ts, exited_ts, seconds) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (initiative_id, team, from_stage, entered_ts, ts, ts - entered_ts))
+        if to_status is None:
+            conn.execute("DELETE FROM workflow_current WHERE initiative_id = ?", (initiative_id,))
+            return
+        if from_status is None:
+            first_seen_ts = ts
+
+        # El ciclo empieza al entrar por primera vez en WORKFLOW_CONFIG['cycle_start'] o una etapa posterior
+        start_position = STAGE_POSITION[WORKFLOW_CONFIG['cycle_start']]
+        end_position = STAGE_POSITION[WORKFLOW_CONFIG['cycle_end']]
+        position = STAGE_POSITION.get(to_stage)
+        if position is not None and position >= start_position and cycle_started_ts is None:
+            cycle_started_ts = ts
+        if position == end_position:
+            conn.execute("INSERT INTO workflow_cycles (initiative_id, team, started_ts, finished_ts, cycle_seconds, lead_seconds) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (initiative_id, team, cycle_started_ts, ts,
+                          ts - cycle_started_ts if cycle_started_ts is not None and cycle_started_ts < ts else None,
+                          ts - first_seen_ts if first_seen_ts is not None else None))
+
+        conn.execute("INSERT OR REPLACE INTO workflow_current (initiative_id, team, stage, entered_ts, first_seen_ts, "
+                     "cycle_started_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                     (initiative_id, team, to_stage or to_status, ts, first_seen_ts, cycle_started_ts))
+
+    # ===== CONSULTAS =====
+    def _duration_stats(self, conn, column, start, end, team):
+        query = f"SELECT {column} FROM workflow_cycles WHERE finished_ts BETWEEN ? AND ? AND {column} IS NOT NULL"
+        params = [start, end]
+        if team:
+            query += " AND team = ?"
+            params.append(team)
+        values = sorted(row[0] for row in conn.execute(query, params))
+        if not values:
+            return {"count": 0}
+        days = [value / 86400 for value in values]
+        return {
+            "count": len(days),
+            "avg_days": round(sum(days) / len(days), 2),
+            **{f"p{p}_days": round(days[_percentile_offset(len(days), p)], 2) for p in DWELL_PERCENTILES}
+        }
+
+    def dwell_percentiles(self, team=None):
+        """Permanencia por etapa (días) con percentiles nearest-rank vía índice (stage[, team], seconds)"""
+        conn = self.store.connection()
+        result = {}
+        for stage in WORKFLOW_ORDER:
+            where, params = "stage = ?", [stage]
+            if team:
+                where, params = "team = ? AND stage = ?", [team, stage]
+            count = conn.execute(f"SELECT COUNT(*) FROM workflow_dwell WHERE {where}", params).fetchone()[0]
+            if not count:
+                continue
+            stats = {"visits": count}
+            for p in DWELL_PERCENTILES:
+                seconds = conn.execute(f"SELECT seconds FROM workflow_dwell WHERE {where} ORDER BY seconds LIMIT 1 OFFSET ?",
+                                       params + [_percentile_offset(count, p)]).fetchone()[0]
+                stats[f"p{p}_days"] = round(seconds / 86400, 2)
+            result[stage] = stats
+        return result
+
+    def throughput(self, start, end, team=None):
+        """Iniciativas que llegaron al fin del ciclo por semana (lunes ISO)"""
+        query = "SELECT finished_ts FROM workflow_cycles WHERE finished_ts BETWEEN ? AND ?"
+        params = [start, end]
+        if team:
+            query += " AND team = ?"
+            params.append(team)
+        weeks = Counter()
+        for (finished_ts,) in self.store.connection().execute(query, params):
+            date = datetime.fromtimestamp(finished_ts, timezone.utc).date()
+            weeks[(date - timedelta(days=date.weekday())).isoformat()] += 1
+        return [{"week": week, "completed": weeks[week]} for week in sorted(weeks)]
+
+    def work_in_progress(self, team=None):
+        query = "SELECT stage, COUNT(*) FROM workflow_current"
+        params = []
+        if team:
+            query += " WHERE team = ?"
+            params.append(team)
+        counts = dict(self.store.connection().execute(query + " GROUP BY stage", params).fetchall())
+        return {stage: counts.get(stage, 0) for stage in WORKFLOW_ORDER + ['Discarded']}
+
+    def summary(self, start, end, team=None):
+        conn = self.store.connection()
+        return {
+            "workflow": WORKFLOW_ORDER,
+            "cycle": {"from": WORKFLOW_CONFIG['cycle_start'], "to": WORKFLOW_CONFIG['cycle_end']},
+            "cycle_time": self._duration_stats(conn, 'cycle_seconds', start, end, team),
+            "lead_time": self._duration_stats(conn, 'lead_seconds', start, end, team),
+            "dwell_time": self.dwell_percentiles(team),
+            "throughput": self.throughput(start, end, team),
+            "work_in_progress": self.work_in_progress(team)
+        }
+
+    def cumulative_flow(self, start, end, team=None):
+        """Serie diaria {día, etapa: conteo} del equipo (o de todos con team=None)"""
+        rows = self.store.connection().execute(
+            "SELECT day, stage, count FROM workflow_cfd WHERE team = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (team or ALL_TEAMS, _day(start), _day(end))).fetchall()
+        series = []
+        for day, stage, count in rows:
+            if not series or series[-1]["day"] != day:
+                series.append({"day": day, **{s: 0 for s in WORKFLOW_ORDER}})
+            series[-1][stage] = count
+        return series
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+def get_workflow_analytics():
+    """Analítica sobre el store de historial (None si el historial está deshabilitado)"""
+    global _analytics
+    if _analytics is None:
+        store = get_history_store()
+        if store is None:
+            return None
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = WorkflowAnalytics(store)
+    return _analytics
+
+def _on_snapshot_refresh(previous, current, version):
+    # Registrado después del listener de history_store: las transiciones del refresh ya están escritas
+    if current is None:
+        return
+    analytics = get_workflow_analytics()
+    if analytics is not None:
+        analytics.process_refresh(current)
+
+register_refresh_listener(_on_snapshot_refresh)